@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+from resilience import resilient_call, http_session
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# Offline generation through the provider's batch API (OpenAI-compatible
+# /files and /batches endpoints): all prompts for one model go into a single
+# JSONL file, the job is submitted once and polled, and results are matched
+# back by custom_id. GROQ_BATCH_BASE_URL may point at a local stand-in.
+GROQ_BATCH_BASE_URL = os.getenv('GROQ_BATCH_BASE_URL', 'https://api.groq.com/openai/v1')
+BATCH_COMPLETION_WINDOW = os.getenv('BATCH_COMPLETION_WINDOW', '24h')
+BATCH_POLL_SECONDS = float(os.getenv('BATCH_POLL_SECONDS', '30'))
+BATCH_MAX_WAIT_SECONDS = float(os.getenv('BATCH_MAX_WAIT_SECONDS', str(24 * 3600)))
+# Submitted batch ids, so an interrupted run resumes polling instead of resubmitting
+BATCH_STATE_FILE = os.getenv('BATCH_STATE_FILE', 'batch_jobs.json')
+TERMINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+# flock only excludes other processes' file handles; threads also share this lock
+_state_lock = threading.Lock()
+
+class BatchError(Exception):
+    pass
+
+def batch_line(custom_id, body):
+    return json.dumps({'custom_id': custom_id, 'method': 'POST', 'url': '/v1/chat/completions', 'body': body})
+
+class BatchClient:
+    """Upload a JSONL request file, create a batch, poll it and download its results."""
+
+    def __init__(self, api_key, base_url=None, state_file=None):
+        self.base_url = (base_url or GROQ_BATCH_BASE_URL).rstrip('/')
+        self.headers = {'Authorization': f'Bearer {api_key}'}
+        self.state_file = state_file or BATCH_STATE_FILE
+
+    def _request(self, method, path, idempotent=True, **kwargs):
+        def send():
+            response = http_session().request(method, f"{self.base_url}{path}", headers=self.headers, timeout=60, **kwargs)
+            response.raise_for_status()
+            return response
+        return resilient_call('groq:batch', send, idempotent=idempotent)
+
+    @contextmanager
+    def _locked_state(self):
+        """Read-modify-write the state file under an exclusive lock (workers share it across documents)."""
+        with _state_lock:
+            fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, 'r+', encoding='utf-8') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    try:
+                        state = json.loads(f.read() or '{}')
+                    except json.JSONDecodeError:
+                        state = {}
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    if state:
+                        f.write(json.dumps(state, indent=2))
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def submit(self, lines, name='batch'):
+        """Submit a batch for the given JSONL lines, or return the id of the same batch submitted earlier.
+
+        The state file stays locked until the batch id is recorded, so the
+        same lines are never submitted twice.
+        """
+        data = ("\n".join(lines) + "\n").encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        with self._locked_state() as state:
+            if digest in state:
+                logging.info(f"Resuming batch {state[digest]} for {name}")
+                print(f"Resuming batch {state[digest]} for {name}")
+                return state[digest]
+            uploaded = self._request('POST', '/files', idempotent=False, data={'purpose': 'batch'},
+                                     files={'file': (f"{name}.jsonl", data, 'application/jsonl')}).json()
+            batch = self._request('POST', '/batches', idempotent=False, json={
+                'input_file_id': uploaded['id'],
+                'endpoint': '/v1/chat/completions',
+                'completion_window': BATCH_COMPLETION_WINDOW
+            }).json()
+            state[digest] = batch['id']
+        logging.info(f"Submitted batch {batch['id']} for {name} ({len(lines)} requests)")
+        print(f"Submitted batch {batch['id']} for {name} ({len(lines)} requests)")
+        return batch['id']
+
+    def wait(self, batch_id, poll_seconds=None, max_wait=None):
+        """Poll until the batch reaches a terminal status; raises BatchError after ``max_wait`` seconds."""
+        poll_seconds = BATCH_POLL_SECONDS if poll_seconds is None else poll_seconds
+        max_wait = BATCH_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        started = time.monotonic()
+        last_status = None
+        while True:
+            batch = self._request('GET', f"/batches/{batch_id}").json()
+            counts = batch.get('request_counts') or {}
+            status = (batch['status'], counts.get('completed'), counts.get('failed'))
+            if status != last_status:
+                logging.info(f"Batch {batch_id}: {batch['status']} ({counts.get('completed', 0)}/{counts.get('total', '?')} completed, {counts.get('failed', 0)} failed)")
+                last_status = status
+            if batch['status'] in TERMINAL_STATUSES:
+                return batch
+            if time.monotonic() - started + poll_seconds > max_wait:
+                raise BatchError(f"Batch {batch_id} still {batch['status']} after {max_wait:.0f}s; rerun to resume polling")
+            time.sleep(poll_seconds)
+
+    def results(self, batch):
+        """custom_id -> response body for every successful request; failed requests are left out."""
+        results = {}
+        if batch.get('output_file_id'):
+            content = self._request('GET', f"/files/{batch['output_file_id']}/content").text
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get('response') or {}
+                if item.get('error') or response.get('status_code', 200) >= 400:
+                    logging.warning(f"Batch request {item.get('custom_id')} failed: {item.get('error') or response.get('status_code')}")
+                    continue
+                results[item['custom_id']] = response.get('body')
+        if batch.get('error_file_id'):
+            content = self._request('GET', f"/files/{batch['error_file_id']}/content").text
+            failed = [json.loads(line).get('custom_id') for line in content.splitlines() if line.strip()]
+            if failed:
+                logging.warning(f"Batch {batch['id']}: {len(failed)} requests failed: {', '.join(map(str, failed[:20]))}")
+        return results
+
+    def run(self, jobs):
+        """Submit every ``(name, lines)`` job, then wait for all of them; returns merged results by custom_id.
+
+        Submitted ids are forgotten once their batch reached a terminal status.
+        """
+        submitted = [(name, self.submit(lines, name)) for name, lines in jobs if lines]
+        results = {}
+        for name, batch_id in submitted:
+            batch = self.wait(batch_id)
+            if batch['status'] != 'completed':
+                logging.warning(f"Batch {batch_id} for {name} ended as {batch['status']}; using the results it has")
+            results.update(self.results(batch))
+            with self._locked_state() as state:
+                for digest in [digest for digest, known in state.items() if known == batch_id]:
+                    del state[digest]
+        return results
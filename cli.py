@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# Stage modules (and through them jira, github, groq, PyPDF2, requests) are
+# imported inside each subcommand so a command only pays for what it uses.
+HEAVY_MODULES = ('jira', 'github', 'groq', 'PyPDF2', 'requests', 'httpx')
+CLI_STARTUP_BUDGET = float(os.getenv('CLI_STARTUP_BUDGET', '0.5'))
+
+def cmd_extract(args):
+    import main_task1
+    main_task1.extract_text_to_txt(args.input, args.output)
+
+def cmd_plan(args):
+    import main_task1
+    text = main_task1.read_txt_file(args.input)
+    if not main_task1.extract_task_structure_with_groq(text, args.output):
+        return 1
+
+def cmd_parse(args):
+    import main_task1
+    tasks = main_task1.parse_tasks_from_file(args.task_file)
+    print(json.dumps(tasks, indent=2))
+
+def cmd_tickets(args):
+    import main_task1
+    tasks = main_task1.parse_tasks_from_file(args.task_file)
+    jira = main_task1.validate_jira_connection()
+    if jira is None:
+        print("Failed to connect to Jira. Skipping ticket creation.")
+        return 1
+    main_task1.create_jira_tickets(jira, tasks)
+
+def cmd_repo(args):
+    import main_task2
+    main_task2.main(['--profile'] if args.profile else [])
+
+def cmd_testcases(args):
+    import main_task3
+    main_task3.main(['--profile'] if args.profile else [])
+
+def cmd_save_test_cases(args):
+    """Render the combined test-case file from existing test_cases_<KEY>.md files."""
+    import glob
+    import main_task3
+    test_cases = {}
+    for path in sorted(glob.glob(os.path.join(args.directory, 'test_cases_*.md'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            test_cases[os.path.basename(path)[len('test_cases_'):-len('.md')]] = f.read()
+    main_task3.save_test_cases_to_text_file(test_cases, args.output)
+
+def cmd_export_tickets(args):
+    from ticket_manifest import TicketStream, export_legacy_json, resolve_ticket_file
+    count = export_legacy_json(TicketStream(resolve_ticket_file(args.manifest)), args.output)
+    print(f"Exported {count} tickets to {args.output}")
+
+def cmd_run(args):
+    import orchestrator
+    return 0 if orchestrator.run_pipeline(args.input) else 1
+
+def cmd_worker(args):
+    import worker
+    argv = ['--once'] if args.once else []
+    for option in ('inbox', 'outbox', 'concurrency'):
+        if getattr(args, option) is not None:
+            argv += [f'--{option}', str(getattr(args, option))]
+    return worker.main(argv)
+
+def cmd_dry_run(args):
+    import run_planner
+    try:
+        plan = run_planner.plan_run(
+            document=args.document, task_file=args.tasks, ticket_file=args.tickets,
+            backend=args.backend, workers=args.workers
+        )
+    except OSError as e:
+        print(f"Error: {e}")
+        return 1
+    run_planner.print_plan(plan, as_json=args.json)
+
+def measure_startup(command, cwd):
+    """Wall time of a fresh interpreter running ``cli.py <command>`` and the heavy modules it imported."""
+    started = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__)] + command,
+        capture_output=True, text=True, cwd=cwd
+    )
+    elapsed = time.monotonic() - started
+    imported = {
+        line.rsplit('|', 1)[-1].strip().split('.')[0]
+        for line in result.stderr.splitlines() if line.startswith('import time:')
+    }
+    return elapsed, result.returncode, [m for m in HEAVY_MODULES if m in imported]
+
+def cmd_startup_check(args):
+    """Run short subcommands in fresh interpreters; fail if they exceed the budget or load service clients."""
+    import tempfile
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'extracted_tasks.txt'), 'w', encoding='utf-8') as f:
+            f.write("Task 1: Sample\nDescription: Sample task.\nAcceptance Criteria:\n- Works\n")
+        for command in (['--help'], ['parse'], ['save-test-cases', '-o', 'all_test_cases.txt']):
+            elapsed, returncode, heavy = measure_startup(command, tmp)
+            ok = returncode == 0 and elapsed <= args.budget and not heavy
+            failed = failed or not ok
+            print(f"{'OK  ' if ok else 'FAIL'} cli.py {' '.join(command)}: {elapsed:.3f}s (budget {args.budget:.2f}s)"
+                  + (f", heavy imports: {', '.join(heavy)}" if heavy else "")
+                  + (f", exit code {returncode}" if returncode else ""))
+    return 1 if failed else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Requirements-to-Jira/GitHub pipeline.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('extract', help="Extract text from a .txt/.pdf/.docx document")
+    p.add_argument('input')
+    p.add_argument('-o', '--output', default='temp_extracted_text.txt')
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser('plan', help="Extract tasks and subtasks from text with Groq")
+    p.add_argument('input', nargs='?', default='temp_extracted_text.txt')
+    p.add_argument('-o', '--output', default='extracted_tasks.txt')
+    p.set_defaults(func=cmd_plan)
+
+    p = sub.add_parser('parse', help="Parse an extracted task file and print it as JSON")
+    p.add_argument('task_file', nargs='?', default='extracted_tasks.txt')
+    p.set_defaults(func=cmd_parse)
+
+    p = sub.add_parser('tickets', help="Create Jira tickets from an extracted task file")
+    p.add_argument('task_file', nargs='?', default='extracted_tasks.txt')
+    p.set_defaults(func=cmd_tickets)
+
+    p = sub.add_parser('repo', help="Create and structure the GitHub repository (main_task2)")
+    p.add_argument('--profile', action='store_true', help="Report per-stage memory and CPU profile")
+    p.set_defaults(func=cmd_repo)
+
+    p = sub.add_parser('testcases', help="Generate and deliver test cases (main_task3)")
+    p.add_argument('--profile', action='store_true', help="Report per-stage memory and CPU profile")
+    p.set_defaults(func=cmd_testcases)
+
+    p = sub.add_parser('save-test-cases', help="Combine test_cases_<KEY>.md files into one text file")
+    p.add_argument('directory', nargs='?', default='.')
+    p.add_argument('-o', '--output', default='all_test_cases.txt')
+    p.set_defaults(func=cmd_save_test_cases)
+
+    p = sub.add_parser('export-tickets', help="Export the JSON-lines ticket manifest to the legacy ticket_keys.json format")
+    p.add_argument('manifest', nargs='?')
+    p.add_argument('-o', '--output', default='ticket_keys.json')
+    p.set_defaults(func=cmd_export_tickets)
+
+    p = sub.add_parser('run', help="Run every stage as one concurrent job")
+    p.add_argument('input', nargs='?', default="Body guard booking services (2).docx")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser('worker', help="Keep clients warm and process documents dropped into an inbox directory")
+    p.add_argument('--inbox', help="Directory watched for .txt/.pdf/.docx documents (WORKER_INBOX, default inbox)")
+    p.add_argument('--outbox', help="Directory for per-document outputs and results (WORKER_OUTBOX, default outbox)")
+    p.add_argument('--concurrency', type=int, help="Documents processed at the same time (WORKER_CONCURRENCY, default 2)")
+    p.add_argument('--once', action='store_true', help="Process the documents already in the inbox, then exit")
+    p.set_defaults(func=cmd_worker)
+
+    p = sub.add_parser('dry-run', help="Estimate calls, tokens and wall time of a run without any writes")
+    p.add_argument('document', nargs='?', help="Requirement document to extract locally (counts the Groq extraction call)")
+    p.add_argument('--tasks', default='extracted_tasks.txt', help="Existing extracted task file")
+    p.add_argument('--tickets', nargs='?', const='', help="Start from an existing ticket file (default: ticket manifest)")
+    p.add_argument('--backend', choices=('api', 'git'), help="Publish backend (default: PUBLISH_BACKEND)")
+    p.add_argument('--workers', type=int, help="Orchestrator concurrency (default: ORCHESTRATOR_WORKERS)")
+    p.add_argument('--json', action='store_true', help="Print the plan as JSON")
+    p.set_defaults(func=cmd_dry_run)
+
+    p = sub.add_parser('startup-check', help="Check that light subcommands start within budget")
+    p.add_argument('--budget', type=float, default=CLI_STARTUP_BUDGET)
+    p.set_defaults(func=cmd_startup_check)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Settings such as LOG_FILE may come from .env, so load it before logging starts
+    from dotenv import load_dotenv
+    from log_setup import setup_logging
+    load_dotenv()
+    setup_logging()
+    return args.func(args) or 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import os
+import time
+import queue
+import logging
+import threading
+
+# Items are fanned out to every sink as soon as they are produced; each sink
+# drains its own bounded queue with its own worker threads, so a slow sink
+# only holds back the producer once its queue is full.
+DELIVERY_QUEUE_SIZE = int(os.getenv('DELIVERY_QUEUE_SIZE', '32'))
+
+_STOP = object()
+
+class DeliveryPipeline:
+    """Producer-consumer fan-out of ``(key, value)`` items to named sinks.
+
+    ``add_sink(name, handler, workers)`` registers ``handler(key, value)``;
+    a sink with one worker sees items in submission order. A handler
+    exception is logged and counted, and the sink carries on.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = DELIVERY_QUEUE_SIZE if queue_size is None else queue_size
+        self.sinks = []
+        self.started_at = None
+        self.finished_at = None
+        self.producer_time = 0.0
+
+    def add_sink(self, name, handler, workers=1):
+        self.sinks.append({
+            'name': name,
+            'handler': handler,
+            'workers': max(1, workers),
+            'queue': queue.Queue(maxsize=self.queue_size),
+            'threads': [],
+            'lock': threading.Lock(),
+            'items': 0,
+            'failed': 0,
+            'busy': 0.0
+        })
+
+    def _work(self, sink):
+        while True:
+            item = sink['queue'].get()
+            if item is _STOP:
+                return
+            key, value = item
+            started = time.monotonic()
+            failed = False
+            try:
+                sink['handler'](key, value)
+            except Exception as e:
+                failed = True
+                logging.error(f"Delivery to {sink['name']} failed for {key}: {e}")
+                print(f"Error: delivery to {sink['name']} failed for {key}: {e}")
+            with sink['lock']:
+                sink['items'] += 1
+                sink['failed'] += 1 if failed else 0
+                sink['busy'] += time.monotonic() - started
+
+    def start(self):
+        self.started_at = time.monotonic()
+        for sink in self.sinks:
+            for index in range(sink['workers']):
+                thread = threading.Thread(target=self._work, args=(sink,), name=f"deliver-{sink['name']}-{index}", daemon=True)
+                thread.start()
+                sink['threads'].append(thread)
+
+    def submit(self, key, value):
+        for sink in self.sinks:
+            sink['queue'].put((key, value))
+
+    def run(self, items):
+        """Start the sinks, feed them every ``(key, value)`` from ``items`` and wait for delivery."""
+        self.start()
+        try:
+            produced = time.monotonic()
+            for key, value in items:
+                self.producer_time += time.monotonic() - produced
+                self.submit(key, value)
+                produced = time.monotonic()
+        finally:
+            self.close()
+
+    def close(self):
+        for sink in self.sinks:
+            for _ in sink['threads']:
+                sink['queue'].put(_STOP)
+        for sink in self.sinks:
+            for thread in sink['threads']:
+                thread.join()
+        self.finished_at = time.monotonic()
+
+    def report(self):
+        """Wall time next to producer and per-sink busy time, to show how much the stages overlapped."""
+        total = (self.finished_at or time.monotonic()) - self.started_at
+        sequential = self.producer_time + sum(sink['busy'] for sink in self.sinks)
+        lines = [f"Delivery wall time: {total:.2f}s (generation {self.producer_time:.2f}s, {sequential:.2f}s if run one item at a time)"]
+        for sink in self.sinks:
+            lines.append(
+                f"  {sink['name']}: {sink['items']} items ({sink['failed']} failed), "
+                f"{sink['busy']:.2f}s busy on {sink['workers']} worker{'s' if sink['workers'] != 1 else ''}"
+            )
+        return lines
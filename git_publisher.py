@@ -0,0 +1,151 @@
+import os
+import base64
+import logging
+import subprocess
+
+from github_sync import branch_name_for
+from ticket_manifest import iter_task_groups
+
+# Alternative to per-file REST calls: build every branch in a local working
+# copy and publish all of them with a single `git push`.
+PUBLISH_BACKEND = os.getenv('PUBLISH_BACKEND', 'api')
+GIT_PUBLISH_WORKDIR = os.getenv('GIT_PUBLISH_WORKDIR', '.publish_repo')
+GIT_PUBLISH_REMOTE = os.getenv('GIT_PUBLISH_REMOTE')
+GIT_COMMIT_NAME = os.getenv('GIT_COMMIT_NAME', 'Pipeline Bot')
+GIT_COMMIT_EMAIL = os.getenv('GIT_COMMIT_EMAIL', 'pipeline-bot@users.noreply.github.com')
+
+class GitError(Exception):
+    pass
+
+def github_remote_url(username, repo_name):
+    return f"https://github.com/{username}/{repo_name}.git"
+
+class GitPublisher:
+    """Builds main and the feature branches in a local repository and pushes them in one go.
+
+    Network round trips per run are constant: one fetch and one push,
+    whatever the number of branches and files. ``remote_url`` may be any git
+    URL, including a path to a local bare repository.
+
+    The remote URL stored in the working copy never carries credentials: a
+    ``token`` is sent to github.com as an Authorization header on fetch and
+    push only, through the environment rather than the command line or
+    ``.git/config``.
+    """
+
+    def __init__(self, remote_url, workdir=None, token=None):
+        self.remote_url = remote_url
+        self.workdir = workdir or GIT_PUBLISH_WORKDIR
+        self.token = token
+        self.remote_branches = set()
+
+    def _auth_env(self):
+        if not self.token:
+            return None
+        basic = base64.b64encode(f"x-access-token:{self.token}".encode('utf-8')).decode('ascii')
+        return dict(os.environ, GIT_CONFIG_COUNT='1',
+                    GIT_CONFIG_KEY_0='http.https://github.com/.extraheader',
+                    GIT_CONFIG_VALUE_0=f"Authorization: Basic {basic}")
+
+    def _git(self, *args, check=True, auth=False):
+        result = subprocess.run(
+            ['git', '-C', self.workdir, *args],
+            capture_output=True, text=True, env=self._auth_env() if auth else None
+        )
+        if check and result.returncode != 0:
+            stderr = result.stderr.strip()
+            if self.token:
+                stderr = stderr.replace(self.token, '<token>')
+            raise GitError(f"git {args[0]} failed: {stderr}")
+        return result
+
+    def prepare(self):
+        """Create or reuse the working copy and fetch the remote's branches (one round trip)."""
+        if not os.path.isdir(os.path.join(self.workdir, '.git')):
+            os.makedirs(self.workdir, exist_ok=True)
+            self._git('init', '-q')
+        if self._git('remote', 'get-url', 'origin', check=False).returncode == 0:
+            self._git('remote', 'set-url', 'origin', self.remote_url)
+        else:
+            self._git('remote', 'add', 'origin', self.remote_url)
+        self._git('fetch', '-q', '--prune', 'origin', '+refs/heads/*:refs/remotes/origin/*', auth=True)
+        refs = self._git('for-each-ref', '--format=%(refname:strip=3)', 'refs/remotes/origin').stdout
+        self.remote_branches = {ref for ref in refs.splitlines() if ref and ref != 'HEAD'}
+
+    def checkout(self, branch, base='main'):
+        """Check out ``branch`` at its remote tip, or create it from ``base``."""
+        if branch in self.remote_branches:
+            self._git('checkout', '-q', '-f', '-B', branch, f"origin/{branch}")
+        elif self._git('rev-parse', '-q', '--verify', f"refs/heads/{branch}", check=False).returncode == 0:
+            self._git('checkout', '-q', '-f', branch)
+        elif branch == 'main':
+            # Empty remote: start main as an unborn branch
+            self._git('symbolic-ref', 'HEAD', 'refs/heads/main')
+            self._git('read-tree', '--empty')
+        else:
+            self._git('checkout', '-q', '-f', '-B', branch, base)
+        self._git('clean', '-q', '-fd')
+
+    def write_file(self, path, content, write_summary=None):
+        """Write a file into the working tree; returns 'created', 'updated' or 'skipped'."""
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        full_path = os.path.join(self.workdir, path)
+        action = 'created'
+        if os.path.exists(full_path):
+            with open(full_path, 'rb') as f:
+                action = 'skipped' if f.read() == data else 'updated'
+        if action != 'skipped':
+            os.makedirs(os.path.dirname(full_path) or '.', exist_ok=True)
+            with open(full_path, 'wb') as f:
+                f.write(data)
+            self._git('add', '--', path)
+        if write_summary is not None:
+            write_summary[action] += 1
+        return action
+
+    def commit(self, message):
+        """Commit staged changes; returns False when there was nothing to commit."""
+        if self._git('diff', '--cached', '--quiet', check=False).returncode == 0 and \
+                self._git('rev-parse', '-q', '--verify', 'HEAD', check=False).returncode == 0:
+            return False
+        self._git('-c', f"user.name={GIT_COMMIT_NAME}", '-c', f"user.email={GIT_COMMIT_EMAIL}",
+                  'commit', '-q', '--allow-empty', '-m', message)
+        return True
+
+    def push(self, branches):
+        """Publish the given branches with one atomic push."""
+        self._git('push', '-q', '--atomic', 'origin', *[f"refs/heads/{b}:refs/heads/{b}" for b in branches], auth=True)
+
+    def publish(self, ticket_keys, test_cases=None, project_files=None, main_readme=None,
+                render_branch_readme=None, write_summary=None):
+        """Build main and each feature branch (README and test cases), then push once.
+
+        ``project_files`` maps paths to contents for main; ``render_branch_readme``
+        renders a task's branch README. Returns the list of branches pushed.
+        """
+        self.prepare()
+        self.checkout('main')
+        for path, content in (project_files or {}).items():
+            self.write_file(path, content, write_summary)
+        if main_readme is not None:
+            self.write_file('README.md', main_readme, write_summary)
+        if self.commit("Update project files and README.md"):
+            print("Committed changes to main")
+
+        branches = ['main']
+        for task_key, task in iter_task_groups(ticket_keys):
+            branch_name = branch_name_for(task_key, task['summary'])
+            self.checkout(branch_name)
+            if render_branch_readme is not None:
+                self.write_file('README.md', render_branch_readme(task_key, task), write_summary)
+            if test_cases and task_key in test_cases:
+                self.write_file(f"test_cases_{task_key}.md", test_cases[task_key], write_summary)
+            if self.commit(f"Update README.md and test cases for {task_key}"):
+                print(f"Committed changes to branch {branch_name}")
+            branches.append(branch_name)
+
+        self.checkout('main')
+        self.push(branches)
+        logging.info(f"Pushed {len(branches)} branches with a single git push")
+        print(f"Pushed {len(branches)} branches with a single git push")
+        return branches
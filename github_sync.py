@@ -0,0 +1,54 @@
+import re
+import hashlib
+import logging
+import threading
+from resilience import resilient_call
+
+_summary_lock = threading.Lock()
+
+def git_blob_sha(content):
+    """Return the git blob SHA-1 GitHub reports for a file with this content."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    header = f"blob {len(content)}\0".encode('utf-8')
+    return hashlib.sha1(header + content).hexdigest()
+
+def branch_name_for(task_key, summary):
+    """Feature branch for a task: feature/<KEY>-<sanitized-summary>, capped at 50 characters."""
+    sanitized_summary = re.sub(r'[^a-zA-Z0-9\s-]', '', summary).lower().replace(' ', '-')
+    return f"feature/{task_key}-{sanitized_summary}"[:50]
+
+def new_write_summary():
+    """Counters for repository writes made (or avoided) during a run."""
+    return {'created': 0, 'updated': 0, 'skipped': 0}
+
+def upsert_repo_file(repo, path, content, branch, create_message, update_message, write_summary=None):
+    """Create or update a file on a branch, skipping the write when the remote blob is identical.
+
+    Returns 'created', 'updated' or 'skipped'.
+    """
+    try:
+        contents = resilient_call('github', lambda: repo.get_contents(path, ref=branch))
+    except Exception:
+        contents = None
+
+    if contents is None:
+        resilient_call('github', lambda: repo.create_file(path, create_message, content, branch=branch), idempotent=False)
+        action = 'created'
+    elif contents.sha == git_blob_sha(content):
+        logging.info(f"Skipped {path} on {branch}: content unchanged ({contents.sha})")
+        action = 'skipped'
+    else:
+        resilient_call('github', lambda: repo.update_file(path, update_message, content, contents.sha, branch=branch), idempotent=False)
+        action = 'updated'
+
+    if write_summary is not None:
+        with _summary_lock:
+            write_summary[action] += 1
+    return action
+
+def format_write_summary(write_summary):
+    return (
+        f"{write_summary['created']} created, {write_summary['updated']} updated, "
+        f"{write_summary['skipped']} skipped (unchanged)"
+    )
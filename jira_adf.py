@@ -0,0 +1,108 @@
+import re
+
+# Markdown -> Atlassian Document Format (ADF) for Jira comments. Covers what
+# the test-case documents use: headings, paragraphs, bullet and numbered
+# lists (nested by indentation), rules, fenced code and **bold** / `code`
+# inline marks.
+HEADING = re.compile(r'^(#{1,6})\s+(.*)$')
+BULLET = re.compile(r'^(\s*)[-*+]\s+(.*)$')
+ORDERED = re.compile(r'^(\s*)\d+[.)]\s+(.*)$')
+RULE = re.compile(r'^\s*(?:-{3,}|\*{3,}|_{3,})\s*$')
+INLINE = re.compile(r'(\*\*[^*]+\*\*|`[^`]+`)')
+
+def inline_nodes(text):
+    """Text nodes for one line, with strong/code marks."""
+    nodes = []
+    for part in INLINE.split(text):
+        if not part:
+            continue
+        if part.startswith('**') and part.endswith('**') and len(part) > 4:
+            nodes.append({'type': 'text', 'text': part[2:-2], 'marks': [{'type': 'strong'}]})
+        elif part.startswith('`') and part.endswith('`') and len(part) > 2:
+            nodes.append({'type': 'text', 'text': part[1:-1], 'marks': [{'type': 'code'}]})
+        else:
+            nodes.append({'type': 'text', 'text': part})
+    return nodes
+
+def _paragraph(lines):
+    # Line structure matters in generated test cases, so lines become hard breaks
+    content = []
+    for line in lines:
+        if content:
+            content.append({'type': 'hardBreak'})
+        content.extend(inline_nodes(line.strip()))
+    return {'type': 'paragraph', 'content': content}
+
+def markdown_to_adf(markdown):
+    """Convert a Markdown document to an ADF ``doc`` node."""
+    blocks = []
+    paragraph = []
+    # Open lists, outermost first, as (indent, list node)
+    lists = []
+    code = None
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(_paragraph(paragraph))
+            paragraph.clear()
+
+    for line in markdown.splitlines():
+        if code is not None:
+            if line.strip().startswith('```'):
+                blocks.append(code)
+                code = None
+            else:
+                text = code['content'][0]['text'] if code['content'] else ''
+                code['content'] = [{'type': 'text', 'text': text + ("\n" if text else "") + line}]
+            continue
+        if line.strip().startswith('```'):
+            flush_paragraph()
+            lists.clear()
+            language = line.strip()[3:].strip()
+            code = {'type': 'codeBlock', 'attrs': {'language': language} if language else {}, 'content': []}
+            continue
+
+        bullet, ordered = BULLET.match(line), ORDERED.match(line)
+        if RULE.match(line):
+            flush_paragraph()
+            lists.clear()
+            blocks.append({'type': 'rule'})
+        elif HEADING.match(line):
+            flush_paragraph()
+            lists.clear()
+            level, text = HEADING.match(line).groups()
+            blocks.append({'type': 'heading', 'attrs': {'level': len(level)}, 'content': inline_nodes(text.strip())})
+        elif bullet or ordered:
+            flush_paragraph()
+            list_type = 'bulletList' if bullet else 'orderedList'
+            indent, text = (bullet or ordered).groups()
+            indent = len(indent.expandtabs(4))
+            while lists and lists[-1][0] > indent:
+                lists.pop()
+            if lists and lists[-1][0] == indent and lists[-1][1]['type'] != list_type:
+                lists.pop()
+            if not lists or lists[-1][0] < indent:
+                list_node = {'type': list_type, 'content': []}
+                if lists:
+                    # A deeper item nests inside the parent list's last item
+                    lists[-1][1]['content'][-1]['content'].append(list_node)
+                else:
+                    blocks.append(list_node)
+                lists.append((indent, list_node))
+            text = text.strip()
+            lists[-1][1]['content'].append({'type': 'listItem', 'content': [_paragraph([text]) if text else {'type': 'paragraph', 'content': []}]})
+        elif not line.strip():
+            flush_paragraph()
+            lists.clear()
+        else:
+            lists.clear()
+            paragraph.append(line)
+
+    flush_paragraph()
+    if code is not None:
+        blocks.append(code)
+    return {'type': 'doc', 'version': 1, 'content': blocks}
+
+def adf_doc(text):
+    """A plain one-paragraph ADF document."""
+    return {'type': 'doc', 'version': 1, 'content': [_paragraph(text.split("\n"))]}
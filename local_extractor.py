@@ -0,0 +1,148 @@
+import os
+import re
+
+# Deterministic task extraction for well-structured documents. Extracted text
+# keeps .docx heading styles as '#' levels and list levels as indented '- '
+# items (see write_docx_text), so top-level sections map to tasks, their
+# subsections to subtasks, bullets to acceptance criteria and paragraphs to
+# descriptions. A confidence score decides whether the result is used or the
+# document goes to the LLM instead.
+LOCAL_EXTRACTION = os.getenv('LOCAL_EXTRACTION', 'true').lower() in ('1', 'true', 'yes')
+LOCAL_EXTRACTION_MIN_CONFIDENCE = float(os.getenv('LOCAL_EXTRACTION_MIN_CONFIDENCE', '0.75'))
+# Share of the score for: content that landed in a task, sections with their
+# own criteria, sections with a description, headings that do not skip levels
+CONFIDENCE_WEIGHTS = {'coverage': 0.3, 'criteria': 0.35, 'descriptions': 0.2, 'levels': 0.15}
+
+HEADING = re.compile(r'^(#{1,6})\s+(.+)$')
+LIST_ITEM = re.compile(r'^(\s*)(?:[-*+•]|\d+[.)])\s+(.*)$')
+TABLE_ROW = re.compile(r'^\|(.*)\|$')
+OUTLINE_NUMBER = re.compile(r'^(?:\d+(?:\.\d+)*\.?|[A-Z][.)])\s+')
+PHASE = re.compile(r'\s*\(Phase\s*\d+\)', re.IGNORECASE)
+# Sections the extraction prompt also tells the model to ignore
+NON_ACTIONABLE = re.compile(
+    r'^(?:overview|introduction|purpose|scope|out of scope|background|glossary|definitions|references|'
+    r'appendix\b.*|(?:table of )?contents|revision history|document history|(?:implementation )?timeline|assumptions)$',
+    re.IGNORECASE
+)
+# Headings or lines that only label the content below them
+LABEL = re.compile(r'^(?:acceptance criteria|criteria|requirements|description|details)\s*:?$', re.IGNORECASE)
+
+def _title(text):
+    return PHASE.sub('', OUTLINE_NUMBER.sub('', text.strip().strip('*_ '))).strip()
+
+def task_heading_level(levels):
+    """Heading level that holds tasks: the top level, unless a lone top-level heading is the document title."""
+    top = min(levels)
+    deeper = sorted({level for level in levels if level > top})
+    if levels.count(top) == 1 and deeper:
+        return deeper[0]
+    return top
+
+def _section(number, title):
+    return {'number': number, 'title': title, 'description': '', 'acceptance_criteria': []}
+
+def _describe(section, text):
+    section['description'] = (section['description'] + ' ' + PHASE.sub('', text)).strip()
+
+def extract_sections(text):
+    """Map the document's headings, lists and paragraphs onto numbered task sections.
+
+    Returns ``(sections, confidence, details)``; sections use task_parser's
+    numbered form, confidence is 0-1 and details holds the scored parts.
+    """
+    lines = text.splitlines()
+    levels = [len(match.group(1)) for match in map(HEADING.match, lines) if match]
+    if not levels:
+        return [], 0.0, {'tasks': 0, 'subtasks': 0, 'reason': 'no headings'}
+    task_level = task_heading_level(levels)
+
+    sections = []
+    task = target = None
+    skipping = False
+    content = covered = 0
+    steps = even_steps = 0
+    previous_level = None
+    for line in lines:
+        match = HEADING.match(line)
+        if match:
+            level, title = len(match.group(1)), _title(match.group(2))
+            if previous_level is not None and level >= task_level:
+                steps += 1
+                even_steps += level <= previous_level + 1
+            previous_level = level
+            if level < task_level:
+                task = target = None
+                skipping = False
+            elif level == task_level:
+                skipping = bool(NON_ACTIONABLE.match(title))
+                task = None if skipping else dict(_section(len(sections) + 1, title), subtasks=[])
+                target = task
+                if task is not None:
+                    sections.append(task)
+            elif skipping or task is None or LABEL.match(title):
+                # "Acceptance Criteria" and similar headings keep filling the current section
+                continue
+            elif level == task_level + 1:
+                target = _section(f"{task['number']}.{len(task['subtasks']) + 1}", title)
+                task['subtasks'].append(target)
+            else:
+                # Deeper headings become part of the current section's description
+                _describe(target, title + ':')
+            continue
+
+        stripped = line.strip()
+        if not stripped or skipping:
+            continue
+        content += 1
+        if target is None:
+            continue
+        covered += 1
+        item = LIST_ITEM.match(line)
+        row = TABLE_ROW.match(stripped)
+        if item and item.group(2).strip():
+            criterion = PHASE.sub('', item.group(2).strip())
+            # Nested list items detail the criterion above them
+            if len(item.group(1).expandtabs(2)) >= 2 and target['acceptance_criteria']:
+                target['acceptance_criteria'][-1] += '; ' + criterion
+            else:
+                target['acceptance_criteria'].append(criterion)
+        elif row:
+            _describe(target, ' | '.join(cell.strip() for cell in row.group(1).split('|') if cell.strip()) + '.')
+        elif not LABEL.match(stripped):
+            _describe(target, stripped)
+
+    # Headings with nothing under them (e.g. a Title-styled document name) are not tasks
+    sections = [task for task in sections if task['description'] or task['acceptance_criteria'] or task['subtasks']]
+    for number, task in enumerate(sections, 1):
+        task['number'] = number
+        for minor, subtask in enumerate(task['subtasks'], 1):
+            subtask['number'] = f"{number}.{minor}"
+
+    # Parents are judged on their own content only when they have no subtasks
+    judged = [s for task in sections for s in ([task] if not task['subtasks'] else []) + task['subtasks']]
+    scores = {
+        'coverage': covered / content if content else 0.0,
+        'criteria': sum(1 for s in judged if s['acceptance_criteria']) / len(judged) if judged else 0.0,
+        'descriptions': sum(1 for s in judged if s['description']) / len(judged) if judged else 0.0,
+        'levels': even_steps / steps if steps else 1.0
+    }
+    confidence = sum(CONFIDENCE_WEIGHTS[name] * score for name, score in scores.items()) if sections else 0.0
+
+    for task in sections:
+        titles = ', '.join(subtask['title'] for subtask in task['subtasks'])
+        if task['subtasks'] and not task['acceptance_criteria']:
+            task['acceptance_criteria'] = [f"All subtasks are complete: {titles}"]
+        if task['subtasks'] and not task['description']:
+            task['description'] = f"Covers {titles}."
+
+    details = dict(scores, tasks=len(sections), subtasks=sum(len(task['subtasks']) for task in sections))
+    return sections, round(confidence, 3), details
+
+def format_confidence(confidence, details):
+    if 'reason' in details:
+        return f"confidence {confidence:.2f}: {details['reason']}"
+    return (
+        f"confidence {confidence:.2f} from {details['tasks']} tasks and {details['subtasks']} subtasks: "
+        f"coverage {details['coverage']:.0%}, criteria {details['criteria']:.0%}, "
+        f"descriptions {details['descriptions']:.0%}, heading levels {details['levels']:.0%}"
+    )
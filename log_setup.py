@@ -0,0 +1,106 @@
+import os
+import atexit
+import logging
+import logging.handlers
+import queue
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+LOG_FORMAT = '%(asctime)s - %(process)d - %(levelname)s - %(message)s'
+LOG_DATEFMT = '%Y-%m-%d %H:%M:%S'
+
+_listener = None
+
+class LockedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size-rotating file handler that is safe to share between processes.
+
+    Every write takes an exclusive lock on a sidecar ``.lock`` file, so records
+    from concurrent scripts never interleave, and a file rotated by another
+    process is reopened before writing.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding='utf-8'):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=True)
+        self.lock_path = self.baseFilename + '.lock'
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            current = None
+        opened = os.fstat(self.stream.fileno())
+        if current is None or (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev):
+            self.stream.close()
+            self.stream = None
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        try:
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._reopen_if_rotated()
+                    if self.stream is None:
+                        self.stream = self._open()
+                    # Size check happens under the lock so only one process rotates.
+                    self.stream.seek(0, os.SEEK_END)
+                    if self.shouldRollover(record):
+                        self.doRollover()
+                    logging.FileHandler.emit(self, record)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        except Exception:
+            self.handleError(record)
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logging(log_file=None):
+    """Route all logging through a queue drained by a background writer thread.
+
+    Calling code only pays for enqueueing a record; formatting, locking, file
+    I/O and rotation happen on the listener thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    # Read settings at call time so values from .env are honoured.
+    file_handler = LockedRotatingFileHandler(
+        log_file or os.getenv('LOG_FILE', 'jira_and_llm_tasks.log'),
+        maxBytes=int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+        backupCount=int(os.getenv('LOG_BACKUP_COUNT', '5'))
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATEFMT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+
+def get_stage_logger(stage):
+    """Return the logger for a pipeline stage, e.g. 'parse' -> 'pipeline.parse'.
+
+    Its level comes from LOG_LEVEL_<STAGE> (falling back to LOG_LEVEL), so noisy
+    stages can be silenced without touching the others. Guard expensive messages
+    with ``logger.isEnabledFor(...)`` so they are never built when disabled.
+    """
+    logger = logging.getLogger(f'pipeline.{stage}')
+    level = os.getenv(f'LOG_LEVEL_{stage.upper()}')
+    if level:
+        logger.setLevel(level.upper())
+    return logger
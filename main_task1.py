@@ -1,22 +1,19 @@
 import os
 import re
-import requests
 import json
 from dotenv import load_dotenv
-from docx import Document
-import PyPDF2
-from jira import JIRA
-from jira.exceptions import JIRAError
+import zipfile
+import xml.etree.ElementTree as ET
 import logging
 from datetime import datetime
-
-# Setup logging for operations
-logging.basicConfig(
-    filename='jira_and_llm_tasks.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+from log_setup import setup_logging, get_stage_logger
+from resilience import resilient_call, http_session, HEDGE_LLM_REQUESTS
+from ticket_manifest import TicketManifest, TicketStream, export_legacy_json, LEGACY_TICKET_FILE
+from model_router import complete_with_routing, usage_of, usage_summary, estimate_tokens
+from profiling import profiled, run_with_profiling
+from text_normalizer import normalize_for_prompt, PAGE_BREAK
+from task_parser import parse_sections, find_gaps, format_gaps, merge_sections, to_tasks, format_sections, format_outline
+from local_extractor import extract_sections, format_confidence, LOCAL_EXTRACTION, LOCAL_EXTRACTION_MIN_CONFIDENCE
 
 # Load environment variables from .env file
 load_dotenv()
@@ -25,9 +22,14 @@ JIRA_SERVER = os.getenv('JIRA_SERVER')
 JIRA_EMAIL = os.getenv('JIRA_EMAIL')
 JIRA_API_TOKEN = os.getenv('JIRA_API_TOKEN')
 JIRA_PROJECT_KEY = os.getenv('JIRA_PROJECT_KEY')
-MODEL = "llama3-70b-8192"  # Change as needed
+MODEL = "llama3-70b-8192"  # Large model; override with GROQ_LARGE_MODEL, small prompts are routed to GROQ_SMALL_MODEL
 DEFAULT_ISSUE_TYPE = os.getenv('DEFAULT_ISSUE_TYPE', 'Task')
 DEFAULT_SUBTASK_ISSUE_TYPE = os.getenv('DEFAULT_SUBTASK_ISSUE_TYPE', 'Subtask')
+# Follow-up requests for sections the extraction skipped or left incomplete; 0 disables
+EXTRACT_REPAIR_ROUNDS = int(os.getenv('EXTRACT_REPAIR_ROUNDS', '1'))
+
+# Per-line parse output is DEBUG; enable with LOG_LEVEL_PARSE=DEBUG
+parse_logger = get_stage_logger('parse')
 
 # Validate Jira connection and issue types
 def validate_jira_connection():
@@ -46,13 +48,17 @@ def validate_jira_connection():
         print(f"Error: {error_msg}")
         return None
 
+    # Heavy client libraries are imported on first use to keep startup fast
+    from jira import JIRA
+    from jira.exceptions import JIRAError
     try:
-        jira = JIRA(server=JIRA_SERVER, basic_auth=(JIRA_EMAIL, JIRA_API_TOKEN))
+        # Retries are handled by resilient_call, so disable the client's own retry loop
+        jira = resilient_call('jira', lambda: JIRA(server=JIRA_SERVER, basic_auth=(JIRA_EMAIL, JIRA_API_TOKEN), max_retries=0))
         print("Jira connection established successfully")
-        project = jira.project(JIRA_PROJECT_KEY)
+        project = resilient_call('jira', lambda: jira.project(JIRA_PROJECT_KEY))
         logging.info(f"Validated project: {JIRA_PROJECT_KEY}")
         print(f"Validated project: {JIRA_PROJECT_KEY}")
-        issue_types = jira.issue_types_for_project(project.id)
+        issue_types = resilient_call('jira', lambda: jira.issue_types_for_project(project.id))
         issue_type_names = [it.name for it in issue_types]
         logging.info(f"Available issue types for project {JIRA_PROJECT_KEY}: {issue_type_names}")
         print(f"Available issue types: {issue_type_names}")
@@ -90,26 +96,157 @@ def validate_jira_connection():
         print(f"Error: Cannot connect to Jira: {e}")
         return None
 
+# Streaming .docx reader: walks word/document.xml in document order without
+# building the python-docx object model or touching embedded media.
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def read_docx_heading_styles(docx_zip):
+    """Map paragraph style ids to heading levels using word/styles.xml."""
+    levels = {}
+    try:
+        with docx_zip.open("word/styles.xml") as f:
+            root = ET.parse(f).getroot()
+    except KeyError:
+        return levels
+    for style in root.iter(f"{W_NS}style"):
+        if style.get(f"{W_NS}type") != "paragraph":
+            continue
+        style_id = style.get(f"{W_NS}styleId")
+        name_el = style.find(f"{W_NS}name")
+        name = (name_el.get(f"{W_NS}val") if name_el is not None else style_id) or ""
+        outline = style.find(f"{W_NS}pPr/{W_NS}outlineLvl")
+        heading_match = re.fullmatch(r"heading\s*(\d)", name.strip(), re.IGNORECASE)
+        if heading_match:
+            levels[style_id] = int(heading_match.group(1))
+        elif name.strip().lower() == "title":
+            levels[style_id] = 1
+        elif outline is not None and outline.get(f"{W_NS}val", "").isdigit():
+            levels[style_id] = int(outline.get(f"{W_NS}val")) + 1
+    return levels
+
+def _docx_paragraph_info(p, heading_styles):
+    """Return (text, heading level, list level) for a finished <w:p> element."""
+    parts = []
+    for el in p.iter():
+        if el.tag == f"{W_NS}t" and el.text:
+            parts.append(el.text)
+        elif el.tag == f"{W_NS}tab":
+            parts.append("\t")
+        elif el.tag in (f"{W_NS}br", f"{W_NS}cr"):
+            parts.append("\n")
+    heading_level = None
+    list_level = None
+    ppr = p.find(f"{W_NS}pPr")
+    if ppr is not None:
+        style = ppr.find(f"{W_NS}pStyle")
+        if style is not None:
+            heading_level = heading_styles.get(style.get(f"{W_NS}val"))
+            if heading_level is None:
+                style_match = re.fullmatch(r"Heading(\d)", style.get(f"{W_NS}val") or "")
+                if style_match:
+                    heading_level = int(style_match.group(1))
+        outline = ppr.find(f"{W_NS}outlineLvl")
+        if heading_level is None and outline is not None and outline.get(f"{W_NS}val", "").isdigit():
+            heading_level = int(outline.get(f"{W_NS}val")) + 1
+        ilvl = ppr.find(f"{W_NS}numPr/{W_NS}ilvl")
+        if ppr.find(f"{W_NS}numPr") is not None:
+            list_level = int(ilvl.get(f"{W_NS}val", "0")) if ilvl is not None else 0
+    return "".join(parts), heading_level, list_level
+
+def iter_docx_blocks(input_path):
+    """Yield body blocks of a .docx file in document order.
+
+    Paragraphs are yielded as ('paragraph', text, heading_level, list_level) and
+    table rows as ('row', cells, None, None). Parsed elements are discarded as
+    soon as they are consumed, so memory stays flat regardless of document size.
+    """
+    with zipfile.ZipFile(input_path) as docx_zip:
+        heading_styles = read_docx_heading_styles(docx_zip)
+        with docx_zip.open("word/document.xml") as f:
+            body = None
+            depth = 0
+            table_depth = 0
+            # One list of cells per open table row, innermost last; each cell is a list of lines.
+            row_stack = []
+            for event, el in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if el.tag == f"{W_NS}body":
+                        body = el
+                    elif el.tag == f"{W_NS}tbl":
+                        table_depth += 1
+                    elif el.tag == f"{W_NS}tr":
+                        row_stack.append([])
+                    elif el.tag == f"{W_NS}tc" and row_stack:
+                        row_stack[-1].append([])
+                    continue
+
+                depth -= 1
+                if el.tag == f"{W_NS}p":
+                    text, heading_level, list_level = _docx_paragraph_info(el, heading_styles)
+                    if table_depth and row_stack and row_stack[-1]:
+                        if text.strip():
+                            row_stack[-1][-1].append(text.strip())
+                    else:
+                        yield ("paragraph", text, heading_level, list_level)
+                    el.clear()
+                elif el.tag == f"{W_NS}tr" and row_stack:
+                    cells = [" ".join(lines) for lines in row_stack.pop()]
+                    if row_stack and row_stack[-1]:
+                        # Nested table: fold the row into the enclosing cell.
+                        row_stack[-1][-1].append(" | ".join(cells))
+                    elif any(cells):
+                        yield ("row", cells, None, None)
+                    el.clear()
+                elif el.tag == f"{W_NS}tbl":
+                    table_depth -= 1
+                    el.clear()
+
+                # Drop finished top-level blocks so the tree never grows.
+                if depth == 2 and body is not None:
+                    body.clear()
+
+def write_docx_text(input_path, out):
+    """Stream paragraphs and table rows of a .docx file to an open text file."""
+    for kind, value, heading_level, list_level in iter_docx_blocks(input_path):
+        if kind == "row":
+            out.write("| " + " | ".join(value) + " |\n")
+        elif heading_level and value.strip():
+            out.write("#" * heading_level + " " + value.strip() + "\n")
+        elif list_level is not None and value.strip():
+            out.write("  " * list_level + "- " + value.strip() + "\n")
+        else:
+            out.write(value + "\n")
+
 # Step 1: Extract text from document and save as .txt
-def extract_text_to_txt(input_path, output_txt_path):
+@profiled('extract')
+def extract_text_to_txt(input_path, output_txt_path, quiet=False):
+    """Write the document's text to ``output_txt_path``; ``quiet`` skips the console message (temporary files)."""
     try:
         text = ""
         if input_path.endswith(".txt"):
             with open(input_path, "r", encoding="utf-8") as f:
                 text = f.read()
         elif input_path.endswith(".pdf"):
+            import PyPDF2
             with open(input_path, "rb") as f:
                 reader = PyPDF2.PdfReader(f)
-                text = "\n".join(page.extract_text() for page in reader.pages if page.extract_text())
+                # Form feeds keep page boundaries so normalization can find repeated headers/footers
+                text = PAGE_BREAK.join(page.extract_text() for page in reader.pages if page.extract_text())
         elif input_path.endswith(".docx"):
-            doc = Document(input_path)
-            text = "\n".join(p.text for p in doc.paragraphs)
+            with open(output_txt_path, "w", encoding="utf-8") as f:
+                write_docx_text(input_path, f)
+            if not quiet:
+                print(f"Extracted text saved to {output_txt_path}")
+            logging.info(f"Extracted text from {input_path} to {output_txt_path}")
+            return output_txt_path
         else:
             raise ValueError("Unsupported file type. Use .txt, .pdf, or .docx")
 
         with open(output_txt_path, "w", encoding="utf-8") as f:
             f.write(text)
-        print(f"Extracted text saved to {output_txt_path}")
+        if not quiet:
+            print(f"Extracted text saved to {output_txt_path}")
         logging.info(f"Extracted text from {input_path} to {output_txt_path}")
         return output_txt_path
     except Exception as e:
@@ -187,132 +324,154 @@ Now, analyze the following requirement document and extract tasks accordingly:
 \"\"\"
 """
 
+def generate_repair_prompt(doc_text, sections, gaps):
+    """Re-ask for only the sections the first extraction skipped or left incomplete."""
+    wanted = "\n".join(f"- {gap}" for gap in format_gaps(gaps))
+    return f"""
+Tasks and subtasks were already extracted from the requirement document below, but some sections came back missing or incomplete:
+
+{wanted}
+
+Write ONLY these sections, each complete, keeping the numbers given. Do not repeat any other section and add no commentary. Use exactly this format:
+
+Task N: [Task Title]
+Description: [Task description]
+Acceptance Criteria:
+- [Criterion 1]
+- [Criterion 2]
+
+Subtask N.M: [Subtask Title]
+Description: [Subtask description]
+Acceptance Criteria:
+- [Criterion 1]
+
+For context, the sections extracted so far are:
+
+{format_outline(sections)}
+
+Requirement document:
+
+\"\"\"
+{doc_text}
+\"\"\"
+"""
+
+def ask_groq(stage, prompt, validate=None, payload=None):
+    """Send one prompt through the model router and return the completion text.
+
+    ``payload`` is the document text the prompt wraps, used for routing.
+    """
+    headers = {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+    def send(model):
+        payload = {
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": prompt}
+            ],
+            "model": model
+        }
+
+        def post_completion():
+            response = http_session().post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=payload, timeout=120)
+            response.raise_for_status()
+            return response
+
+        body = resilient_call(f'groq:{model}', post_completion, hedge=HEDGE_LLM_REQUESTS, tokens=estimate_tokens(prompt)).json()
+        return body.get("choices", [])[0]["message"]["content"], usage_of(body)
+
+    return complete_with_routing(stage, prompt, send, validate=validate, large_model=MODEL, payload=payload)
+
+def repair_extracted_tasks(doc_text, content):
+    """Re-ask for missing or damaged sections; returns the merged text in the canonical format.
+
+    Each round asks only for the sections still incomplete, up to
+    EXTRACT_REPAIR_ROUNDS rounds. Without gaps the content is returned as is.
+    """
+    sections = parse_sections(content)
+    gaps = find_gaps(sections)
+    if not gaps:
+        return content
+    for round_number in range(1, EXTRACT_REPAIR_ROUNDS + 1):
+        for gap in format_gaps(gaps):
+            parse_logger.warning("Incomplete extraction: %s", gap)
+        print(f"Re-asking for {len(gaps)} incomplete section{'s' if len(gaps) != 1 else ''} (round {round_number})")
+        try:
+            reply = ask_groq('repair', generate_repair_prompt(doc_text, sections, gaps),
+                             validate=lambda text: bool(parse_sections(text)), payload=doc_text)
+        except Exception as e:
+            logging.error(f"Re-asking for incomplete sections failed: {e}")
+            break
+        merge_sections(sections, parse_sections(reply, keep_parents=True))
+        gaps = find_gaps(sections)
+        if not gaps:
+            break
+    for gap in format_gaps(gaps):
+        logging.warning(f"Still incomplete after re-asking: {gap}")
+    return format_sections(sections)
+
 # Step 4: Query Groq API to extract tasks and subtasks and save to text file
+@profiled('plan')
 def extract_task_structure_with_groq(doc_text, output_task_file):
+    normalized_text = normalize_for_prompt(doc_text)
+
+    # Documents whose headings and lists already state the structure skip the LLM
+    if LOCAL_EXTRACTION:
+        sections, confidence, details = extract_sections(normalized_text)
+        summary = format_confidence(confidence, details)
+        if confidence >= LOCAL_EXTRACTION_MIN_CONFIDENCE:
+            content = format_sections(sections)
+            with open(output_task_file, "w", encoding="utf-8") as f:
+                f.write(content)
+            print(f"Extracted tasks locally from document structure ({summary}); saved to {output_task_file}")
+            logging.info(f"Extracted tasks locally ({summary}) to {output_task_file}")
+            return content
+        logging.info(f"Local extraction below {LOCAL_EXTRACTION_MIN_CONFIDENCE:.2f}, using Groq: {summary}")
+        print(f"Document structure too weak for local extraction ({summary}); using Groq")
+
     if not GROQ_API_KEY:
         logging.error("GROQ_API_KEY is not set.")
         print("Error: GROQ_API_KEY is not set.")
         return ""
 
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
-    payload = {
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": generate_prompt(doc_text)}
-        ],
-        "model": MODEL
-    }
+    prompt = generate_prompt(normalized_text)
 
     try:
-        response = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=payload)
-        if response.status_code == 200:
-            content = response.json().get("choices", [])[0]["message"]["content"]
-            # Clean any leftover (Phase X) just in case
-            cleaned_content = re.sub(r"\s*\(Phase\s*\d+\)", "", content).strip()
-            # Save to text file
-            with open(output_task_file, "w", encoding="utf-8") as f:
-                f.write(cleaned_content)
-            print(f"Extracted tasks saved to {output_task_file}")
-            logging.info(f"Extracted tasks saved to {output_task_file}")
-            return cleaned_content
-        else:
-            raise Exception(f"Error from Groq API: {response.status_code} - {response.text}")
+        # A usable response has at least one task section, in any of the tolerated forms
+        content = ask_groq('extract', prompt, validate=lambda text: bool(parse_sections(text)), payload=normalized_text)
+        # Clean any leftover (Phase X) just in case
+        cleaned_content = re.sub(r"\s*\(Phase\s*\d+\)", "", content).strip()
+        cleaned_content = repair_extracted_tasks(normalized_text, cleaned_content)
+        # Save to text file
+        with open(output_task_file, "w", encoding="utf-8") as f:
+            f.write(cleaned_content)
+        print(f"Extracted tasks saved to {output_task_file}")
+        logging.info(f"Extracted tasks saved to {output_task_file}")
+        return cleaned_content
     except Exception as e:
         logging.error(f"Failed to extract tasks from Groq API: {e}")
         print(f"Error: Failed to extract tasks from Groq API: {e}")
         return ""
 
 # Step 5: Parse tasks and subtasks from text file
+@profiled('parse')
 def parse_tasks_from_file(task_file_path):
     try:
         with open(task_file_path, "r", encoding="utf-8") as f:
             extracted_text = f.read()
 
-        tasks = []
-        current_task = None
-        current_subtask = None
-        lines = extracted_text.split('\n')
-
-        task_pattern = re.compile(r'Task (\d+): (.+)')
-        subtask_pattern = re.compile(r'Subtask (\d+\.\d+): (.+)')
-        description_pattern = re.compile(r'Description: (.+)')
-        acceptance_criteria_start = re.compile(r'Acceptance Criteria:')
-
-        task_counter = 0
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Check for a new task
-            task_match = task_pattern.match(line)
-            if task_match:
-                task_number = int(task_match.group(1))
-                task_counter = task_number
-                if current_task:
-                    tasks.append(current_task)
-                current_task = {
-                    'title': task_match.group(2),
-                    'description': '',
-                    'acceptance_criteria': [],
-                    'subtasks': []
-                }
-                logging.info(f"Parsed Task {task_number}: {current_task['title']}")
-                continue
-
-            # Check for a new subtask
-            subtask_match = subtask_pattern.match(line)
-            if subtask_match and current_task:
-                subtask_number = subtask_match.group(1)
-                expected_prefix = f"{task_counter}."
-                if not subtask_number.startswith(expected_prefix):
-                    logging.warning(f"Subtask {subtask_number} does not match parent task {task_counter}. Adjusting...")
-                    subtask_number = f"{task_counter}.{subtask_number.split('.')[-1]}"
-                if current_subtask:
-                    current_task['subtasks'].append(current_subtask)
-                current_subtask = {
-                    'title': subtask_match.group(2),
-                    'description': '',
-                    'acceptance_criteria': []
-                }
-                logging.info(f"Parsed Subtask {subtask_number}: {current_subtask['title']} under Task {task_counter}")
-                continue
-
-            # Check for description
-            description_match = description_pattern.match(line)
-            if description_match:
-                if current_subtask:
-                    current_subtask['description'] = description_match.group(1)
-                    logging.info(f"Subtask Description: {current_subtask['description']}")
-                elif current_task:
-                    current_task['description'] = description_match.group(1)
-                    logging.info(f"Task Description: {current_task['description']}")
-                continue
-
-            # Check for acceptance criteria
-            if acceptance_criteria_start.match(line):
-                continue
-            if line.startswith('- ') and (current_task or current_subtask):
-                criterion = line[2:].strip()
-                if current_subtask:
-                    current_subtask['acceptance_criteria'].append(criterion)
-                    logging.info(f"Subtask Acceptance Criterion: {criterion}")
-                elif current_task:
-                    current_task['acceptance_criteria'].append(criterion)
-                    logging.info(f"Task Acceptance Criterion: {criterion}")
-
-        # Append the last task and subtask
-        if current_subtask and current_task:
-            current_task['subtasks'].append(current_subtask)
-        if current_task:
-            tasks.append(current_task)
+        sections = parse_sections(extracted_text)
+        for gap in format_gaps(find_gaps(sections)):
+            parse_logger.warning("Incomplete section in %s: %s", task_file_path, gap)
+        tasks = to_tasks(sections)
 
         print(f"Parsed {len(tasks)} tasks from {task_file_path}")
-        logging.info(f"Parsed tasks: {json.dumps(tasks, indent=2)}")
+        parse_logger.info("Parsed %d tasks from %s", len(tasks), task_file_path)
+        if parse_logger.isEnabledFor(logging.DEBUG):
+            parse_logger.debug("Parsed tasks: %s", json.dumps(tasks, indent=2))
         return tasks
     except Exception as e:
         logging.error(f"Failed to parse tasks from {task_file_path}: {e}")
@@ -320,71 +479,74 @@ def parse_tasks_from_file(task_file_path):
         raise
 
 # Step 6: Create Jira tickets
+def create_task_tickets(jira, task, ticket_keys, output_display):
+    """Create one task ticket and its subtasks, appending entries as they are created."""
+    # Create the parent task ticket
+    task_description = f"Description: {task['description']}\n\nAcceptance Criteria:\n" + "\n".join([f"- {crit}" for crit in task['acceptance_criteria']])
+    issue_dict = {
+        'project': {'key': JIRA_PROJECT_KEY},
+        'summary': task['title'][:255],
+        'description': task_description,
+        'issuetype': {'name': DEFAULT_ISSUE_TYPE},
+        'labels': ['Admin-Portal-Enhancements']
+    }
+    print(f"Creating Jira task ticket: {task['title']} with issue type: {DEFAULT_ISSUE_TYPE}")
+    task_ticket = resilient_call('jira', lambda: jira.create_issue(fields=issue_dict), idempotent=False)
+    task_key = task_ticket.key
+    logging.info(f"Created Jira task ticket: {task_key} - {task['title']}")
+    ticket_keys.append({
+        'key': task_key,
+        'summary': task['title'],
+        'type': DEFAULT_ISSUE_TYPE,
+        'description': task['description'],
+        'acceptance_criteria': task['acceptance_criteria']
+    })
+    output_display.append(f"Task: {task['title']} ({task_key})")
+
+    # Create subtasks
+    created_subtasks = []
+    print(f"Total subtasks for {task['title']}: {len(task['subtasks'])}")
+    for subtask in task['subtasks']:
+        subtask_title = re.sub(r'Subtask \d+\.\d+:', '', subtask['title']).strip()
+        subtask_description = f"Description: {subtask['description']}\n\nAcceptance Criteria:\n" + "\n".join([f"- {crit}" for crit in subtask['acceptance_criteria']])
+        subtask_issue_dict = {
+            'project': {'key': JIRA_PROJECT_KEY},
+            'summary': subtask_title[:255],
+            'description': subtask_description,
+            'issuetype': {'name': DEFAULT_SUBTASK_ISSUE_TYPE},
+            'parent': {'key': task_key},
+            'labels': ['Admin-Portal-Enhancements']
+        }
+        print(f"Creating Jira subtask ticket: {subtask_title} under {task_key} with issue type: {DEFAULT_SUBTASK_ISSUE_TYPE}")
+        subtask_ticket = resilient_call('jira', lambda: jira.create_issue(fields=subtask_issue_dict), idempotent=False)
+        subtask_key = subtask_ticket.key
+        logging.info(f"Created Jira subtask ticket: {subtask_key} - {subtask_title}")
+        ticket_keys.append({
+            'key': subtask_key,
+            'summary': subtask_title,
+            'type': DEFAULT_SUBTASK_ISSUE_TYPE,
+            'parent_key': task_key,
+            'description': subtask['description'],
+            'acceptance_criteria': subtask['acceptance_criteria']
+        })
+        created_subtasks.append(f"Subtask: {subtask_title} ({subtask_key})")
+
+    if not created_subtasks:
+        output_display.append("Warning: No subtasks created for this task")
+    else:
+        output_display.extend(created_subtasks)
+    output_display.append("")
+
 def create_jira_tickets(jira, tasks):
-    ticket_keys = []
+    from jira.exceptions import JIRAError
     output_display = []
-    task_key_mapping = {}  # Map task titles to Jira ticket keys
 
+    # Each ticket is appended and flushed to the manifest as soon as it exists
+    manifest = TicketManifest()
     print(f"Total tasks to process: {len(tasks)}")
     for task_index, task in enumerate(tasks, 1):
         try:
-            # Create the parent task ticket
-            task_description = f"Description: {task['description']}\n\nAcceptance Criteria:\n" + "\n".join([f"- {crit}" for crit in task['acceptance_criteria']])
-            issue_dict = {
-                'project': {'key': JIRA_PROJECT_KEY},
-                'summary': task['title'][:255],
-                'description': task_description,
-                'issuetype': {'name': DEFAULT_ISSUE_TYPE},
-                'labels': ['Admin-Portal-Enhancements']
-            }
-            print(f"Creating Jira task ticket: {task['title']} with issue type: {DEFAULT_ISSUE_TYPE}")
-            task_ticket = jira.create_issue(fields=issue_dict)
-            task_key = task_ticket.key
-            task_key_mapping[task['title']] = task_key
-            logging.info(f"Created Jira task ticket: {task_key} - {task['title']}")
-            ticket_keys.append({
-                'key': task_key,
-                'summary': task['title'],
-                'type': DEFAULT_ISSUE_TYPE,
-                'description': task['description'],
-                'acceptance_criteria': task['acceptance_criteria']
-            })
-            output_display.append(f"Task: {task['title']} ({task_key})")
-
-            # Create subtasks
-            created_subtasks = []
-            print(f"Total subtasks for {task['title']}: {len(task['subtasks'])}")
-            for subtask in task['subtasks']:
-                subtask_title = re.sub(r'Subtask \d+\.\d+:', '', subtask['title']).strip()
-                subtask_description = f"Description: {subtask['description']}\n\nAcceptance Criteria:\n" + "\n".join([f"- {crit}" for crit in subtask['acceptance_criteria']])
-                subtask_issue_dict = {
-                    'project': {'key': JIRA_PROJECT_KEY},
-                    'summary': subtask_title[:255],
-                    'description': subtask_description,
-                    'issuetype': {'name': DEFAULT_SUBTASK_ISSUE_TYPE},
-                    'parent': {'key': task_key},
-                    'labels': ['Admin-Portal-Enhancements']
-                }
-                print(f"Creating Jira subtask ticket: {subtask_title} under {task_key} with issue type: {DEFAULT_SUBTASK_ISSUE_TYPE}")
-                subtask_ticket = jira.create_issue(fields=subtask_issue_dict)
-                subtask_key = subtask_ticket.key
-                logging.info(f"Created Jira subtask ticket: {subtask_key} - {subtask_title}")
-                ticket_keys.append({
-                    'key': subtask_key,
-                    'summary': subtask_title,
-                    'type': DEFAULT_SUBTASK_ISSUE_TYPE,
-                    'parent_key': task_key,
-                    'description': subtask['description'],
-                    'acceptance_criteria': subtask['acceptance_criteria']
-                })
-                created_subtasks.append(f"Subtask: {subtask_title} ({subtask_key})")
-
-            if not created_subtasks:
-                output_display.append("Warning: No subtasks created for this task")
-            else:
-                output_display.extend(created_subtasks)
-            output_display.append("")
-
+            create_task_tickets(jira, task, manifest, output_display)
         except JIRAError as e:
             logging.error(f"Jira API error creating ticket for {task['title']}: {e.status_code} - {e.text}")
             print(f"Failed to create ticket for '{task['title']}': {e.status_code} - {e.text}")
@@ -394,14 +556,16 @@ def create_jira_tickets(jira, tasks):
             print(f"Failed to create ticket for '{task['title']}': {e}")
             continue
 
+    manifest.close()
+    ticket_keys = manifest.keys
+    print(f"Ticket manifest written to {manifest.path}")
+    logging.info(f"Recorded {len(ticket_keys)} tickets in {manifest.path}")
     try:
-        with open('ticket_keys.json', 'w') as f:
-            json.dump(ticket_keys, f, indent=2)
-        print("Ticket keys saved to ticket_keys.json")
-        logging.info(f"Saved {len(ticket_keys)} ticket keys to ticket_keys.json")
+        export_legacy_json(TicketStream(manifest.path))
+        print(f"Ticket keys exported to {LEGACY_TICKET_FILE}")
     except Exception as e:
-        logging.error(f"Error: Failed to save ticket keys to ticket_keys.json: {e}")
-        print(f"Error: Failed to save ticket keys: {e}")
+        logging.error(f"Error: Failed to export ticket keys to {LEGACY_TICKET_FILE}: {e}")
+        print(f"Error: Failed to export ticket keys: {e}")
 
     if output_display:
         print("\nCreated Jira Tickets:\n")
@@ -411,7 +575,11 @@ def create_jira_tickets(jira, tasks):
 
     return ticket_keys
 
-def main():
+def main(argv=None):
+    setup_logging()
+    return run_with_profiling(run, argv, "Extract tasks from a requirement document and create Jira tickets.")
+
+def run():
     input_file_path = "Body guard booking services (2).docx"  # Updated file name to avoid spaces
     temp_txt_path = "temp_extracted_text.txt"
     task_file_path = "extracted_tasks.txt"
@@ -451,6 +619,9 @@ def main():
 
     print("\nExtracted Tasks:\n")
     print(extracted_tasks_text)
+    for line in usage_summary():
+        logging.info(f"Model usage: {line}")
+        print(f"Model usage: {line}")
 
     # Step 4: Parse tasks from text file
     try:
@@ -468,7 +639,7 @@ def main():
         return
     else:
         ticket_keys = create_jira_tickets(jira_server, tasks)
-        print("\nTicket keys: ", [tk['key'] for tk in ticket_keys])
+        print("\nTicket keys: ", ticket_keys)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,19 +1,14 @@
 import os
-import re
-import json
 import logging
 import base64
 from datetime import datetime
-from github import Github
 from dotenv import load_dotenv
-
-# Setup logging
-logging.basicConfig(
-    filename='jira_and_llm_tasks.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+from log_setup import setup_logging
+from resilience import resilient_call
+from ticket_manifest import read_tickets, iter_task_groups
+from git_publisher import GitPublisher, github_remote_url, PUBLISH_BACKEND, GIT_PUBLISH_REMOTE
+from profiling import profiled, run_with_profiling
+from github_sync import upsert_repo_file, branch_name_for, new_write_summary, format_write_summary
 
 # Load environment variables
 load_dotenv()
@@ -23,30 +18,29 @@ GITHUB_REPO = os.getenv('GITHUB_REPO')
 PROJECT_NAME = os.getenv('PROJECT_NAME', 'Body Guard Booking System')
 PROJECT_DESCRIPTION = os.getenv('PROJECT_DESCRIPTION', 'A platform for booking bodyguard and security services with user, guard, and admin functionalities')
 
-def read_ticket_keys(file_path):
+@profiled('tickets')
+def read_ticket_keys(file_path=None):
     try:
-        with open(file_path, 'r') as f:
-            ticket_keys = json.load(f)
-        for ticket in ticket_keys:
-            if not all(key in ticket for key in ['key', 'summary', 'type']):
-                raise ValueError(f"Invalid ticket entry: {ticket}. Missing required fields.")
-        logging.info(f"Read {len(ticket_keys)} tickets from {file_path}")
-        return ticket_keys
+        ticket_keys, count = read_tickets(file_path)
+        logging.info(f"Read {count} tickets from {ticket_keys.path}")
+        return ticket_keys if count else []
     except Exception as e:
-        logging.error(f"Error reading ticket_keys.json: {e}")
-        print(f"Error reading ticket_keys.json: {e}")
+        logging.error(f"Error reading ticket file: {e}")
+        print(f"Error reading ticket file: {e}")
         return []
 
 def create_github_repo():
     try:
-        g = Github(GITHUB_TOKEN)
+        from github import Github
+        # Retries are handled by resilient_call, so disable PyGithub's own retry policy
+        g = Github(GITHUB_TOKEN, retry=None)
         user = g.get_user()
-        repo = user.create_repo(
+        repo = resilient_call('github', lambda: user.create_repo(
             GITHUB_REPO,
             description=PROJECT_DESCRIPTION,
             private=False,
             auto_init=True
-        )
+        ), idempotent=False)
         logging.info(f"Created repository: {repo.html_url}")
         print(f"Created repository: {repo.html_url}")
         return repo
@@ -54,7 +48,7 @@ def create_github_repo():
         logging.warning(f"Error creating repository: {e}")
         print(f"Error creating repository: {e}")
         try:
-            repo = user.get_repo(GITHUB_REPO)
+            repo = resilient_call('github', lambda: user.get_repo(GITHUB_REPO))
             logging.info(f"Repository already exists: {repo.html_url}")
             print(f"Repository already exists: {repo.html_url}")
             return repo
@@ -63,257 +57,237 @@ def create_github_repo():
             print("Failed to access existing repository.")
             return None
 
-def initialize_repo(repo, ticket_keys):
-    try:
-        # Initialize files
-        files = {
-            'main_task1.py': {
-                'content': "# Task: Jira Ticket Creation and Management\n\n# Implementation for Body Guard Booking System\n",
-                'type': 'text'
-            },
-            'main_task2.py': {
-                'content': "# Task: GitHub Repository Creation and Structuring\n\n# Implementation for repository setup\n",
-                'type': 'text'
-            },
-            'main_task3.py': {
-                'content': "# Task: Test Case Generation\n\n# Implementation for generating test cases using Groq API\n",
-                'type': 'text'
-            },
-            'requirements.txt': {
-                'content': "requests\npygithub\npython-dotenv\ngroq\npython-jira\npython-docx\nPyPDF2\n",
-                'type': 'text'
-            }
+def collect_project_files():
+    """Project files published on main: local copies when present, placeholders otherwise."""
+    files = {
+        'main_task1.py': {
+            'content': "# Task: Jira Ticket Creation and Management\n\n# Implementation for Body Guard Booking System\n",
+            'type': 'text'
+        },
+        'main_task2.py': {
+            'content': "# Task: GitHub Repository Creation and Structuring\n\n# Implementation for repository setup\n",
+            'type': 'text'
+        },
+        'main_task3.py': {
+            'content': "# Task: Test Case Generation\n\n# Implementation for generating test cases using Groq API\n",
+            'type': 'text'
+        },
+        'requirements.txt': {
+            'content': "requests\npygithub\npython-dotenv\ngroq\npython-jira\npython-docx\nPyPDF2\n",
+            'type': 'text'
         }
+    }
 
-        for file_path, file_info in files.items():
-            content = file_info['content']
-            content_type = file_info['type']
-
-            if os.path.exists(file_path):
-                if content_type == 'text':
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                else:
-                    with open(file_path, 'rb') as f:
-                        content = f.read()
-                logging.info(f"Found local file {file_path}")
+    for file_path, file_info in files.items():
+        if os.path.exists(file_path):
+            if file_info['type'] == 'text':
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    file_info['content'] = f.read()
             else:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                logging.info(f"Created placeholder file {file_path}")
+                with open(file_path, 'rb') as f:
+                    file_info['content'] = f.read()
+            logging.info(f"Found local file {file_path}")
+        else:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(file_info['content'])
+            logging.info(f"Created placeholder file {file_path}")
+    return files
 
-            try:
-                contents = repo.get_contents(file_path, ref="main")
-                if content_type == 'text':
-                    repo.update_file(
-                        file_path,
-                        f"Update {file_path} from project",
-                        content,
-                        contents.sha,
-                        branch="main"
-                    )
-                else:
-                    repo.update_file(
-                        file_path,
-                        f"Update {file_path} from project",
-                        base64.b64encode(content).decode('utf-8'),
-                        contents.sha,
-                        branch="main"
-                    )
-                logging.info(f"Updated {file_path} in repository")
-                print(f"Updated {file_path} in repository")
-            except:
-                if content_type == 'text':
-                    repo.create_file(
-                        file_path,
-                        f"Add {file_path} from project",
-                        content,
-                        branch="main"
-                    )
+@profiled('render')
+def render_main_readme(ticket_keys):
+    readme_content = (
+        f"# {PROJECT_NAME}\n\n"
+        f"## Overview\n"
+        f"{PROJECT_DESCRIPTION}\n\n"
+        f"## Tasks\n"
+    )
+
+    # Tasks are grouped one at a time straight from the ticket stream
+    for task_key, task_info in iter_task_groups(ticket_keys):
+        readme_content += (
+            f"### {task_key}: {task_info['summary']}\n"
+            f"#### Description\n{task_info['description']}\n\n"
+            f"#### Acceptance Criteria\n"
+        )
+        if task_info['acceptance_criteria']:
+            readme_content += "\n".join([f"- {crit}" for crit in task_info['acceptance_criteria']]) + "\n"
+        else:
+            readme_content += "- None provided.\n"
+
+        if task_info['subtasks']:
+            readme_content += "\n#### Subtasks\n"
+            for subtask_key, subtask in task_info['subtasks'].items():
+                readme_content += (
+                    f"##### {subtask_key}: {subtask['summary']}\n"
+                    f"###### Description\n{subtask['description']}\n\n"
+                    f"###### Acceptance Criteria\n"
+                )
+                if subtask['acceptance_criteria']:
+                    readme_content += "\n".join([f"- {crit}" for crit in subtask['acceptance_criteria']]) + "\n"
                 else:
-                    repo.create_file(
-                        file_path,
-                        f"Add {file_path} from project",
-                        base64.b64encode(content).decode('utf-8'),
-                        branch="main"
-                    )
-                logging.info(f"Added {file_path} to repository")
-                print(f"Added {file_path} to repository")
+                    readme_content += "- None provided.\n"
+                readme_content += "\n"
+    return readme_content
 
-        # Organize tasks and subtasks from ticket_keys
-        tasks = {}
-        for ticket in ticket_keys:
-            ticket_key = ticket['key']
-            if ticket['type'] == 'Task':
-                tasks[ticket_key] = {
-                    'summary': ticket['summary'],
-                    'description': ticket.get('description', 'No description available.'),
-                    'acceptance_criteria': ticket.get('acceptance_criteria', []),
-                    'subtasks': {}
-                }
-            elif ticket['type'] == 'Subtask':
-                parent_key = ticket.get('parent_key')
-                if parent_key and parent_key in tasks:
-                    tasks[parent_key]['subtasks'][ticket_key] = {
-                        'summary': ticket['summary'],
-                        'description': ticket.get('description', 'No description available.'),
-                        'acceptance_criteria': ticket.get('acceptance_criteria', [])
-                    }
+@profiled('render')
+def render_branch_readme(task_key, task):
+    readme_content = f"# {task_key}: {task['summary']}\n\n"
+    readme_content += f"## Description\n{task['description']}\n\n"
+    readme_content += "## Acceptance Criteria\n"
+    if task['acceptance_criteria']:
+        readme_content += "\n".join([f"- {crit}" for crit in task['acceptance_criteria']]) + "\n"
+    else:
+        readme_content += "- None\n"
+    readme_content += "\n"
 
-        # Generate main README.md
-        readme_content = (
-            f"# {PROJECT_NAME}\n\n"
-            f"## Overview\n"
-            f"{PROJECT_DESCRIPTION}\n\n"
-            f"## Tasks\n"
-        )
+    if task['subtasks']:
+        readme_content += "## Subtasks\n"
+        for subtask_key, subtask in task['subtasks'].items():
+            readme_content += f"### {subtask_key}: {subtask['summary']}\n"
+            readme_content += f"#### Description\n{subtask['description']}\n\n"
+            readme_content += "#### Acceptance Criteria\n"
+            if subtask['acceptance_criteria']:
+                readme_content += "\n".join([f"- {crit}" for crit in subtask['acceptance_criteria']]) + "\n"
+            else:
+                readme_content += "- None\n"
+            readme_content += "\n"
+    return readme_content
 
-        for task_key, task_info in tasks.items():
-            readme_content += (
-                f"### {task_key}: {task_info['summary']}\n"
-                f"#### Description\n{task_info['description']}\n\n"
-                f"#### Acceptance Criteria\n"
+def initialize_repo(repo, ticket_keys, write_summary=None):
+    try:
+        # Initialize files
+        for file_path, file_info in collect_project_files().items():
+            content = file_info['content']
+            if file_info['type'] != 'text':
+                content = base64.b64encode(content).decode('utf-8')
+            action = upsert_repo_file(
+                repo,
+                file_path,
+                content,
+                "main",
+                f"Add {file_path} from project",
+                f"Update {file_path} from project",
+                write_summary
             )
-            if task_info['acceptance_criteria']:
-                readme_content += "\n".join([f"- {crit}" for crit in task_info['acceptance_criteria']]) + "\n"
+            if action == 'created':
+                logging.info(f"Added {file_path} to repository")
+                print(f"Added {file_path} to repository")
+            elif action == 'updated':
+                logging.info(f"Updated {file_path} in repository")
+                print(f"Updated {file_path} in repository")
             else:
-                readme_content += "- None provided.\n"
+                print(f"Skipped {file_path}: unchanged in repository")
 
-            if task_info['subtasks']:
-                readme_content += "\n#### Subtasks\n"
-                for subtask_key, subtask in task_info['subtasks'].items():
-                    readme_content += (
-                        f"##### {subtask_key}: {subtask['summary']}\n"
-                        f"###### Description\n{subtask['description']}\n\n"
-                        f"###### Acceptance Criteria\n"
-                    )
-                    if subtask['acceptance_criteria']:
-                        readme_content += "\n".join([f"- {crit}" for crit in subtask['acceptance_criteria']]) + "\n"
-                    else:
-                        readme_content += "- None provided.\n"
-                    readme_content += "\n"
-
-        try:
-            contents = repo.get_contents("README.md", ref="main")
-            repo.update_file(
-                "README.md",
-                "Update README.md",
-                readme_content,
-                contents.sha,
-                branch="main"
-            )
-            logging.info("Updated README.md in repository")
-            print("Updated README.md in repository")
-        except:
-            repo.create_file(
-                "README.md",
-                "Add README.md",
-                readme_content,
-                branch="main"
-            )
+        # Generate main README.md
+        readme_content = render_main_readme(ticket_keys)
+        action = upsert_repo_file(
+            repo,
+            "README.md",
+            readme_content,
+            "main",
+            "Add README.md",
+            "Update README.md",
+            write_summary
+        )
+        if action == 'created':
             logging.info("Added README.md to repository")
             print("Added README.md to repository")
+        elif action == 'updated':
+            logging.info("Updated README.md in repository")
+            print("Updated README.md in repository")
+        else:
+            print("Skipped README.md: unchanged in repository")
     except Exception as e:
         logging.error(f"Error initializing repository: {e}")
         print(f"Error: Failed to initialize repository: {e}")
 
-def create_branches(repo, ticket_keys):
+def create_branches(repo, ticket_keys, write_summary=None):
     try:
-        # Organize tasks and subtasks from ticket_keys
-        tasks = {}
-        for ticket in ticket_keys:
-            ticket_key = ticket['key']
-            if ticket['type'] == 'Task':
-                tasks[ticket_key] = {
-                    'summary': ticket['summary'],
-                    'description': ticket.get('description', 'No description available.'),
-                    'acceptance_criteria': ticket.get('acceptance_criteria', []),
-                    'subtasks': {}
-                }
-            elif ticket['type'] == 'Subtask':
-                parent_key = ticket.get('parent_key')
-                if parent_key and parent_key in tasks:
-                    tasks[parent_key]['subtasks'][ticket_key] = {
-                        'summary': ticket['summary'],
-                        'description': ticket.get('description', 'No description available.'),
-                        'acceptance_criteria': ticket.get('acceptance_criteria', [])
-                    }
-
         # Create branches for tasks
-        for task_key, task in tasks.items():
-            sanitized_summary = re.sub(r'[^a-zA-Z0-9\s-]', '', task['summary']).lower().replace(' ', '-')
-            branch_name = f"feature/{task_key}-{sanitized_summary}"[:50]
+        for task_key, task in iter_task_groups(ticket_keys):
+            branch_name = branch_name_for(task_key, task['summary'])
 
-            source_branch = repo.get_branch("main")
-            repo.create_git_ref(
-                ref=f"refs/heads/{branch_name}",
-                sha=source_branch.commit.sha
-            )
-            logging.info(f"Created branch: {branch_name}")
-            print(f"Created branch: {branch_name}")
+            try:
+                resilient_call('github', lambda: repo.get_branch(branch_name))
+                logging.info(f"Branch already exists: {branch_name}")
+                print(f"Branch already exists: {branch_name}")
+            except Exception:
+                source_branch = resilient_call('github', lambda: repo.get_branch("main"))
+                resilient_call('github', lambda: repo.create_git_ref(
+                    ref=f"refs/heads/{branch_name}",
+                    sha=source_branch.commit.sha
+                ), idempotent=False)
+                logging.info(f"Created branch: {branch_name}")
+                print(f"Created branch: {branch_name}")
 
             # Generate README for branch
-            readme_content = f"# {task_key}: {task['summary']}\n\n"
-            readme_content += f"## Description\n{task['description']}\n\n"
-            readme_content += "## Acceptance Criteria\n"
-            if task['acceptance_criteria']:
-                readme_content += "\n".join([f"- {crit}" for crit in task['acceptance_criteria']]) + "\n"
-            else:
-                readme_content += "- None\n"
-            readme_content += "\n"
-
-            if task['subtasks']:
-                readme_content += "## Subtasks\n"
-                for subtask_key, subtask in task['subtasks'].items():
-                    readme_content += f"### {subtask_key}: {subtask['summary']}\n"
-                    readme_content += f"#### Description\n{subtask['description']}\n\n"
-                    readme_content += "#### Acceptance Criteria\n"
-                    if subtask['acceptance_criteria']:
-                        readme_content += "\n".join([f"- {crit}" for crit in subtask['acceptance_criteria']]) + "\n"
-                    else:
-                        readme_content += "- None\n"
-                    readme_content += "\n"
-
-            try:
-                contents = repo.get_contents("README.md", ref=branch_name)
-                repo.update_file(
-                    "README.md",
-                    f"Update README.md for {task_key}",
-                    readme_content,
-                    contents.sha,
-                    branch=branch_name
-                )
-                logging.info(f"Updated README.md in branch {branch_name}")
-                print(f"Updated README.md in branch {branch_name}")
-            except:
-                repo.create_file(
-                    "README.md",
-                    f"Add README.md for {task_key}",
-                    readme_content,
-                    branch=branch_name
-                )
+            readme_content = render_branch_readme(task_key, task)
+            action = upsert_repo_file(
+                repo,
+                "README.md",
+                readme_content,
+                branch_name,
+                f"Add README.md for {task_key}",
+                f"Update README.md for {task_key}",
+                write_summary
+            )
+            if action == 'created':
                 logging.info(f"Added README.md to branch {branch_name}")
                 print(f"Added README.md to branch {branch_name}")
+            elif action == 'updated':
+                logging.info(f"Updated README.md in branch {branch_name}")
+                print(f"Updated README.md in branch {branch_name}")
+            else:
+                print(f"Skipped README.md in branch {branch_name}: unchanged")
 
     except Exception as e:
         logging.error(f"Error creating branches: {e}")
         print(f"Error creating branches: {e}")
 
-def main():
-    ticket_keys = read_ticket_keys('ticket_keys.json')
+def publish_with_git(ticket_keys, write_summary=None):
+    """Build main and all feature branches locally and publish them with one git push."""
+    try:
+        files = collect_project_files()
+        publisher = GitPublisher(GIT_PUBLISH_REMOTE or github_remote_url(GITHUB_USERNAME, GITHUB_REPO), token=GITHUB_TOKEN)
+        return publisher.publish(
+            ticket_keys,
+            project_files={file_path: file_info['content'] for file_path, file_info in files.items()},
+            main_readme=render_main_readme(ticket_keys),
+            render_branch_readme=render_branch_readme,
+            write_summary=write_summary
+        )
+    except Exception as e:
+        logging.error(f"Error publishing repository with git: {e}")
+        print(f"Error: Failed to publish repository with git: {e}")
+        return None
+
+def main(argv=None):
+    setup_logging()
+    return run_with_profiling(run, argv, "Create and structure the GitHub repository from the Jira tickets.")
+
+def run():
+    ticket_keys = read_ticket_keys()
     if not ticket_keys:
         logging.error("No ticket keys found.")
         print("No ticket keys found.")
         return
 
-    repo = create_github_repo()
-    if not repo:
-        logging.error("Failed to create or access repository.")
-        print("Failed to create or access repository.")
-        return
+    # An explicit GIT_PUBLISH_REMOTE (e.g. a local bare repository) needs no GitHub API access
+    if not (PUBLISH_BACKEND == 'git' and GIT_PUBLISH_REMOTE):
+        repo = create_github_repo()
+        if not repo:
+            logging.error("Failed to create or access repository.")
+            print("Failed to create or access repository.")
+            return
 
-    initialize_repo(repo, ticket_keys)
-    create_branches(repo, ticket_keys)
+    write_summary = new_write_summary()
+    if PUBLISH_BACKEND == 'git':
+        publish_with_git(ticket_keys, write_summary)
+    else:
+        initialize_repo(repo, ticket_keys, write_summary)
+        create_branches(repo, ticket_keys, write_summary)
+    logging.info(f"Repository writes: {format_write_summary(write_summary)}")
+    print(f"Repository writes: {format_write_summary(write_summary)}")
     logging.info(f"Repository setup completed: https://github.com/{GITHUB_USERNAME}/{GITHUB_REPO}")
     print(f"Repository setup completed successfully: https://github.com/{GITHUB_USERNAME}/{GITHUB_REPO}")
 
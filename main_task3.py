@@ -2,20 +2,19 @@ import os
 import json
 import logging
 import re
-import time
 import base64
-import requests
-from github import Github
-from groq import Groq
 from dotenv import load_dotenv
-
-# Setup logging
-logging.basicConfig(
-    filename='jira_and_llm_tasks.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+from log_setup import setup_logging
+from resilience import resilient_call, http_session, HEDGE_LLM_REQUESTS
+from model_router import complete_with_routing, usage_of, usage_summary, estimate_tokens, choose_model
+from task_similarity import SimilarityIndex, task_text, rekey_test_case
+from ticket_manifest import read_tickets, iter_task_groups
+from git_publisher import GitPublisher, github_remote_url, PUBLISH_BACKEND, GIT_PUBLISH_REMOTE
+from delivery import DeliveryPipeline
+from batch_jobs import BatchClient, batch_line
+from jira_adf import markdown_to_adf, adf_doc
+from profiling import profiled, run_with_profiling
+from github_sync import upsert_repo_file, branch_name_for, new_write_summary, format_write_summary
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +25,19 @@ GITHUB_REPO = os.getenv('GITHUB_REPO')
 JIRA_URL = os.getenv('JIRA_URL')  # e.g., https://your-domain.atlassian.net
 JIRA_EMAIL = os.getenv('JIRA_EMAIL')
 JIRA_API_TOKEN = os.getenv('JIRA_API_TOKEN')
+MODEL = "llama-3.1-70b-versatile"  # Large model; override with GROQ_LARGE_MODEL, small prompts are routed to GROQ_SMALL_MODEL
+# Tasks at least this similar (shingle Jaccard) to an already generated task reuse its test cases; >1 disables
+DUPLICATE_TASK_THRESHOLD = float(os.getenv('DUPLICATE_TASK_THRESHOLD', '0.85'))
+TEST_CASE_MAX_TOKENS = 1000
+# Backlogs needing at least this many test-case prompts go through the Groq batch API; 0 disables
+TEST_CASE_BATCH_MIN_PROMPTS = int(os.getenv('TEST_CASE_BATCH_MIN_PROMPTS', '0'))
+# Deliver each test case to Jira, GitHub and all_test_cases.txt as soon as it is generated
+PIPELINED_DELIVERY = os.getenv('PIPELINED_DELIVERY', 'true').lower() in ('1', 'true', 'yes')
+DELIVERY_JIRA_WORKERS = int(os.getenv('DELIVERY_JIRA_WORKERS', '4'))
+DELIVERY_GITHUB_WORKERS = int(os.getenv('DELIVERY_GITHUB_WORKERS', '4'))
+# Jira Cloud rejects comment bodies over 32767 characters; larger documents are attached
+JIRA_COMMENT_MAX_CHARS = int(os.getenv('JIRA_COMMENT_MAX_CHARS', '32767'))
+JIRA_ATTACHMENT_TIMEOUT = float(os.getenv('JIRA_ATTACHMENT_TIMEOUT', '60'))
 
 def validate_env_vars():
     """Validate required environment variables."""
@@ -51,52 +63,71 @@ def validate_env_vars():
         return False
     return True
 
-def read_ticket_keys(file_path):
-    """Read and validate ticket_keys.json."""
+@profiled('tickets')
+def read_ticket_keys(file_path=None):
+    """Open the ticket manifest (or legacy ticket_keys.json) as a validated, streaming iterable."""
     try:
-        with open(file_path, 'r') as f:
-            ticket_keys = json.load(f)
-        for ticket in ticket_keys:
-            if not all(key in ticket for key in ['key', 'summary', 'type']):
-                raise ValueError(f"Invalid ticket entry: {ticket}. Missing required fields.")
-        logging.info(f"Read {len(ticket_keys)} tickets from {file_path}")
-        return ticket_keys
+        ticket_keys, count = read_tickets(file_path)
+        logging.info(f"Read {count} tickets from {ticket_keys.path}")
+        return ticket_keys if count else []
     except Exception as e:
-        logging.error(f"Error reading ticket_keys.json: {e}")
-        print(f"Error reading ticket_keys.json: {e}")
+        logging.error(f"Error reading ticket file: {e}")
+        print(f"Error reading ticket file: {e}")
         return []
 
+@profiled('ticket_tree')
+def organize_tasks(ticket_keys):
+    """Group ticket entries into {task_key: {..., 'subtasks': {subtask_key: {...}}}}."""
+    return dict(iter_task_groups(ticket_keys))
+
+_groq_client = None
+
+def groq_client():
+    """Groq client created once per process and reused, keeping its connection pool warm."""
+    global _groq_client
+    if _groq_client is None:
+        from groq import Groq
+        # Retries are handled by resilient_call, so disable the SDK's own retry loop
+        _groq_client = Groq(api_key=GROQ_API_KEY, max_retries=0)
+    return _groq_client
+
+def test_case_messages(prompt):
+    return [
+        {"role": "system", "content": "You are a test case generator for a security service booking system."},
+        {"role": "user", "content": prompt}
+    ]
+
+def valid_test_case(text):
+    """A usable response contains test steps and expected results."""
+    return 'expected result' in text.lower() and 'step' in text.lower()
+
 def call_groq_api(prompt, max_retries=3):
     """Call Groq API to generate test cases."""
     if not GROQ_API_KEY:
         logging.error("GROQ_API_KEY is not set")
         return None
     try:
-        client = Groq(api_key=GROQ_API_KEY)
-        for attempt in range(max_retries):
-            try:
-                response = client.chat.completions.create(
-                    model="llama-3.1-70b-versatile",
-                    messages=[
-                        {"role": "system", "content": "You are a test case generator for a security service booking system."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content
-            except Exception as e:
-                logging.warning(f"Groq API attempt {attempt + 1}/{max_retries} failed: {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                else:
-                    logging.error(f"Groq API call failed after {max_retries} attempts: {str(e)}")
-                    return None
+        client = groq_client()
     except Exception as e:
         logging.error(f"Failed to initialize Groq client: {str(e)}")
         return None
-    return None
 
+    def send(model):
+        response = resilient_call(f'groq:{model}', lambda: client.chat.completions.create(
+            model=model,
+            messages=test_case_messages(prompt),
+            max_tokens=TEST_CASE_MAX_TOKENS,
+            temperature=0.7
+        ), max_attempts=max_retries, hedge=HEDGE_LLM_REQUESTS, tokens=estimate_tokens(prompt))
+        return response.choices[0].message.content, usage_of(response)
+
+    try:
+        return complete_with_routing('testcases', prompt, send, validate=valid_test_case, large_model=MODEL)
+    except Exception as e:
+        logging.error(f"Groq API call failed after retries: {str(e)}")
+        return None
+
+@profiled('render')
 def generate_fallback_test_case(task_key, task_info):
     """Generate a basic test case using acceptance criteria if Groq API fails."""
     test_case_content = f"# Test Cases for {task_key}: {task_info['summary']}\n\n"
@@ -140,39 +171,139 @@ def generate_fallback_test_case(task_key, task_info):
 
     return test_case_content
 
-def generate_test_cases(tasks):
+@profiled('render')
+def build_test_case_prompt(task_key, task_info):
+    """Groq prompt asking for Markdown test cases for a task and its subtasks."""
+    prompt = (
+        f"Generate test cases for the following task in a security service booking system:\n"
+        f"Task ID: {task_key}\n"
+        f"Summary: {task_info['summary']}\n"
+        f"Description: {task_info['description']}\n"
+        f"Acceptance Criteria:\n" +
+        (("\n".join([f"- {crit}" for crit in task_info['acceptance_criteria']]) + "\n") if task_info['acceptance_criteria'] else "- None\n") +
+        f"\nFormat each test case in Markdown with sections: Objective, Preconditions, Test Steps (numbered), Expected Result. "
+        f"Generate one test case for the task and one for each subtask (if any) under a 'Subtask Test Cases' section.\n"
+        f"Subtasks:\n"
+    )
+    for subtask_key, subtask in task_info['subtasks'].items():
+        prompt += (
+            f"Subtask ID: {subtask_key}\n"
+            f"Summary: {subtask['summary']}\n"
+            f"Description: {subtask['description']}\n"
+            f"Acceptance Criteria:\n" +
+            (("\n".join([f"- {crit}" for crit in subtask['acceptance_criteria']]) + "\n") if subtask['acceptance_criteria'] else "- None\n") +
+            "\n"
+        )
+    prompt += "Ensure test cases are specific, actionable, and cover all acceptance criteria."
+    return prompt
+
+def plan_test_case_prompts(tasks, similarity_threshold):
+    """(task_key, prompt) for each task needing a Groq call; near-duplicates are left out.
+
+    Mirrors iter_test_cases, assuming every Groq call succeeds.
+    """
+    index = SimilarityIndex()
+    texts = {task_key: task_text(task_info) for task_key, task_info in tasks.items()}
+    for task_key, text in texts.items():
+        index.add(task_key, text)
+    prompts, sources = [], set()
+    for task_key, task_info in tasks.items():
+        if similarity_threshold <= 1:
+            allowed = {k for k in sources if len(tasks[k]['subtasks']) == len(task_info['subtasks'])}
+            if index.query(texts[task_key], similarity_threshold, allowed=allowed):
+                continue
+        prompts.append((task_key, build_test_case_prompt(task_key, task_info)))
+        sources.add(task_key)
+    return prompts
+
+def batch_test_cases(tasks, similarity_threshold):
+    """Generate a large backlog's test cases with the Groq batch API instead of one call per task.
+
+    Prompts are grouped into one batch job per routed model. Returns
+    task_key -> test case Markdown for every valid batch response; tasks left
+    out (failed, invalid or not batched) are generated interactively. Blocks
+    until the batches finish (up to BATCH_MAX_WAIT_SECONDS), so it runs once
+    for the whole backlog, before any per-task generation.
+    """
+    if not TEST_CASE_BATCH_MIN_PROMPTS or not GROQ_API_KEY:
+        return {}
+    prompts = plan_test_case_prompts(tasks, similarity_threshold)
+    if len(prompts) < TEST_CASE_BATCH_MIN_PROMPTS:
+        return {}
+    jobs = {}
+    for task_key, prompt in prompts:
+        model = choose_model(prompt, MODEL)
+        jobs.setdefault(model, []).append(batch_line(task_key, {
+            'model': model,
+            'messages': test_case_messages(prompt),
+            'max_tokens': TEST_CASE_MAX_TOKENS,
+            'temperature': 0.7
+        }))
+    try:
+        results = BatchClient(GROQ_API_KEY).run([(f"testcases-{model}", lines) for model, lines in jobs.items()])
+    except Exception as e:
+        logging.error(f"Batch test case generation failed, generating interactively: {str(e)}")
+        print(f"Error: batch test case generation failed, generating interactively: {str(e)}")
+        return {}
+
+    test_cases = {}
+    for task_key, body in results.items():
+        try:
+            content = body['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            continue
+        if content and valid_test_case(content):
+            test_cases[task_key] = content
+    logging.info(f"Batch API generated test cases for {len(test_cases)} of {len(prompts)} tasks; the rest are generated interactively")
+    print(f"Batch API generated test cases for {len(test_cases)} of {len(prompts)} tasks; the rest are generated interactively")
+    return test_cases
+
+def generate_test_cases(tasks, similarity_threshold=None, batched=None):
     """Generate test cases using Groq API with fallback."""
+    return dict(iter_test_cases(tasks, similarity_threshold, batched))
+
+def iter_test_cases(tasks, similarity_threshold=None, batched=None):
+    """Yield (task_key, test case Markdown) as soon as each task's test cases are ready.
+
+    Near-duplicate tasks reuse (and re-key) the Groq output of an earlier
+    similar task instead of making another API call. Large backlogs are
+    generated up front with the batch API (see batch_test_cases), unless the
+    caller already did that and passes the results as ``batched``.
+    """
+    if similarity_threshold is None:
+        similarity_threshold = DUPLICATE_TASK_THRESHOLD
     test_cases = {}
+    if batched is None:
+        batched = batch_test_cases(tasks, similarity_threshold)
+
+    # Index every task up front; only tasks whose test cases came from Groq are reuse sources
+    index = SimilarityIndex()
+    task_texts = {task_key: task_text(task_info) for task_key, task_info in tasks.items()}
+    for task_key, text in task_texts.items():
+        index.add(task_key, text)
+    reuse_sources = set()
+    reused_count = 0
+
     for task_key, task_info in tasks.items():
-        # Craft prompt for Groq
-        prompt = (
-            f"Generate test cases for the following task in a security service booking system:\n"
-            f"Task ID: {task_key}\n"
-            f"Summary: {task_info['summary']}\n"
-            f"Description: {task_info['description']}\n"
-            f"Acceptance Criteria:\n" +
-            (("\n".join([f"- {crit}" for crit in task_info['acceptance_criteria']]) + "\n") if task_info['acceptance_criteria'] else "- None\n") +
-            f"\nFormat each test case in Markdown with sections: Objective, Preconditions, Test Steps (numbered), Expected Result. "
-            f"Generate one test case for the task and one for each subtask (if any) under a 'Subtask Test Cases' section.\n"
-            f"Subtasks:\n"
-        )
-        for subtask_key, subtask in task_info['subtasks'].items():
-            prompt += (
-                f"Subtask ID: {subtask_key}\n"
-                f"Summary: {subtask['summary']}\n"
-                f"Description: {subtask['description']}\n"
-                f"Acceptance Criteria:\n" +
-                (("\n".join([f"- {crit}" for crit in subtask['acceptance_criteria']]) + "\n") if subtask['acceptance_criteria'] else "- None\n") +
-                "\n"
-            )
-        prompt += "Ensure test cases are specific, actionable, and cover all acceptance criteria."
+        if similarity_threshold <= 1:
+            allowed = {k for k in reuse_sources if len(tasks[k]['subtasks']) == len(task_info['subtasks'])}
+            match = index.query(task_texts[task_key], similarity_threshold, allowed=allowed)
+            if match:
+                source_key, similarity = match
+                test_cases[task_key] = rekey_test_case(test_cases[source_key], source_key, tasks[source_key], task_key, task_info)
+                reused_count += 1
+                logging.info(f"Reused test cases of {source_key} for {task_key} (similarity {similarity:.2f})")
+                print(f"Reused test cases of {source_key} for {task_key} (similarity {similarity:.2f})")
+                yield task_key, test_cases[task_key]
+                continue
 
-        # Call Groq API
-        test_case_content = call_groq_api(prompt)
+        # Use the batch result if there is one, otherwise call Groq API
+        test_case_content = batched.get(task_key) or call_groq_api(build_test_case_prompt(task_key, task_info))
         if not test_case_content:
             logging.warning(f"Using fallback test case generation for {task_key}")
             test_case_content = generate_fallback_test_case(task_key, task_info)
         else:
+            reuse_sources.add(task_key)
             # Ensure content starts with proper header
             if not test_case_content.startswith(f"# Test Cases for {task_key}"):
                 test_case_content = (
@@ -183,134 +314,206 @@ def generate_test_cases(tasks):
 
         test_cases[task_key] = test_case_content
         logging.info(f"Generated test cases for {task_key}")
-    return test_cases
+        yield task_key, test_case_content
+
+    # Nothing can be reused from a single task (e.g. the orchestrator's per-task calls)
+    if len(tasks) > 1 and similarity_threshold <= 1:
+        logging.info(f"Reused test cases for {reused_count} of {len(tasks)} tasks (similarity threshold {similarity_threshold})")
+        print(f"Reused test cases for {reused_count} of {len(tasks)} tasks (similarity threshold {similarity_threshold})")
+
+def post_jira_comment(task_key, test_content):
+    """Deliver test cases to a Jira ticket, sized to fit Jira's comment limit.
+
+    Documents whose ADF comment body fits JIRA_COMMENT_MAX_CHARS become one
+    structured comment; larger ones are uploaded as a Markdown attachment (one multipart request)
+    followed by a short summary comment. Request bodies are encoded once, so
+    retries resend the same bytes without rebuilding them.
+    """
+    auth = f'Basic {base64.b64encode(f"{JIRA_EMAIL}:{JIRA_API_TOKEN}".encode()).decode()}'
+    # Ensure JIRA_URL ends with a slash
+    jira_base_url = JIRA_URL.rstrip('/') + '/'
+    issue_url = f"{jira_base_url}rest/api/3/issue/{task_key}"
+
+    def post(url, data, headers, timeout=10):
+        headers = {'Authorization': auth, **headers}
+
+        def send():
+            response = http_session().post(url, headers=headers, data=data, timeout=timeout)
+            response.raise_for_status()
+            return response
+        return resilient_call('jira', send, idempotent=False)
+
+    comment_text = "Generated Test Cases:\n\n" + test_content
+    # ADF JSON is several times larger than the Markdown, so the encoded body is what is measured
+    body = json.dumps({"body": markdown_to_adf(comment_text)})
+    if len(body) <= JIRA_COMMENT_MAX_CHARS:
+        post(f"{issue_url}/comment", body.encode('utf-8'), {'Content-Type': 'application/json'})
+        return 'comment'
+
+    from urllib3 import encode_multipart_formdata
+    file_name = f"test_cases_{task_key}.md"
+    data = test_content.encode('utf-8')
+    body, content_type = encode_multipart_formdata({'file': (file_name, data, 'text/markdown')})
+    post(f"{issue_url}/attachments", body, {'Content-Type': content_type, 'X-Atlassian-Token': 'no-check'}, JIRA_ATTACHMENT_TIMEOUT)
+    test_case_count = len(re.findall(r'^#+\s*Test Case\b', test_content, re.MULTILINE))
+    summary = (
+        f"Generated Test Cases: {test_case_count} test cases ({len(data) / 1024:.1f} KiB) "
+        f"are attached as {file_name}; the document exceeds Jira's comment size limit."
+    )
+    post(f"{issue_url}/comment", json.dumps({"body": adf_doc(summary)}).encode('utf-8'), {'Content-Type': 'application/json'})
+    return 'attachment'
 
 def add_test_cases_to_jira(task_key, test_content):
-    """Add test cases as a comment to the Jira ticket."""
+    """Add test cases to the Jira ticket as a comment, or as an attachment when too large."""
     # Skip if test_content is empty or contains only fallback error message
     if "Failed to generate test cases" in test_content:
         logging.warning(f"Skipping Jira comment for {task_key} due to empty test cases")
         return
 
     try:
-        headers = {
-            'Authorization': f'Basic {base64.b64encode(f"{JIRA_EMAIL}:{JIRA_API_TOKEN}".encode()).decode()}',
-            'Content-Type': 'application/json'
-        }
-        # Ensure JIRA_URL ends with a slash
-        jira_base_url = JIRA_URL.rstrip('/') + '/'
-        url = f"{jira_base_url}rest/api/3/issue/{task_key}/comment"
-        payload = {
-            "body": {
-                "type": "doc",
-                "version": 1,
-                "content": [
-                    {
-                        "type": "paragraph",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Generated Test Cases:\n\n" + test_content
-                            }
-                        ]
-                    }
-                ]
-            }
-        }
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        logging.info(f"Added test cases as comment to Jira ticket {task_key}")
-        print(f"Added test cases to Jira ticket {task_key}")
+        delivered_as = post_jira_comment(task_key, test_content)
+        if delivered_as == 'attachment':
+            logging.info(f"Attached test cases to Jira ticket {task_key} ({len(test_content)} characters)")
+            print(f"Attached test cases to Jira ticket {task_key}")
+        else:
+            logging.info(f"Added test cases as comment to Jira ticket {task_key}")
+            print(f"Added test cases to Jira ticket {task_key}")
     except Exception as e:
         logging.error(f"Failed to add test cases to Jira ticket {task_key}: {str(e)}")
         print(f"Error adding test cases to Jira ticket {task_key}: {str(e)}")
 
-def commit_test_cases(repo, test_cases, tasks):
+def commit_test_cases(repo, test_cases, tasks, write_summary=None):
     """Commit test case Markdown files to GitHub feature branches."""
     for task_key, test_content in test_cases.items():
         try:
-            sanitized_summary = re.sub(r'[^a-zA-Z0-9\s-]', '', tasks[task_key]['summary']).lower().replace(' ', '-')
-            branch_name = f"feature/{task_key}-{sanitized_summary}"[:50]
+            branch_name = branch_name_for(task_key, tasks[task_key]['summary'])
             file_name = f"test_cases_{task_key}.md"
 
             # Verify branch exists
             try:
-                repo.get_branch(branch_name)
+                resilient_call('github', lambda: repo.get_branch(branch_name))
             except:
                 logging.warning(f"Branch {branch_name} does not exist")
                 print(f"Error: Branch {branch_name} does not exist. Skipping.")
                 continue
 
             # Commit test case file
-            try:
-                contents = repo.get_contents(file_name, ref=branch_name)
-                repo.update_file(
-                    file_name,
-                    f"Update {file_name} for {task_key}",
-                    test_content,
-                    contents.sha,
-                    branch=branch_name
-                )
-                logging.info(f"Updated {file_name} in branch {branch_name}")
-                print(f"Updated {file_name} in branch {branch_name}")
-            except:
-                repo.create_file(
-                    file_name,
-                    f"Add {file_name} for {task_key}",
-                    test_content,
-                    branch=branch_name
-                )
+            action = upsert_repo_file(
+                repo,
+                file_name,
+                test_content,
+                branch_name,
+                f"Add {file_name} for {task_key}",
+                f"Update {file_name} for {task_key}",
+                write_summary
+            )
+            if action == 'created':
                 logging.info(f"Created {file_name} in branch {branch_name}")
                 print(f"Created {file_name} in branch {branch_name}")
+            elif action == 'updated':
+                logging.info(f"Updated {file_name} in branch {branch_name}")
+                print(f"Updated {file_name} in branch {branch_name}")
+            else:
+                print(f"Skipped {file_name} in branch {branch_name}: unchanged")
 
         except Exception as e:
             logging.error(f"Error committing test cases for {task_key} to {branch_name}: {str(e)}")
             print(f"Error committing test cases for {task_key}: {str(e)}")
 
+def open_test_case_file(output_file='all_test_cases.txt'):
+    f = open(output_file, 'w', encoding='utf-8')
+    f.write("# All Test Cases for Body Guard Booking System\n\n")
+    return f
+
+def append_test_case(f, test_content):
+    f.write(test_content)
+    f.write("\n---\n")  # Separator between tasks
+    f.flush()
+
 def save_test_cases_to_text_file(test_cases, output_file='all_test_cases.txt'):
     """Save all test cases to a single text file."""
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("# All Test Cases for Body Guard Booking System\n\n")
+        with open_test_case_file(output_file) as f:
             for task_key, test_content in test_cases.items():
-                f.write(test_content)
-                f.write("\n---\n")  # Separator between tasks
+                append_test_case(f, test_content)
         logging.info(f"Saved all test cases to {output_file}")
         print(f"Saved all test cases to {output_file}")
     except Exception as e:
         logging.error(f"Error saving test cases to {output_file}: {str(e)}")
         print(f"Error saving test cases to {output_file}: {str(e)}")
 
-def main():
+def connect_github_repo():
+    try:
+        from github import Github
+        g = Github(GITHUB_TOKEN, retry=None)
+        repo = resilient_call('github', lambda: g.get_user().get_repo(GITHUB_REPO))
+        logging.info(f"Connected to repository: {repo.html_url}")
+        return repo
+    except Exception as e:
+        logging.error(f"Error accessing GitHub repository: {str(e)}")
+        print(f"Error: Failed to access repository: {str(e)}")
+        return None
+
+def deliver_test_cases_pipelined(tasks, ticket_keys, output_file='all_test_cases.txt'):
+    """Generate test cases and deliver each one to Jira, GitHub and the text file while the next is generated."""
+    write_summary = new_write_summary()
+    pipeline = DeliveryPipeline()
+    pipeline.add_sink('jira', add_test_cases_to_jira, DELIVERY_JIRA_WORKERS)
+
+    # The git backend publishes everything with one push, so its sink only collects
+    collected = {}
+    repo = None
+    if PUBLISH_BACKEND == 'git':
+        pipeline.add_sink('github', collected.__setitem__)
+    else:
+        repo = connect_github_repo()
+        if repo is not None:
+            pipeline.add_sink('github', lambda task_key, test_content:
+                              commit_test_cases(repo, {task_key: test_content}, tasks, write_summary),
+                              DELIVERY_GITHUB_WORKERS)
+
+    with open_test_case_file(output_file) as f:
+        # One worker keeps the file in generation order
+        pipeline.add_sink('file', lambda task_key, test_content: append_test_case(f, test_content))
+        pipeline.run(iter_test_cases(tasks))
+    logging.info(f"Saved all test cases to {output_file}")
+    print(f"Saved all test cases to {output_file}")
+
+    if PUBLISH_BACKEND == 'git':
+        try:
+            publisher = GitPublisher(GIT_PUBLISH_REMOTE or github_remote_url(GITHUB_USERNAME, GITHUB_REPO), token=GITHUB_TOKEN)
+            publisher.publish(ticket_keys, test_cases=collected, write_summary=write_summary)
+        except Exception as e:
+            logging.error(f"Error publishing test cases with git: {str(e)}")
+            print(f"Error: Failed to publish test cases with git: {str(e)}")
+    for line in pipeline.report() + [f"Repository writes: {format_write_summary(write_summary)}"]:
+        logging.info(line)
+        print(line)
+
+def main(argv=None):
     """Main function to generate test cases, add to Jira, commit to GitHub, and save to text file."""
+    setup_logging()
+    return run_with_profiling(run, argv, "Generate test cases and deliver them to Jira, GitHub and a text file.")
+
+def run():
     if not validate_env_vars():
         return
 
-    ticket_keys = read_ticket_keys('ticket_keys.json')
+    ticket_keys = read_ticket_keys()
     if not ticket_keys:
         logging.error("No ticket keys found.")
         print("Error: No ticket keys found.")
         return
 
     # Organize tasks and subtasks
-    tasks = {}
-    for ticket in ticket_keys:
-        ticket_key = ticket['key']
-        if ticket['type'] == 'Task':
-            tasks[ticket_key] = {
-                'summary': ticket['summary'],
-                'description': ticket.get('description', 'No description available.'),
-                'acceptance_criteria': ticket.get('acceptance_criteria', []),
-                'subtasks': {}
-            }
-        elif ticket['type'] == 'Subtask':
-            parent_key = ticket.get('parent_key')
-            if parent_key and parent_key in tasks:
-                tasks[parent_key]['subtasks'][ticket_key] = {
-                    'summary': ticket['summary'],
-                    'description': ticket.get('description', 'No description available.'),
-                    'acceptance_criteria': ticket.get('acceptance_criteria', [])
-                }
+    tasks = organize_tasks(ticket_keys)
+
+    if PIPELINED_DELIVERY:
+        deliver_test_cases_pipelined(tasks, ticket_keys)
+        for line in usage_summary():
+            logging.info(f"Model usage: {line}")
+            print(f"Model usage: {line}")
+        return
 
     # Generate test cases using Groq API
     test_cases = generate_test_cases(tasks)
@@ -318,17 +521,42 @@ def main():
     # Save test cases to text file
     save_test_cases_to_text_file(test_cases)
 
+    if PUBLISH_BACKEND == 'git':
+        # Local working copy: all test-case files go out in a single git push
+        write_summary = new_write_summary()
+        for task_key in test_cases:
+            add_test_cases_to_jira(task_key, test_cases[task_key])
+        try:
+            publisher = GitPublisher(GIT_PUBLISH_REMOTE or github_remote_url(GITHUB_USERNAME, GITHUB_REPO), token=GITHUB_TOKEN)
+            publisher.publish(ticket_keys, test_cases=test_cases, write_summary=write_summary)
+            logging.info(f"Repository writes: {format_write_summary(write_summary)}")
+            print(f"Repository writes: {format_write_summary(write_summary)}")
+        except Exception as e:
+            logging.error(f"Error publishing test cases with git: {str(e)}")
+            print(f"Error: Failed to publish test cases with git: {str(e)}")
+        for line in usage_summary():
+            logging.info(f"Model usage: {line}")
+            print(f"Model usage: {line}")
+        return
+
     # Connect to GitHub
     try:
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_user().get_repo(GITHUB_REPO)
+        from github import Github
+        g = Github(GITHUB_TOKEN, retry=None)
+        repo = resilient_call('github', lambda: g.get_user().get_repo(GITHUB_REPO))
         logging.info(f"Connected to repository: {repo.html_url}")
 
         # Add test cases to Jira and commit to GitHub
+        write_summary = new_write_summary()
         for task_key in test_cases:
             add_test_cases_to_jira(task_key, test_cases[task_key])
-            commit_test_cases(repo, {task_key: test_cases[task_key]}, tasks)
+            commit_test_cases(repo, {task_key: test_cases[task_key]}, tasks, write_summary)
+        logging.info(f"Repository writes: {format_write_summary(write_summary)}")
+        print(f"Repository writes: {format_write_summary(write_summary)}")
 
+        for line in usage_summary():
+            logging.info(f"Model usage: {line}")
+            print(f"Model usage: {line}")
         logging.info(f"Test case generation, Jira update, GitHub commit, and text file creation completed.")
         print(f"Test case generation, Jira update, GitHub commit, and text file creation completed successfully.")
     except Exception as e:
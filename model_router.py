@@ -0,0 +1,125 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+
+from rate_limiter import settle_tokens
+
+# Small prompts go to a fast model; large or list-heavy prompts, and any
+# response that fails validation, go to the large model.
+GROQ_SMALL_MODEL = os.getenv('GROQ_SMALL_MODEL', 'llama-3.1-8b-instant')
+GROQ_LARGE_MODEL = os.getenv('GROQ_LARGE_MODEL')
+ROUTER_SMALL_MAX_TOKENS = int(os.getenv('ROUTER_SMALL_MAX_TOKENS', '1200'))
+ROUTER_SMALL_MAX_ITEMS = int(os.getenv('ROUTER_SMALL_MAX_ITEMS', '12'))
+ROUTER_ENABLED = os.getenv('ROUTER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+ROUTER_STATS_FILE = os.getenv('ROUTER_STATS_FILE', 'model_usage.jsonl')
+
+_stats_lock = threading.Lock()
+_usage = {}
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) used for routing and planning."""
+    return max(1, len(text) // 4)
+
+def prompt_items(prompt):
+    """Number of list entries, tasks and subtasks in a prompt, as a complexity signal."""
+    return len(re.findall(r'^\s*(?:- |Subtask|Task)', prompt, re.MULTILINE))
+
+def choose_model(prompt, large_model, payload=None):
+    """Return the model a prompt should be sent to first.
+
+    Items are counted in ``payload`` (the document or task the prompt wraps)
+    when given, so list lines in a fixed instruction template do not count.
+    """
+    large_model = GROQ_LARGE_MODEL or large_model
+    if not ROUTER_ENABLED:
+        return large_model
+    items = prompt_items(prompt if payload is None else payload)
+    if estimate_tokens(prompt) <= ROUTER_SMALL_MAX_TOKENS and items <= ROUTER_SMALL_MAX_ITEMS:
+        return GROQ_SMALL_MODEL
+    return large_model
+
+def record_usage(stage, model, latency, prompt, usage, valid, payload=None):
+    """Keep per-model totals and append one JSON line per call for threshold tuning."""
+    usage = usage or {}
+    entry = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'stage': stage,
+        'model': model,
+        'latency': round(latency, 3),
+        'prompt_chars': len(prompt),
+        'estimated_prompt_tokens': estimate_tokens(prompt),
+        'prompt_items': prompt_items(prompt if payload is None else payload),
+        'prompt_tokens': usage.get('prompt_tokens'),
+        'completion_tokens': usage.get('completion_tokens'),
+        'valid': valid
+    }
+    with _stats_lock:
+        totals = _usage.setdefault(model, {'calls': 0, 'failed_validation': 0, 'latencies': [], 'prompt_tokens': 0, 'completion_tokens': 0})
+        totals['calls'] += 1
+        totals['failed_validation'] += 0 if valid else 1
+        totals['latencies'].append(latency)
+        totals['prompt_tokens'] += usage.get('prompt_tokens') or 0
+        totals['completion_tokens'] += usage.get('completion_tokens') or 0
+        if ROUTER_STATS_FILE:
+            try:
+                with open(ROUTER_STATS_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                logging.warning(f"Could not record model usage to {ROUTER_STATS_FILE}: {e}")
+
+def complete_with_routing(stage, prompt, send, validate=None, large_model=None, payload=None):
+    """Send a prompt to the routed model, escalating to the large model if validation fails.
+
+    ``send(model)`` performs the call and returns ``(content, usage)`` where usage
+    is a dict with prompt_tokens/completion_tokens (or None). Exceptions from the
+    large model propagate; a failing small model escalates instead. ``payload``
+    is passed on to choose_model.
+    """
+    large_model = GROQ_LARGE_MODEL or large_model
+    model = choose_model(prompt, large_model, payload)
+    while True:
+        started = time.monotonic()
+        try:
+            content, usage = send(model)
+            valid = bool(content) and (validate is None or validate(content))
+        except Exception as e:
+            if model == large_model:
+                raise
+            logging.warning(f"{stage}: {model} failed ({e}), retrying on {large_model}")
+            record_usage(stage, model, time.monotonic() - started, prompt, None, False, payload)
+            model = large_model
+            continue
+        record_usage(stage, model, time.monotonic() - started, prompt, usage, valid, payload)
+        if usage:
+            # Callers charge estimate_tokens(prompt) up front; settle to the reported usage
+            settle_tokens(f'groq:{model}', (usage.get('prompt_tokens') or 0) + (usage.get('completion_tokens') or 0), estimate_tokens(prompt))
+        if valid or model == large_model:
+            return content
+        logging.info(f"{stage}: response from {model} failed validation, retrying on {large_model}")
+        model = large_model
+
+def usage_summary():
+    """One line per model with call count, latency and token totals."""
+    lines = []
+    with _stats_lock:
+        for model, totals in sorted(_usage.items()):
+            latencies = sorted(totals['latencies'])
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            lines.append(
+                f"{model}: {totals['calls']} calls ({totals['failed_validation']} failed validation), "
+                f"avg {sum(latencies) / len(latencies):.2f}s, p95 {p95:.2f}s, "
+                f"{totals['prompt_tokens']} prompt / {totals['completion_tokens']} completion tokens"
+            )
+    return lines
+
+def usage_of(response):
+    """Token usage from an OpenAI-compatible response (dict or SDK object)."""
+    usage = response.get('usage') if isinstance(response, dict) else getattr(response, 'usage', None)
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage
+    return {'prompt_tokens': getattr(usage, 'prompt_tokens', None), 'completion_tokens': getattr(usage, 'completion_tokens', None)}
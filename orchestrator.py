@@ -0,0 +1,277 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import main_task1
+import main_task2
+import main_task3
+from github_sync import new_write_summary, format_write_summary
+from log_setup import setup_logging
+from ticket_manifest import TicketManifest, ManifestSink, export_legacy_json, TICKET_MANIFEST, LEGACY_TICKET_FILE
+
+ORCHESTRATOR_WORKERS = int(os.getenv('ORCHESTRATOR_WORKERS', '8'))
+
+class Dag:
+    """Minimal dependency-graph runner.
+
+    Nodes start on a thread pool as soon as all of their dependencies have
+    succeeded; a running node may add further nodes (e.g. per-ticket work).
+    A node whose dependency failed is skipped.
+    """
+
+    def __init__(self, max_workers=ORCHESTRATOR_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dag')
+        self.cond = threading.Condition()
+        self.nodes = {}
+        self.spawned_by = {}
+        self.local = threading.local()
+        self.results = {}
+        self.status = {}
+        self.timing = {}
+        self.started_at = None
+
+    def add(self, name, func, deps=()):
+        with self.cond:
+            self.nodes[name] = (func, tuple(deps))
+            self.spawned_by[name] = getattr(self.local, 'current', None)
+            self.status[name] = 'pending'
+            self.cond.notify_all()
+
+    def _run_node(self, name, func):
+        started = time.monotonic()
+        self.local.current = name
+        try:
+            result = func()
+            state = 'done'
+        except Exception as e:
+            logging.error(f"Stage {name} failed: {e}")
+            print(f"Error: stage {name} failed: {e}")
+            result, state = None, 'failed'
+        finally:
+            self.local.current = None
+        with self.cond:
+            self.results[name] = result
+            self.status[name] = state
+            self.timing[name] = (started - self.started_at, time.monotonic() - self.started_at)
+            self.cond.notify_all()
+
+    def _schedule(self):
+        """Start every ready node; return True while anything is pending or running."""
+        active = False
+        for name, (func, deps) in self.nodes.items():
+            if self.status[name] == 'running':
+                active = True
+            if self.status[name] != 'pending':
+                continue
+            active = True
+            dep_states = [self.status.get(dep, 'pending') for dep in deps]
+            if any(state in ('failed', 'skipped') for state in dep_states):
+                self.status[name] = 'skipped'
+                logging.warning(f"Skipping stage {name}: a dependency did not succeed")
+            elif all(state == 'done' for state in dep_states):
+                self.status[name] = 'running'
+                self.pool.submit(self._run_node, name, func)
+        return active
+
+    def run(self):
+        self.started_at = time.monotonic()
+        with self.cond:
+            while True:
+                # Re-scan until stable: skipping one node can unblock (or skip) others
+                while True:
+                    before = dict(self.status)
+                    active = self._schedule()
+                    if self.status == before:
+                        break
+                if not active:
+                    break
+                self.cond.wait()
+        self.pool.shutdown(wait=True)
+        return self.results
+
+    def critical_path(self):
+        """Chain of nodes that determined the finish time, following the latest-finishing dependency.
+
+        A node added by another node implicitly depends on it.
+        """
+        finished = {name: t for name, t in self.timing.items() if self.status[name] == 'done'}
+        if not finished:
+            return []
+        name = max(finished, key=lambda n: finished[n][1])
+        path = [name]
+        while True:
+            deps = [d for d in self.nodes[name][1] + (self.spawned_by[name],) if d in finished]
+            if not deps:
+                break
+            name = max(deps, key=lambda d: finished[d][1])
+            path.append(name)
+        return list(reversed(path))
+
+    def report(self):
+        lines = []
+        total = max((end for _, end in self.timing.values()), default=0.0)
+        busy = sum(end - start for start, end in self.timing.values())
+        lines.append(f"Wall time: {total:.2f}s (sum of stage times {busy:.2f}s)")
+        path = self.critical_path()
+        if path:
+            lines.append("Critical path: " + " -> ".join(
+                f"{name} ({self.timing[name][1] - self.timing[name][0]:.2f}s)" for name in path
+            ))
+            lines.append(f"Critical path time: {self.timing[path[-1]][1]:.2f}s")
+        for state in ('failed', 'skipped'):
+            names = sorted(n for n, s in self.status.items() if s == state)
+            if names:
+                lines.append(f"{state.capitalize()} stages: {', '.join(names)}")
+        return lines
+
+def tickets_for_task(ticket_keys, task_key):
+    return [t for t in ticket_keys if t['key'] == task_key or t.get('parent_key') == task_key]
+
+def build_pipeline(dag, input_file_path, temp_txt_path='temp_extracted_text.txt', task_file_path='extracted_tasks.txt',
+                   work_dir=None, clients=None):
+    """Model the full three-script workflow as a DAG.
+
+    Jira validation and GitHub repository creation need no document data, so
+    they start immediately, in parallel with extraction and planning. Once the
+    tickets exist, per-ticket branches, test cases, comments and commits run
+    as independent nodes.
+
+    ``work_dir`` keeps this document's intermediate and output files apart
+    from other documents'; ``clients`` (see worker.WarmClients) supplies
+    already-connected Jira and GitHub clients instead of connecting per run.
+    """
+    r = dag.results
+
+    def path(name):
+        return os.path.join(work_dir, os.path.basename(name)) if work_dir else name
+    temp_txt_path, task_file_path = path(temp_txt_path), path(task_file_path)
+    write_summary = new_write_summary()
+    ticket_keys = []
+    display = []
+
+    def extract():
+        main_task1.extract_text_to_txt(input_file_path, temp_txt_path)
+        return main_task1.read_txt_file(temp_txt_path)
+
+    def plan():
+        if not main_task1.extract_task_structure_with_groq(r['extract'], task_file_path):
+            raise RuntimeError("No tasks extracted from Groq API")
+        return main_task1.parse_tasks_from_file(task_file_path)
+
+    def jira_connect():
+        if clients is not None:
+            return clients.jira()
+        jira = main_task1.validate_jira_connection()
+        if jira is None:
+            raise RuntimeError("Failed to connect to Jira")
+        return jira
+
+    def repo_create():
+        if clients is not None:
+            return clients.repo()
+        repo = main_task2.create_github_repo()
+        if repo is None:
+            raise RuntimeError("Failed to create or access repository")
+        return repo
+
+    def jira_create():
+        # One node per parent task; subtasks need their parent's key, so they stay inside it
+        per_task = []
+        manifest = TicketManifest(path(TICKET_MANIFEST))
+        manifest_lock = threading.Lock()
+
+        def create(task, entries, lines):
+            # Like create_jira_tickets, a failed task keeps whatever was created and the run continues
+            try:
+                main_task1.create_task_tickets(r['jira_connect'], task, entries, lines)
+            except Exception as e:
+                logging.error(f"Error creating Jira ticket for {task['title']}: {e}")
+                print(f"Failed to create ticket for '{task['title']}': {e}")
+
+        for index, task in enumerate(r['plan']):
+            # Each ticket reaches the manifest the moment it exists; tasks run concurrently, so
+            # entries from different tasks interleave there until save() restores document order
+            entries, lines = ManifestSink(manifest, manifest_lock), []
+            per_task.append((entries, lines))
+            dag.add(f"jira:{index + 1}", lambda task=task, entries=entries, lines=lines: create(task, entries, lines))
+
+        def save():
+            # Keep document order so parents always precede their subtasks
+            for entries, lines in per_task:
+                ticket_keys.extend(entries)
+                display.extend(lines)
+            manifest.rewrite(ticket_keys)
+            export_legacy_json(ticket_keys, path(LEGACY_TICKET_FILE))
+            print("\nCreated Jira Tickets:\n")
+            print("\n".join(display))
+            tasks = main_task3.organize_tasks(ticket_keys)
+            add_ticket_stages(tasks)
+            return tasks
+
+        dag.add('jira_save', save, deps=[f"jira:{i + 1}" for i in range(len(per_task))])
+
+    def add_ticket_stages(tasks):
+        dag.add('repo_init', lambda: main_task2.initialize_repo(r['repo_create'], ticket_keys, write_summary), deps=['repo_create'])
+        # Tasks are generated one per node below, so near-duplicate reuse is off (>1) and
+        # the batch API, when enabled, covers the whole backlog in one step
+        dag.add('testcases_batch', lambda: main_task3.batch_test_cases(tasks, similarity_threshold=2))
+        for task_key in tasks:
+            dag.add(f"branch:{task_key}", lambda task_key=task_key:
+                    main_task2.create_branches(r['repo_create'], tickets_for_task(ticket_keys, task_key), write_summary),
+                    deps=['repo_init'])
+            dag.add(f"testcases:{task_key}", lambda task_key=task_key:
+                    main_task3.generate_test_cases({task_key: tasks[task_key]}, batched=r['testcases_batch'])[task_key],
+                    deps=['testcases_batch'])
+            dag.add(f"comment:{task_key}", lambda task_key=task_key:
+                    main_task3.add_test_cases_to_jira(task_key, r[f"testcases:{task_key}"]),
+                    deps=[f"testcases:{task_key}"])
+            dag.add(f"commit:{task_key}", lambda task_key=task_key:
+                    main_task3.commit_test_cases(r['repo_create'], {task_key: r[f"testcases:{task_key}"]}, tasks, write_summary),
+                    deps=[f"testcases:{task_key}", f"branch:{task_key}"])
+        dag.add('save_test_cases', lambda: main_task3.save_test_cases_to_text_file(
+            {task_key: r[f"testcases:{task_key}"] for task_key in tasks}, path('all_test_cases.txt')
+        ), deps=[f"testcases:{task_key}" for task_key in tasks])
+
+    dag.add('extract', extract)
+    dag.add('plan', plan, deps=['extract'])
+    dag.add('jira_connect', jira_connect)
+    dag.add('repo_create', repo_create)
+    dag.add('jira_create', jira_create, deps=['plan', 'jira_connect'])
+    return write_summary
+
+def run_pipeline(input_file_path):
+    if not os.path.exists(input_file_path):
+        logging.error(f"Input file {input_file_path} does not exist.")
+        print(f"Error: Input file {input_file_path} does not exist.")
+        return False
+    if not main_task3.validate_env_vars():
+        return False
+
+    dag = Dag()
+    write_summary = build_pipeline(dag, input_file_path)
+    dag.run()
+
+    print("\nPipeline summary:")
+    for line in dag.report() + [f"Repository writes: {format_write_summary(write_summary)}"]:
+        logging.info(line)
+        print(line)
+    return not any(state in ('failed', 'skipped') for state in dag.status.values())
+
+def main():
+    parser = argparse.ArgumentParser(description="Run extraction, Jira, GitHub and test-case stages as one concurrent job.")
+    parser.add_argument('input_file', nargs='?', default="Body guard booking services (2).docx")
+    parser.add_argument('--dry-run', action='store_true', help="Only estimate calls, tokens and wall time")
+    args = parser.parse_args()
+    setup_logging()
+    if args.dry_run:
+        import run_planner
+        run_planner.print_plan(run_planner.plan_run(document=args.input_file, task_file='extracted_tasks.txt'))
+        return
+    sys.exit(0 if run_pipeline(args.input_file) else 1)
+
+if __name__ == '__main__':
+    main()
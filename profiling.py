@@ -0,0 +1,167 @@
+import os
+import time
+import pstats
+import cProfile
+import argparse
+import contextlib
+import functools
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+# --profile: per-stage peak memory (tracemalloc) and CPU time (cProfile)
+# around the document, parsing, ticket-tree and Markdown rendering stages,
+# ranked into one report. Stages are no-ops unless profiling was started.
+PROFILE_REPORT = os.getenv('PROFILE_REPORT', 'profile_report.txt')
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', '15'))
+PROFILE_FRAMES = int(os.getenv('PROFILE_FRAMES', '1'))
+
+def _size(num_bytes):
+    if abs(num_bytes) < 1024:
+        return f"{num_bytes} B"
+    if abs(num_bytes) < 1024 * 1024:
+        return f"{num_bytes / 1024:.1f} KiB"
+    return f"{num_bytes / (1024 * 1024):.1f} MiB"
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _short_path(path):
+    """Repository files relative to the repository, anything else as its last two path components."""
+    if path.startswith(REPO_DIR + os.sep):
+        return os.path.relpath(path, REPO_DIR)
+    return os.path.join(*path.split(os.sep)[-2:]) if os.sep in path else path
+
+class Profiler:
+    """Collects memory and CPU statistics per named stage.
+
+    Stages may nest; an enclosing stage's peak includes its inner stages.
+    Only one CPU profile can be active per process, so an inner stage (or a
+    stage running concurrently on another thread) records memory only.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}
+        self.open_stages = []
+        self.cpu_lock = threading.Lock()
+        # The profiler's own frames are left out of the report
+        self.exclude = {tracemalloc.__file__, __file__, pstats.__file__, cProfile.__file__, contextlib.__file__}
+
+    def start(self):
+        tracemalloc.start(PROFILE_FRAMES)
+        self.enabled = True
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        stats = self.stages.setdefault(name, {
+            'calls': 0, 'time': 0.0, 'peak': 0, 'growth': 0,
+            'sizes': Counter(), 'blocks': Counter(), 'cpu': None
+        })
+        before = tracemalloc.take_snapshot()
+        # Measure from here so the snapshot itself is part of the baseline
+        current, peak = tracemalloc.get_traced_memory()
+        for open_name in self.open_stages:
+            self.stages[open_name]['peak'] = max(self.stages[open_name]['peak'], peak)
+        tracemalloc.reset_peak()
+        cpu = cProfile.Profile() if self.cpu_lock.acquire(blocking=False) else None
+        self.open_stages.append(name)
+        started = time.monotonic()
+        if cpu:
+            cpu.enable()
+        try:
+            yield
+        finally:
+            if cpu:
+                cpu.disable()
+                self.cpu_lock.release()
+            elapsed = time.monotonic() - started
+            _, peak = tracemalloc.get_traced_memory()
+            self.open_stages.remove(name)
+            for open_name in self.open_stages:
+                self.stages[open_name]['peak'] = max(self.stages[open_name]['peak'], peak)
+            after = tracemalloc.take_snapshot()
+            stats['calls'] += 1
+            stats['time'] += elapsed
+            stats['peak'] = max(stats['peak'], peak)
+            stats['growth'] = max(stats['growth'], peak - current)
+            for diff in after.compare_to(before, 'lineno'):
+                if diff.size_diff > 0 and diff.traceback[0].filename not in self.exclude:
+                    stats['sizes'][str(diff.traceback[0])] += diff.size_diff
+                    stats['blocks'][str(diff.traceback[0])] += diff.count_diff
+            if cpu:
+                if stats['cpu'] is None:
+                    stats['cpu'] = pstats.Stats(cpu)
+                else:
+                    stats['cpu'].add(cpu)
+
+    def report(self, top=None):
+        top = top or PROFILE_TOP
+        lines = ["Profile report: per-stage peak memory (tracemalloc) and CPU time (cProfile)", "", "Stages by peak memory growth:"]
+        for name, stats in sorted(self.stages.items(), key=lambda item: item[1]['growth'], reverse=True):
+            lines.append(
+                f"  {name}: {stats['calls']} call{'s' if stats['calls'] != 1 else ''}, {stats['time']:.3f}s, "
+                f"peak +{_size(stats['growth'])} above stage start (traced peak {_size(stats['peak'])})"
+            )
+
+        sites = [(size, site, name, self.stages[name]['blocks'][site])
+                 for name, stats in self.stages.items() for site, size in stats['sizes'].items()]
+        lines += ["", "Top allocation sites (memory still held at stage exit):"]
+        for rank, (size, site, name, blocks) in enumerate(sorted(sites, reverse=True)[:top], 1):
+            lines.append(f"  {rank:>2}. {_short_path(site)}  +{_size(size)} in {blocks} blocks  [{name}]")
+
+        functions = []
+        for name, stats in self.stages.items():
+            if stats['cpu'] is None:
+                continue
+            for (filename, line, func), (_, calls, own, cumulative, _) in stats['cpu'].stats.items():
+                if filename in self.exclude:
+                    continue
+                functions.append((own, cumulative, calls, f"{_short_path(filename)}:{line}({func})", name))
+        lines += ["", "Hot functions (by own CPU time):"]
+        for rank, (own, cumulative, calls, func, name) in enumerate(sorted(functions, reverse=True)[:top], 1):
+            lines.append(f"  {rank:>2}. {func}  {own:.3f}s own, {cumulative:.3f}s cumulative, {calls} calls  [{name}]")
+        return lines
+
+    def finish(self, report_path=None):
+        """Stop tracing, print the report and write it to ``report_path`` (PROFILE_REPORT)."""
+        report_path = report_path or PROFILE_REPORT
+        lines = self.report()
+        tracemalloc.stop()
+        self.enabled = False
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        print("\n".join(lines))
+        print(f"Profile report written to {report_path}")
+        return lines
+
+profiler = Profiler()
+
+def profiled(stage):
+    """Decorator: run the function inside ``profiler.stage(stage)`` when profiling is on."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def run_with_profiling(run, argv=None, description=None):
+    """Parse a script's command line (``--profile``) and call ``run()``, profiled if requested."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--profile', action='store_true',
+                        help=f"Report per-stage peak memory, top allocation sites and hot functions (written to {PROFILE_REPORT})")
+    args = parser.parse_args(argv)
+    if not args.profile:
+        return run()
+    profiler.start()
+    try:
+        return run()
+    finally:
+        profiler.finish()
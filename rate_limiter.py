@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# Host-wide token buckets shared by every pipeline process. Bucket state lives
+# in small flock-protected files, one per service endpoint and credential,
+# so concurrent scripts draw from one budget instead of each assuming the
+# whole quota. Buckets refill at RATE_LIMIT_HEADROOM of the limit so the
+# combined rate stays just under it.
+RATE_LIMITS_ENABLED = os.getenv('RATE_LIMITS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RATE_LIMIT_DIR = os.getenv('RATE_LIMIT_DIR', os.path.join(tempfile.gettempdir(), 'pipeline-rate-limits'))
+RATE_LIMIT_HEADROOM = float(os.getenv('RATE_LIMIT_HEADROOM', '0.9'))
+# Burst capacity, in seconds of refill
+RATE_LIMIT_BURST_SECONDS = float(os.getenv('RATE_LIMIT_BURST_SECONDS', '5'))
+# Service limits per minute and per credential; 0 means unlimited. Groq limits apply per model.
+RATE_LIMIT_GROQ_RPM = float(os.getenv('RATE_LIMIT_GROQ_RPM', '30'))
+RATE_LIMIT_GROQ_TPM = float(os.getenv('RATE_LIMIT_GROQ_TPM', '6000'))
+RATE_LIMIT_JIRA_RPM = float(os.getenv('RATE_LIMIT_JIRA_RPM', '100'))
+RATE_LIMIT_GITHUB_RPM = float(os.getenv('RATE_LIMIT_GITHUB_RPM', '80'))
+
+SERVICE_LIMITS = {
+    'groq': {'requests': RATE_LIMIT_GROQ_RPM, 'tokens': RATE_LIMIT_GROQ_TPM},
+    'jira': {'requests': RATE_LIMIT_JIRA_RPM},
+    'github': {'requests': RATE_LIMIT_GITHUB_RPM}
+}
+# Environment variables identifying the credential a service's quota belongs to
+SERVICE_CREDENTIALS = {
+    'groq': ('GROQ_API_KEY',),
+    'jira': ('JIRA_SERVER', 'JIRA_URL', 'JIRA_EMAIL'),
+    'github': ('GITHUB_TOKEN',)
+}
+
+# flock only excludes other processes' file handles; threads also share this lock
+_thread_lock = threading.Lock()
+
+def credential_id(service):
+    """Short hash of the credential in use, so budgets are per credential without storing secrets."""
+    values = [os.getenv(name) or '' for name in SERVICE_CREDENTIALS.get(service, ())]
+    return hashlib.sha256("\0".join(values).encode('utf-8')).hexdigest()[:12]
+
+def bucket_path(endpoint_name):
+    service = endpoint_name.split(':', 1)[0]
+    name = re.sub(r'[^A-Za-z0-9._-]+', '_', endpoint_name)
+    return os.path.join(RATE_LIMIT_DIR, f"{name}-{credential_id(service)}.json")
+
+@contextmanager
+def _locked_state(path):
+    """Read-modify-write a bucket file under an exclusive lock."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _thread_lock:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+', encoding='utf-8') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                try:
+                    state = json.loads(f.read() or '{}')
+                except json.JSONDecodeError:
+                    state = {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+def _limits(endpoint_name):
+    """(bucket, refill per second, capacity) for each limit configured for an endpoint."""
+    limits = SERVICE_LIMITS.get(endpoint_name.split(':', 1)[0], {})
+    result = []
+    for bucket, per_minute in limits.items():
+        if per_minute > 0:
+            rate = per_minute * RATE_LIMIT_HEADROOM / 60.0
+            result.append((bucket, rate, max(1.0, rate * RATE_LIMIT_BURST_SECONDS)))
+    return result
+
+def _refill(state, bucket, rate, capacity, now):
+    entry = state.setdefault(bucket, {'level': capacity, 'updated': now})
+    entry['level'] = min(capacity, entry['level'] + max(0.0, now - entry['updated']) * rate)
+    entry['updated'] = now
+    return entry
+
+def acquire(endpoint_name, tokens=0, max_wait=None):
+    """Block until the endpoint's shared budget allows one request costing ``tokens`` LLM tokens.
+
+    Returns False, without consuming anything, if that would take longer than
+    ``max_wait`` seconds. A cost larger than the bucket is admitted once the
+    bucket is full and leaves it in debt, which later callers wait out.
+    """
+    limits = _limits(endpoint_name)
+    if not RATE_LIMITS_ENABLED or not limits:
+        return True
+    costs = {'requests': 1, 'tokens': tokens}
+    path = bucket_path(endpoint_name)
+    waited = 0.0
+    while True:
+        with _locked_state(path) as state:
+            now = time.time()
+            wait = 0.0
+            for bucket, rate, capacity in limits:
+                entry = _refill(state, bucket, rate, capacity, now)
+                needed = min(costs[bucket], capacity)
+                if entry['level'] < needed:
+                    wait = max(wait, (needed - entry['level']) / rate)
+            if wait == 0.0:
+                for bucket, rate, capacity in limits:
+                    state[bucket]['level'] -= costs[bucket]
+                return True
+        if max_wait is not None and waited + wait > max_wait:
+            return False
+        if waited == 0.0:
+            logging.info(f"Rate limit: waiting {wait:.1f}s for {endpoint_name}")
+        # Jitter keeps waiting processes from waking in lockstep
+        delay = wait + random.uniform(0, 0.05)
+        time.sleep(delay)
+        waited += delay
+
+def penalize(endpoint_name, seconds):
+    """After a 429, hold every process's next request to this endpoint back for ``seconds``."""
+    limits = [limit for limit in _limits(endpoint_name) if limit[0] == 'requests']
+    if not RATE_LIMITS_ENABLED or not limits or seconds <= 0:
+        return
+    _, rate, capacity = limits[0]
+    with _locked_state(bucket_path(endpoint_name)) as state:
+        entry = _refill(state, 'requests', rate, capacity, time.time())
+        entry['level'] = min(entry['level'], 1.0 - rate * seconds)
+
+def settle_tokens(endpoint_name, actual_tokens, charged_tokens):
+    """Correct an up-front token charge once the response reports actual usage."""
+    limits = [limit for limit in _limits(endpoint_name) if limit[0] == 'tokens']
+    if not RATE_LIMITS_ENABLED or not limits or actual_tokens is None:
+        return
+    _, rate, capacity = limits[0]
+    with _locked_state(bucket_path(endpoint_name)) as state:
+        entry = _refill(state, 'tokens', rate, capacity, time.time())
+        entry['level'] = min(capacity, entry['level'] - (actual_tokens - charged_tokens))
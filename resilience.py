@@ -0,0 +1,229 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from email.utils import parsedate_to_datetime
+
+import rate_limiter
+
+# One retry/backoff/circuit-breaker policy for every outbound call (Groq, Jira, GitHub).
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', '1'))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '30'))
+CALL_DEADLINE_SECONDS = float(os.getenv('CALL_DEADLINE_SECONDS', '180'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+HEDGE_LLM_REQUESTS = os.getenv('HEDGE_LLM_REQUESTS', 'false').lower() in ('1', 'true', 'yes')
+HEDGE_DEFAULT_DELAY = float(os.getenv('HEDGE_DEFAULT_DELAY', '10'))
+HEDGE_MIN_SAMPLES = 5
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# Statuses that mean the request was not processed, so even non-idempotent calls may retry.
+NOT_PROCESSED_STATUS = {429, 503}
+
+class CircuitOpenError(Exception):
+    """Raised without calling out when an endpoint's circuit breaker is open."""
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call (including its retries) runs past its deadline."""
+
+def error_status(exc):
+    """Best-effort HTTP status of an exception from requests, httpx, groq, jira or PyGithub."""
+    for attr in ('status_code', 'status'):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, 'response', None)
+    value = getattr(response, 'status_code', None)
+    return value if isinstance(value, int) else None
+
+def retry_after_seconds(exc):
+    """Seconds requested by a Retry-After header on the error's response, if any."""
+    headers = getattr(exc, 'headers', None)
+    if not headers:
+        headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def is_transient(exc):
+    """Network failures and throttling/server statuses are worth retrying; other errors are not."""
+    if isinstance(exc, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    status = error_status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return any('Timeout' in cls.__name__ or 'Connection' in cls.__name__ for cls in type(exc).__mro__)
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given zero-based attempt."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+class Endpoint:
+    """Circuit breaker and latency history for one outbound endpoint."""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.latencies = deque(maxlen=200)
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < CIRCUIT_RESET_SECONDS or self.trial_in_flight:
+                raise CircuitOpenError(f"Circuit open for {self.name}")
+            # Half-open: let a single trial request through.
+            self.trial_in_flight = True
+
+    def record_success(self, latency):
+        with self.lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+            self.latencies.append(latency)
+
+    def record_failure(self, exc):
+        with self.lock:
+            self.trial_in_flight = False
+            if not is_transient(exc):
+                # The endpoint answered (e.g. 404/422), so it is healthy.
+                self.consecutive_failures = 0
+                self.opened_at = None
+                return
+            self.consecutive_failures += 1
+            if self.opened_at is not None or self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+                if self.opened_at is None:
+                    logging.warning(f"Opening circuit for {self.name} after {self.consecutive_failures} consecutive failures")
+                self.opened_at = time.monotonic()
+
+    def hedge_delay(self):
+        """p95 of recent successful latencies, or the configured default until enough samples exist."""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge')
+
+def get_endpoint(name):
+    with _endpoints_lock:
+        if name not in _endpoints:
+            _endpoints[name] = Endpoint(name)
+        return _endpoints[name]
+
+def _timed_call(endpoint, func):
+    endpoint.before_call()
+    started = time.monotonic()
+    try:
+        result = func()
+    except Exception as e:
+        endpoint.record_failure(e)
+        raise
+    endpoint.record_success(time.monotonic() - started)
+    return result
+
+def _hedged_call(endpoint, func, deadline_at, tokens=0):
+    """Run func; if it is slower than the endpoint's p95, race a second identical request.
+
+    Gives up with DeadlineExceeded at ``deadline_at`` (a time.monotonic() value).
+    """
+    futures = {_hedge_pool.submit(_timed_call, endpoint, func)}
+    done, _ = wait(futures, timeout=max(0.0, min(endpoint.hedge_delay(), deadline_at - time.monotonic())))
+    # A hedge is only sent if the shared rate budget allows it right away
+    if not done and rate_limiter.acquire(endpoint.name, tokens, max_wait=0):
+        logging.info(f"Hedging slow request to {endpoint.name}")
+        try:
+            futures.add(_hedge_pool.submit(_timed_call, endpoint, func))
+        except RuntimeError:
+            pass
+    last_error = None
+    pending = futures
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, deadline_at - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded(f"{endpoint.name} call exceeded its deadline")
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            last_error = future.exception()
+    raise last_error
+
+_session = None
+_session_lock = threading.Lock()
+
+def http_session():
+    """Process-wide requests.Session, so repeated calls reuse pooled keep-alive connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            _session = requests.Session()
+        return _session
+
+def resilient_call(endpoint_name, func, max_attempts=None, deadline=None, idempotent=True, hedge=False, tokens=0):
+    """Call ``func()`` with jittered retries, Retry-After handling, a circuit breaker and a deadline.
+
+    Non-idempotent calls (ticket/comment/file creation) are only retried on
+    statuses that guarantee the request was not processed. ``hedge`` sends a
+    second request when the first is slower than the endpoint's p95 latency;
+    use it only for idempotent calls such as LLM completions. Every attempt
+    first draws from the host-wide rate budget (see rate_limiter); ``tokens``
+    is the LLM token cost charged up front.
+
+    The deadline bounds rate-limit waits, retries and hedged calls. A plain
+    call is not interrupted while ``func()`` blocks: the deadline is checked
+    between attempts, so ``func`` should bound itself with its own request
+    timeout.
+    """
+    endpoint = get_endpoint(endpoint_name)
+    max_attempts = max_attempts or RETRY_MAX_ATTEMPTS
+    deadline_at = time.monotonic() + (deadline or CALL_DEADLINE_SECONDS)
+    for attempt in range(max_attempts):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{endpoint_name} call exceeded its deadline")
+        if not rate_limiter.acquire(endpoint_name, tokens, max_wait=remaining):
+            raise DeadlineExceeded(f"{endpoint_name} call would exceed its deadline waiting for the rate limit")
+        try:
+            if hedge and idempotent:
+                return _hedged_call(endpoint, func, deadline_at, tokens)
+            return _timed_call(endpoint, func)
+        except Exception as e:
+            status = error_status(e)
+            retryable = is_transient(e) if idempotent else status in NOT_PROCESSED_STATUS
+            if not retryable or attempt == max_attempts - 1:
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            if status == 429:
+                # Throttled: make every process sharing this budget wait, not just this one
+                rate_limiter.penalize(endpoint_name, delay)
+            if time.monotonic() + delay >= deadline_at:
+                raise
+            logging.warning(
+                f"{endpoint_name} attempt {attempt + 1}/{max_attempts} failed "
+                f"({status or type(e).__name__}): retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
@@ -0,0 +1,245 @@
+import os
+import re
+import json
+import logging
+import tempfile
+
+from model_router import estimate_tokens, choose_model, ROUTER_STATS_FILE
+from git_publisher import PUBLISH_BACKEND, GIT_PUBLISH_REMOTE
+from text_normalizer import normalize_text, NORMALIZE_TEXT
+from task_parser import to_tasks
+from batch_jobs import BATCH_COMPLETION_WINDOW
+from local_extractor import extract_sections, format_confidence, LOCAL_EXTRACTION, LOCAL_EXTRACTION_MIN_CONFIDENCE
+from rate_limiter import RATE_LIMIT_GROQ_RPM, RATE_LIMIT_GROQ_TPM, RATE_LIMIT_JIRA_RPM, RATE_LIMIT_GITHUB_RPM, RATE_LIMIT_HEADROOM
+
+# Dry-run planning: count the Jira, GitHub and Groq calls a run would make and
+# estimate tokens and wall time, without contacting any of the services.
+# Latencies and completion sizes come from model usage history when present.
+PLAN_GROQ_LATENCY = float(os.getenv('PLAN_GROQ_LATENCY', '6'))
+PLAN_JIRA_LATENCY = float(os.getenv('PLAN_JIRA_LATENCY', '0.8'))
+PLAN_GITHUB_LATENCY = float(os.getenv('PLAN_GITHUB_LATENCY', '0.6'))
+PLAN_EXTRACT_COMPLETION_TOKENS = int(os.getenv('PLAN_EXTRACT_COMPLETION_TOKENS', '2500'))
+PLAN_TESTCASE_COMPLETION_TOKENS = int(os.getenv('PLAN_TESTCASE_COMPLETION_TOKENS', '800'))
+
+PROJECT_FILE_COUNT = 4  # main_task1.py, main_task2.py, main_task3.py, requirements.txt
+JIRA_VALIDATION_CALLS = 3  # connect, project, issue types
+
+def load_history(path=None):
+    """Mean latency and completion tokens per stage from the model usage log."""
+    path = path or ROUTER_STATS_FILE
+    totals = {}
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            stage = totals.setdefault(entry.get('stage'), {'latency': [], 'completion_tokens': []})
+            stage['latency'].append(entry.get('latency') or 0.0)
+            if entry.get('completion_tokens'):
+                stage['completion_tokens'].append(entry['completion_tokens'])
+    return {
+        name: {key: sum(values) / len(values) for key, values in stage.items() if values}
+        for name, stage in totals.items()
+    }
+
+def placeholder_tasks(parsed_tasks, key_prefix='PLAN'):
+    """Give parsed tasks sequential placeholder keys in the organize_tasks shape."""
+    tasks = {}
+    number = 0
+    for task in parsed_tasks:
+        number += 1
+        task_key = f"{key_prefix}-{number}"
+        subtasks = {}
+        for subtask in task['subtasks']:
+            number += 1
+            subtasks[f"{key_prefix}-{number}"] = {
+                'summary': re.sub(r'Subtask \d+\.\d+:', '', subtask['title']).strip(),
+                'description': subtask['description'],
+                'acceptance_criteria': subtask['acceptance_criteria']
+            }
+        tasks[task_key] = {
+            'summary': task['title'],
+            'description': task['description'],
+            'acceptance_criteria': task['acceptance_criteria'],
+            'subtasks': subtasks
+        }
+    return tasks
+
+def github_calls(stage, task_count, backend):
+    """Upper bound on GitHub calls for a stage with the given publish backend."""
+    if backend == 'git':
+        if stage == 'repo':
+            return (0 if GIT_PUBLISH_REMOTE else 1) + 2  # create repo, fetch, push
+        return 2  # fetch, push
+    if stage == 'repo':
+        # create (or get) repo; get + write per main file; per branch: check, base, create ref, get + write README
+        return 2 + (PROJECT_FILE_COUNT + 1) * 2 + task_count * 5
+    return 1 + task_count * 3  # get repo; per task: check branch, get + write file
+
+def service_time(calls, latency, concurrency, rpm=0, tokens=0, tpm=0):
+    """Seconds for a batch of calls: latency-bound at the given concurrency, but no faster than the limits allow.
+
+    The shared rate limiter paces calls at RATE_LIMIT_HEADROOM of each limit.
+    """
+    bounds = [calls * latency / max(1, concurrency)]
+    if rpm:
+        bounds.append(calls / (rpm * RATE_LIMIT_HEADROOM) * 60)
+    if tpm:
+        bounds.append(tokens / (tpm * RATE_LIMIT_HEADROOM) * 60)
+    return max(bounds)
+
+def plan_run(document=None, task_file=None, ticket_file=None, backend=None, workers=None, similarity_threshold=None):
+    """Estimate a run without calling Jira, GitHub or Groq.
+
+    The starting point decides which stages are counted: a document runs
+    text extraction locally and counts every stage; a task file skips the
+    Groq extraction call; a ticket file counts only the repository and
+    test-case stages. Returns a dict (see format_plan); raises
+    FileNotFoundError when neither the document nor the task file exists.
+    """
+    import main_task1
+    import main_task3
+    from orchestrator import ORCHESTRATOR_WORKERS
+    backend = backend or PUBLISH_BACKEND
+    workers = workers or ORCHESTRATOR_WORKERS
+    if similarity_threshold is None:
+        similarity_threshold = main_task3.DUPLICATE_TASK_THRESHOLD
+    history = load_history()
+    stages = ['repo', 'testcases']
+    groq_calls = []  # (stage, model, prompt tokens, completion tokens)
+    source = None
+
+    if ticket_file is not None:
+        tasks = main_task3.organize_tasks(main_task3.read_ticket_keys(ticket_file))
+        source = f"tickets ({ticket_file or 'default ticket file'})"
+    else:
+        stages = ['tickets'] + stages
+        parsed = None
+        if document is not None:
+            if not os.path.isfile(document):
+                raise FileNotFoundError(f"Document not found: {document}")
+            stages = ['extract'] + stages
+            with tempfile.TemporaryDirectory() as tmp:
+                text = main_task1.read_txt_file(main_task1.extract_text_to_txt(document, os.path.join(tmp, 'extracted.txt'), quiet=True))
+            if NORMALIZE_TEXT:
+                text, _ = normalize_text(text)
+            source = f"document {document}"
+            sections, confidence, details = extract_sections(text)
+            if LOCAL_EXTRACTION and confidence >= LOCAL_EXTRACTION_MIN_CONFIDENCE:
+                # The real run extracts these tasks locally, without a Groq call
+                parsed = to_tasks(sections)
+                source += f" (tasks extracted locally, {format_confidence(confidence, details)})"
+            else:
+                prompt = main_task1.generate_prompt(text)
+                completion = history.get('extract', {}).get('completion_tokens', PLAN_EXTRACT_COMPLETION_TOKENS)
+                if task_file and os.path.exists(task_file):
+                    completion = estimate_tokens(main_task1.read_txt_file(task_file))
+                groq_calls.append(('extract', choose_model(prompt, main_task1.MODEL, payload=text), estimate_tokens(prompt), completion))
+                if not (task_file and os.path.exists(task_file)):
+                    parsed = to_tasks(sections)
+                    source += " (tasks estimated from headings)"
+        if parsed is None:
+            if not (task_file and os.path.isfile(task_file)):
+                raise FileNotFoundError(f"Task file not found: {task_file}; pass a document or --tasks")
+            parsed = main_task1.parse_tasks_from_file(task_file)
+            source = (source + ", " if source else "") + f"task file {task_file}"
+        tasks = placeholder_tasks(parsed, main_task1.JIRA_PROJECT_KEY or 'PLAN')
+
+    task_count = len(tasks)
+    subtask_count = sum(len(task['subtasks']) for task in tasks.values())
+    prompts = main_task3.plan_test_case_prompts(tasks, similarity_threshold)
+    batched = bool(main_task3.TEST_CASE_BATCH_MIN_PROMPTS) and len(prompts) >= main_task3.TEST_CASE_BATCH_MIN_PROMPTS
+    completion = min(main_task3.TEST_CASE_MAX_TOKENS,
+                     history.get('testcases', {}).get('completion_tokens', PLAN_TESTCASE_COMPLETION_TOKENS))
+    for task_key, prompt in prompts:
+        groq_calls.append(('testcases', choose_model(prompt, main_task3.MODEL), estimate_tokens(prompt), completion))
+
+    jira = {}
+    if 'tickets' in stages:
+        jira['validation'] = JIRA_VALIDATION_CALLS
+        jira['tickets'] = task_count + subtask_count
+    jira['comments'] = task_count
+    github = {stage: github_calls(stage, task_count, backend) for stage in ('repo', 'testcases')}
+
+    groq_latency = {stage: history.get(stage, {}).get('latency', PLAN_GROQ_LATENCY) for stage in ('extract', 'testcases')}
+    groq_tokens = sum(p + c for _, _, p, c in groq_calls)
+    concurrency = max(1, min(workers, task_count))
+    extract_time = sum(groq_latency['extract'] for stage, *_ in groq_calls if stage == 'extract')
+    # Batched test cases complete asynchronously within the batch window, outside the synchronous rate limits
+    testcase_calls = [call for call in groq_calls if call[0] == 'testcases' and not batched]
+    testcase_tokens = sum(p + c for _, _, p, c in testcase_calls)
+
+    def per_service(workers):
+        return {
+            'groq': service_time(len(testcase_calls), groq_latency['testcases'], workers,
+                                 RATE_LIMIT_GROQ_RPM, testcase_tokens, RATE_LIMIT_GROQ_TPM),
+            'jira': service_time(sum(jira.values()), PLAN_JIRA_LATENCY, workers, RATE_LIMIT_JIRA_RPM),
+            'github': service_time(sum(github.values()), PLAN_GITHUB_LATENCY, workers, RATE_LIMIT_GITHUB_RPM)
+        }
+
+    sequential = per_service(1)
+    concurrent = per_service(concurrency)
+    bottleneck = max(concurrent, key=concurrent.get)
+    return {
+        'source': source,
+        'stages': stages,
+        'backend': backend,
+        'tasks': task_count,
+        'subtasks': subtask_count,
+        'reused_test_cases': task_count - len(prompts),
+        'batched_test_cases': len(prompts) if batched else 0,
+        'groq': {
+            'calls': len(groq_calls),
+            'by_stage': {stage: sum(1 for call in groq_calls if call[0] == stage) for stage in ('extract', 'testcases')},
+            'by_model': {model: sum(1 for call in groq_calls if call[1] == model) for model in sorted({call[1] for call in groq_calls})},
+            'prompt_tokens': sum(p for _, _, p, _ in groq_calls),
+            'completion_tokens': sum(c for _, _, _, c in groq_calls),
+            'tokens': groq_tokens
+        },
+        'jira': {'calls': sum(jira.values()), 'by_stage': jira},
+        'github': {'calls': sum(github.values()), 'by_stage': github},
+        'wall_time': {
+            'sequential': extract_time + sum(sequential.values()),
+            'concurrent': extract_time + max(concurrent.values()),
+            'workers': concurrency,
+            'bottleneck': bottleneck
+        }
+    }
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+def format_plan(plan):
+    groq, jira, github, wall = plan['groq'], plan['jira'], plan['github'], plan['wall_time']
+    lines = [
+        "Dry run: no Jira, GitHub or Groq calls were made",
+        f"Source: {plan['source']}",
+        f"Stages: {', '.join(plan['stages'])}",
+        f"Tasks: {plan['tasks']} ({plan['subtasks']} subtasks), {plan['reused_test_cases']} expected to reuse near-duplicate test cases",
+        f"Groq: {groq['calls']} calls ({', '.join(f'{n} {s}' for s, n in groq['by_stage'].items() if n)}); "
+        + ", ".join(f"{model} x{n}" for model, n in groq['by_model'].items()),
+        f"  Tokens: ~{groq['prompt_tokens']} prompt + ~{groq['completion_tokens']} completion = ~{groq['tokens']}",
+    ]
+    if plan['batched_test_cases']:
+        lines.append(f"  Test cases: {plan['batched_test_cases']} prompts go to the batch API (completes within {BATCH_COMPLETION_WINDOW}, not counted in wall time)")
+    lines += [
+        f"Jira: up to {jira['calls']} calls ({', '.join(f'{n} {s}' for s, n in jira['by_stage'].items())})",
+        f"GitHub ({plan['backend']} backend): up to {github['calls']} calls ({', '.join(f'{n} {s}' for s, n in github['by_stage'].items())})",
+        f"Estimated wall time: ~{_duration(wall['sequential'])} running the scripts in sequence, "
+        f"~{_duration(wall['concurrent'])} with the orchestrator ({wall['workers']} concurrent calls)",
+        f"Bottleneck: {wall['bottleneck']} (limits: Groq {RATE_LIMIT_GROQ_RPM:g} req/min, {RATE_LIMIT_GROQ_TPM:g} tokens/min; "
+        f"Jira {RATE_LIMIT_JIRA_RPM:g} req/min; GitHub {RATE_LIMIT_GITHUB_RPM:g} req/min)"
+    ]
+    return lines
+
+def print_plan(plan, as_json=False):
+    if as_json:
+        print(json.dumps(plan, indent=2))
+        return
+    for line in format_plan(plan):
+        logging.info(line)
+        print(line)
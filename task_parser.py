@@ -0,0 +1,215 @@
+import re
+
+from log_setup import get_stage_logger
+
+# Tolerant reader for the model's task breakdown. The prompt asks for
+# "Task N: title", "Subtask N.M: title", "Description: ..." and "- " criteria,
+# but responses drift: Markdown headings and bold labels, other separators,
+# numbered criteria, descriptions wrapped over several lines. Sections keep
+# their numbers so gaps (skipped numbers, empty fields) can be re-asked.
+parse_logger = get_stage_logger('parse')
+
+DECORATION = re.compile(r'\*\*|__')
+LEADING = re.compile(r'^[#>\s]+')
+SEPARATOR = r'\s*[:.)\-–—]\s*'
+TASK = re.compile(r'^Task\s+(\d+)' + SEPARATOR + r'(.*)$', re.IGNORECASE)
+# "Task 2.1:" is a subtask too, so subtasks are matched first
+SUBTASK = re.compile(r'^(?:Sub-?task|Task)\s+(\d+)\.(\d+)' + SEPARATOR + r'(.*)$', re.IGNORECASE)
+DESCRIPTION = re.compile(r'^Description\s*[:\-–—]\s*(.*)$', re.IGNORECASE)
+CRITERIA = re.compile(r'^Acceptance\s+Criteria\s*:?\s*(.*)$', re.IGNORECASE)
+BULLET = re.compile(r'^[-*+•]\s+(.*)$')
+# Numbered lines are criteria only after an Acceptance Criteria label; in a description they are steps
+NUMBERED = re.compile(r'^\d+[.)]\s+(.*)$')
+
+def _clean(line):
+    return LEADING.sub('', DECORATION.sub('', line)).strip()
+
+def _section(number, title):
+    return {'number': number, 'title': title.strip(), 'description': '', 'acceptance_criteria': []}
+
+def parse_sections(text, keep_parents=False):
+    """Numbered task sections from extraction output.
+
+    Returns a list of task dicts with ``number`` and ``subtasks`` (each subtask
+    a dict with a ``"N.M"`` ``number``). A subtask numbered for another task is
+    moved under the current one, unless ``keep_parents`` is set (re-ask
+    replies); subtasks without their task get a placeholder parent with an
+    empty title.
+    """
+    tasks = []
+    task = None
+    target = None
+    placeholder = False
+    # Where a plain line goes: 'description', 'criteria', or None once a section is closed
+    field = None
+    # Whether the current section has had an Acceptance Criteria label
+    labelled = False
+    for raw in text.split('\n'):
+        line = _clean(raw)
+        if not line:
+            # A blank line ends the criteria list; descriptions may have paragraphs
+            if field == 'criteria' and target and target['acceptance_criteria']:
+                field = None
+            continue
+
+        match = SUBTASK.match(line)
+        if match:
+            parent, minor = int(match.group(1)), match.group(2)
+            if task is None or ((placeholder or keep_parents) and parent != task['number']):
+                task = _section(parent, '')
+                task['subtasks'] = []
+                tasks.append(task)
+                placeholder = True
+            elif parent != task['number']:
+                parse_logger.warning("Subtask %s.%s does not match parent task %s. Adjusting...", parent, minor, task['number'])
+            target = _section(f"{task['number']}.{minor}", match.group(3))
+            task['subtasks'].append(target)
+            field, labelled = 'description', False
+            parse_logger.debug("Parsed Subtask %s: %s under Task %s", target['number'], target['title'], task['number'])
+            continue
+
+        match = TASK.match(line)
+        if match:
+            task = _section(int(match.group(1)), match.group(2))
+            task['subtasks'] = []
+            tasks.append(task)
+            target, field = task, 'description'
+            labelled = placeholder = False
+            parse_logger.debug("Parsed Task %s: %s", task['number'], task['title'])
+            continue
+
+        if target is None:
+            # Preamble before the first task
+            continue
+
+        match = DESCRIPTION.match(line)
+        if match:
+            target['description'] = match.group(1).strip()
+            field = 'description'
+            continue
+
+        match = CRITERIA.match(line)
+        if match:
+            field, labelled = 'criteria', True
+            line = match.group(1).strip()
+            if not line:
+                continue
+
+        match = BULLET.match(line) or ((field == 'criteria' or (labelled and field != 'description')) and NUMBERED.match(line))
+        if match:
+            if match.group(1).strip():
+                target['acceptance_criteria'].append(match.group(1).strip())
+            field = 'criteria'
+        elif field == 'criteria':
+            # A wrapped criterion continues the previous bullet
+            if target['acceptance_criteria']:
+                target['acceptance_criteria'][-1] += ' ' + line
+            else:
+                target['acceptance_criteria'].append(line)
+        elif field == 'description':
+            target['description'] = (target['description'] + ' ' + line).strip()
+        else:
+            parse_logger.debug("Ignored line after %s: %s", target['number'], line)
+    return tasks
+
+def find_gaps(sections):
+    """Missing and incomplete sections, as ``(label, problems)`` pairs in document order.
+
+    Missing numbers are only detectable below the highest number seen.
+    """
+    gaps = []
+    seen = {task['number'] for task in sections}
+    for number in range(1, max(seen, default=0) + 1):
+        if number not in seen:
+            gaps.append((f"Task {number}", ['missing']))
+
+    def damage(section):
+        return [problem for problem, empty in (
+            ('no title', not section['title']),
+            ('no description', not section['description']),
+            ('no acceptance criteria', not section['acceptance_criteria'])
+        ) if empty]
+
+    for task in sections:
+        problems = damage(task)
+        if problems:
+            gaps.append((f"Task {task['number']}", problems))
+        minors = {int(subtask['number'].split('.')[1]) for subtask in task['subtasks']}
+        for minor in range(1, max(minors, default=0) + 1):
+            if minor not in minors:
+                gaps.append((f"Subtask {task['number']}.{minor}", ['missing']))
+        for subtask in task['subtasks']:
+            problems = damage(subtask)
+            if problems:
+                gaps.append((f"Subtask {subtask['number']}", problems))
+    return gaps
+
+def format_gaps(gaps):
+    return [f"{label}: {', '.join(problems)}" for label, problems in gaps]
+
+def _fill(section, replacement):
+    """Copy fields the replacement has into ones the section is missing."""
+    for key in ('title', 'description', 'acceptance_criteria'):
+        if not section[key] and replacement[key]:
+            section[key] = replacement[key]
+
+def _minor(subtask):
+    return int(subtask['number'].split('.')[1])
+
+def merge_sections(sections, replies):
+    """Merge re-asked sections into ``sections`` in place; existing content is kept."""
+    by_number = {task['number']: task for task in sections}
+    for reply in replies:
+        task = by_number.get(reply['number'])
+        if task is None:
+            if not reply['title']:
+                continue
+            task = by_number[reply['number']] = reply
+            sections.append(task)
+        else:
+            _fill(task, reply)
+            subtasks = {subtask['number']: subtask for subtask in task['subtasks']}
+            for subtask in reply['subtasks']:
+                if subtask['number'] in subtasks:
+                    _fill(subtasks[subtask['number']], subtask)
+                elif subtask['title']:
+                    task['subtasks'].append(subtask)
+        task['subtasks'].sort(key=_minor)
+    sections.sort(key=lambda task: task['number'])
+    return sections
+
+def to_tasks(sections):
+    """The task dicts the rest of the pipeline uses (no section numbers)."""
+    return [{
+        'title': task['title'],
+        'description': task['description'],
+        'acceptance_criteria': task['acceptance_criteria'],
+        'subtasks': [{
+            'title': subtask['title'],
+            'description': subtask['description'],
+            'acceptance_criteria': subtask['acceptance_criteria']
+        } for subtask in task['subtasks']]
+    } for task in sections]
+
+def format_sections(sections):
+    """Render sections in the canonical prompt format."""
+    blocks = []
+
+    def render(label, section):
+        lines = [f"{label} {section['number']}: {section['title']}", f"Description: {section['description']}", "Acceptance Criteria:"]
+        lines += [f"- {criterion}" for criterion in section['acceptance_criteria']]
+        blocks.append("\n".join(lines))
+
+    for task in sections:
+        render('Task', task)
+        for subtask in task['subtasks']:
+            render('Subtask', subtask)
+    return "\n\n".join(blocks)
+
+def format_outline(sections):
+    """Just the numbered titles, to give a re-ask the surrounding structure."""
+    lines = []
+    for task in sections:
+        lines.append(f"Task {task['number']}: {task['title']}")
+        lines += [f"  Subtask {subtask['number']}: {subtask['title']}" for subtask in task['subtasks']]
+    return "\n".join(lines)
@@ -0,0 +1,98 @@
+import re
+import hashlib
+import random
+
+# 64 hash permutations in 16 LSH bands of 4 rows: pairs with Jaccard similarity
+# around 0.5 and above become candidates, which are then verified exactly.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def task_text(task_info):
+    """Flatten summary, description and acceptance criteria (including subtasks), without keys."""
+    parts = [task_info.get('summary', ''), task_info.get('description', '')]
+    parts.extend(task_info.get('acceptance_criteria', []))
+    for subtask in task_info.get('subtasks', {}).values():
+        parts.extend([subtask.get('summary', ''), subtask.get('description', '')])
+        parts.extend(subtask.get('acceptance_criteria', []))
+    return "\n".join(parts)
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash(shingle_set):
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingle_set]
+    if not hashes:
+        return [0] * NUM_PERM
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class SimilarityIndex:
+    """MinHash/LSH index over task texts for finding near-duplicate tasks."""
+
+    def __init__(self):
+        self.shingles = {}
+        self.buckets = {}
+
+    def add(self, key, text):
+        shingle_set = shingles(text)
+        self.shingles[key] = shingle_set
+        signature = minhash(shingle_set)
+        for band in range(BANDS):
+            bucket = (band, tuple(signature[band * ROWS:(band + 1) * ROWS]))
+            self.buckets.setdefault(bucket, []).append(key)
+
+    def query(self, text, threshold, allowed=None):
+        """Return (key, similarity) of the most similar indexed entry at or above threshold, or None.
+
+        When ``allowed`` is given, only those keys are considered.
+        """
+        shingle_set = shingles(text)
+        signature = minhash(shingle_set)
+        candidates = set()
+        for band in range(BANDS):
+            candidates.update(self.buckets.get((band, tuple(signature[band * ROWS:(band + 1) * ROWS])), []))
+        best = None
+        for key in candidates:
+            if allowed is not None and key not in allowed:
+                continue
+            similarity = jaccard(shingle_set, self.shingles[key])
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+def rekey_test_case(content, source_key, source_info, target_key, target_info):
+    """Rewrite a test-case document generated for one task so it belongs to another.
+
+    Task and subtask keys are mapped (subtasks pairwise in order) in a single
+    pass, and the header summary/description are replaced with the target's.
+    """
+    key_map = {source_key: target_key}
+    key_map.update(zip(source_info['subtasks'].keys(), target_info['subtasks'].keys()))
+    pattern = re.compile(
+        r'(?<![A-Za-z0-9-])(' + "|".join(re.escape(k) for k in sorted(key_map, key=len, reverse=True)) + r')(?!\d)'
+    )
+    content = pattern.sub(lambda m: key_map[m.group(1)], content)
+
+    header = f"# Test Cases for {target_key}"
+    if content.startswith(header):
+        first_line, _, rest = content.partition("\n")
+        content = f"{header}: {target_info['summary']}\n{rest}"
+    if source_info['description']:
+        content = content.replace(
+            f"## Task Description\n{source_info['description']}\n",
+            f"## Task Description\n{target_info['description']}\n",
+            1
+        )
+    return content
@@ -0,0 +1,132 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import batch_jobs
+import main_task3
+import rate_limiter
+from batch_jobs import BatchClient, batch_line
+
+VALID = "## Test Steps\n1. Open {key}\n**Expected Result**: {key} works"
+
+class StandIn:
+    """Local stand-in for the /files and /batches endpoints.
+
+    ``failed`` custom_ids get an error response and ``invalid`` ones a body
+    without test steps; batches report in_progress on their first poll.
+    """
+
+    def __init__(self, failed=(), invalid=()):
+        self.failed, self.invalid = set(failed), set(invalid)
+        self.files, self.batches, self.polls = {}, {}, {}
+        self.created = 0
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, payload, raw=False):
+                data = payload.encode('utf-8') if raw else json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')
+                with stand_in.lock:
+                    if self.path == '/files':
+                        file_id = f"file-{len(stand_in.files) + 1}"
+                        stand_in.files[file_id] = [line for line in body.splitlines() if line.startswith('{"custom_id"')]
+                        return self.reply({'id': file_id})
+                    request = json.loads(body)
+                    stand_in.created += 1
+                    batch_id = f"batch-{stand_in.created}"
+                    stand_in.batches[batch_id] = request['input_file_id']
+                    stand_in.polls[batch_id] = 0
+                    return self.reply({'id': batch_id, 'status': 'validating'})
+
+            def do_GET(self):
+                with stand_in.lock:
+                    match = re.fullmatch(r'/files/(.+)/content', self.path)
+                    if match:
+                        return self.reply(stand_in.files[match.group(1)], raw=True)
+                    batch_id = self.path.rsplit('/', 1)[1]
+                    stand_in.polls[batch_id] += 1
+                    if stand_in.polls[batch_id] == 1:
+                        return self.reply({'id': batch_id, 'status': 'in_progress'})
+                    output_id = f"{batch_id}-output"
+                    stand_in.files[output_id] = stand_in.output(stand_in.files[stand_in.batches[batch_id]])
+                    return self.reply({'id': batch_id, 'status': 'completed', 'output_file_id': output_id,
+                                       'request_counts': {'total': len(stand_in.files[stand_in.batches[batch_id]])}})
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def output(self, lines):
+        results = []
+        for line in lines:
+            key = json.loads(line)['custom_id']
+            if key in self.failed:
+                results.append({'custom_id': key, 'response': {'status_code': 500, 'body': None}})
+                continue
+            content = "Not a test case" if key in self.invalid else VALID.format(key=key)
+            results.append({'custom_id': key, 'response': {
+                'status_code': 200, 'body': {'choices': [{'message': {'content': content}}]}
+            }})
+        return "\n".join(json.dumps(result) for result in results) + "\n"
+
+@pytest.fixture
+def stand_in(tmp_path, monkeypatch):
+    server = StandIn(failed={'PROJ-2'}, invalid={'PROJ-3'})
+    monkeypatch.setattr(batch_jobs, 'GROQ_BATCH_BASE_URL', server.url)
+    monkeypatch.setattr(batch_jobs, 'BATCH_STATE_FILE', str(tmp_path / 'batch_jobs.json'))
+    monkeypatch.setattr(batch_jobs, 'BATCH_POLL_SECONDS', 0)
+    monkeypatch.setattr(rate_limiter, 'RATE_LIMITS_ENABLED', False)
+    yield server
+    server.server.shutdown()
+
+def task(summary):
+    return {'summary': summary, 'description': f"{summary} for users", 'acceptance_criteria': [f"{summary} succeeds"], 'subtasks': {}}
+
+def test_batch_results_map_to_tasks_and_failures_fall_back(stand_in, monkeypatch):
+    interactive = []
+    monkeypatch.setattr(main_task3, 'GROQ_API_KEY', 'test-key')
+    monkeypatch.setattr(main_task3, 'TEST_CASE_BATCH_MIN_PROMPTS', 1)
+    monkeypatch.setattr(main_task3, 'call_groq_api', lambda prompt: interactive.append(prompt) or VALID.format(key='interactive'))
+    tasks = {'PROJ-1': task('Login page'), 'PROJ-2': task('Password reset'), 'PROJ-3': task('Audit log')}
+
+    test_cases = main_task3.generate_test_cases(tasks, similarity_threshold=2)
+
+    assert 'Open PROJ-1' in test_cases['PROJ-1']
+    assert 'Open interactive' in test_cases['PROJ-2'] and 'Open interactive' in test_cases['PROJ-3']
+    assert len(interactive) == 2
+    assert all(test_cases[key].startswith(f"# Test Cases for {key}") for key in tasks)
+
+def test_rerun_resumes_submitted_batch(stand_in):
+    lines = [batch_line(key, {'model': 'm', 'messages': []}) for key in ('PROJ-1', 'PROJ-4')]
+    # An interrupted run got as far as submitting
+    batch_id = BatchClient('test-key').submit(lines, 'testcases')
+
+    results = BatchClient('test-key').run([('testcases', lines)])
+
+    assert stand_in.created == 1
+    assert set(results) == {'PROJ-1', 'PROJ-4'}
+    with open(batch_jobs.BATCH_STATE_FILE, encoding='utf-8') as f:
+        assert batch_id not in f.read()
+
+def test_concurrent_submits_share_one_batch(stand_in):
+    lines = [batch_line('PROJ-1', {'model': 'm', 'messages': []})]
+    ids = []
+    threads = [threading.Thread(target=lambda: ids.append(BatchClient('test-key').submit(lines))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stand_in.created == 1 and len(set(ids)) == 1
@@ -0,0 +1,55 @@
+import subprocess
+
+from git_publisher import GitPublisher
+from github_sync import new_write_summary
+
+TICKETS = [
+    {'key': 'PROJ-1', 'summary': 'Login page'},
+    {'key': 'PROJ-2', 'summary': 'Login form', 'parent_key': 'PROJ-1'},
+    {'key': 'PROJ-3', 'summary': 'Audit log'},
+]
+
+def remote_refs(remote):
+    out = subprocess.run(['git', '-C', str(remote), 'for-each-ref', '--format=%(refname) %(objectname)'],
+                         capture_output=True, text=True, check=True).stdout
+    return dict(line.split() for line in out.splitlines())
+
+def publish(remote, workdir):
+    summary = new_write_summary()
+    publisher = GitPublisher(str(remote), workdir=str(workdir), token='secret-token')
+    branches = publisher.publish(
+        TICKETS,
+        test_cases={'PROJ-1': '# Test cases for PROJ-1\n'},
+        project_files={'requirements.txt': 'pytest\n'},
+        main_readme='# Project\n',
+        render_branch_readme=lambda key, task: f"# {key}: {task['summary']}\n",
+        write_summary=summary
+    )
+    return branches, summary
+
+def test_publish_to_bare_repository_and_rerun_skips_writes(tmp_path):
+    remote = tmp_path / 'remote.git'
+    subprocess.run(['git', 'init', '-q', '--bare', str(remote)], check=True)
+
+    branches, summary = publish(remote, tmp_path / 'work1')
+    assert branches == ['main', 'feature/PROJ-1-login-page', 'feature/PROJ-3-audit-log']
+    # Feature branches start from main, so their README is an update
+    assert summary == {'created': 3, 'updated': 2, 'skipped': 0}
+    refs = remote_refs(remote)
+    assert set(refs) == {f"refs/heads/{branch}" for branch in branches}
+    shown = subprocess.run(['git', '-C', str(remote), 'show', 'feature/PROJ-1-login-page:test_cases_PROJ-1.md'],
+                           capture_output=True, text=True, check=True).stdout
+    assert shown == '# Test cases for PROJ-1\n'
+
+    # A second run, even from a fresh working copy, writes nothing
+    _, summary = publish(remote, tmp_path / 'work2')
+    assert summary['created'] == 0 and summary['updated'] == 0 and summary['skipped'] == 5
+    assert remote_refs(remote) == refs
+
+def test_token_is_not_stored_in_working_copy(tmp_path):
+    remote = tmp_path / 'remote.git'
+    subprocess.run(['git', 'init', '-q', '--bare', str(remote)], check=True)
+    publish(remote, tmp_path / 'work')
+    config = (tmp_path / 'work' / '.git' / 'config').read_text()
+    assert 'secret-token' not in config
+    assert str(remote) in config
@@ -0,0 +1,50 @@
+from jira_adf import markdown_to_adf, adf_doc, inline_nodes
+
+def test_inline_marks():
+    assert inline_nodes("Run **now** with `--fast`") == [
+        {'type': 'text', 'text': 'Run '},
+        {'type': 'text', 'text': 'now', 'marks': [{'type': 'strong'}]},
+        {'type': 'text', 'text': ' with '},
+        {'type': 'text', 'text': '--fast', 'marks': [{'type': 'code'}]},
+    ]
+
+def test_test_case_document_structure():
+    markdown = (
+        "# Test Cases for PROJ-1\n\n"
+        "**Objective**: Verify login\n"
+        "**Test Steps**:\n"
+        "1. Open the page\n"
+        "2. Sign in\n"
+        "- Dashboard opens\n"
+        "---\n"
+        "```python\nassert ok\n\nprint(1)\n```\n"
+    )
+    doc = markdown_to_adf(markdown)
+    assert doc['type'] == 'doc' and doc['version'] == 1
+    assert [block['type'] for block in doc['content']] == ['heading', 'paragraph', 'orderedList', 'bulletList', 'rule', 'codeBlock']
+    assert doc['content'][0]['attrs'] == {'level': 1}
+    # Consecutive lines keep their line breaks
+    assert {'type': 'hardBreak'} in doc['content'][1]['content']
+    assert len(doc['content'][2]['content']) == 2
+    code = doc['content'][5]
+    assert code['attrs'] == {'language': 'python'}
+    assert code['content'][0]['text'] == "assert ok\n\nprint(1)"
+
+def test_unterminated_code_block_is_kept():
+    doc = markdown_to_adf("```\nstill code")
+    assert doc['content'] == [{'type': 'codeBlock', 'attrs': {}, 'content': [{'type': 'text', 'text': 'still code'}]}]
+
+def test_plain_document():
+    assert adf_doc("one\ntwo")['content'][0]['content'] == [
+        {'type': 'text', 'text': 'one'}, {'type': 'hardBreak'}, {'type': 'text', 'text': 'two'}
+    ]
+
+def test_nested_lists():
+    doc = markdown_to_adf("- a\n  - nested\n    1. deep\n- b\n1. x")
+    outer, ordered = doc['content']
+    assert [item['content'][0]['content'][0]['text'] for item in outer['content']] == ['a', 'b']
+    nested = outer['content'][0]['content'][1]
+    assert nested['type'] == 'bulletList'
+    assert nested['content'][0]['content'][0]['content'][0]['text'] == 'nested'
+    assert nested['content'][0]['content'][1]['type'] == 'orderedList'
+    assert ordered['type'] == 'orderedList'
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import main_task3
+import rate_limiter
+
+class Response:
+    def raise_for_status(self):
+        pass
+
+class Session:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, headers, data, timeout):
+        self.posts.append((url, headers, data))
+        return Response()
+
+@pytest.fixture
+def session(monkeypatch):
+    session = Session()
+    monkeypatch.setattr(main_task3, 'http_session', lambda: session)
+    monkeypatch.setattr(main_task3, 'JIRA_URL', 'https://jira.example.com')
+    monkeypatch.setattr(main_task3, 'JIRA_EMAIL', 'bot@example.com')
+    monkeypatch.setattr(main_task3, 'JIRA_API_TOKEN', 'token')
+    monkeypatch.setattr(main_task3, 'JIRA_COMMENT_MAX_CHARS', 4000)
+    monkeypatch.setattr(rate_limiter, 'RATE_LIMITS_ENABLED', False)
+    return session
+
+def document(count):
+    return "# Test Cases for PROJ-1\n\n" + "".join(
+        f"### Test Case TC_PROJ-1_{n:02d}\n**Test Steps**:\n1. Open the page\n**Expected Result**:\n- It works\n\n"
+        for n in range(1, count + 1)
+    )
+
+def test_small_document_is_one_adf_comment(session):
+    assert main_task3.post_jira_comment('PROJ-1', document(2)) == 'comment'
+    (url, headers, data), = session.posts
+    assert url == 'https://jira.example.com/rest/api/3/issue/PROJ-1/comment'
+    assert len(data) <= 4000
+    assert json.loads(data)['body']['type'] == 'doc'
+
+def test_document_whose_adf_exceeds_the_limit_is_attached(session):
+    content = document(8)
+    # The Markdown alone would fit; its ADF body does not
+    assert len(content) < 4000
+    assert main_task3.post_jira_comment('PROJ-1', content) == 'attachment'
+    (attach_url, attach_headers, attachment), (comment_url, _, comment) = session.posts
+    assert attach_url.endswith('/issue/PROJ-1/attachments')
+    assert attach_headers['X-Atlassian-Token'] == 'no-check'
+    assert content.encode('utf-8') in attachment
+    assert comment_url.endswith('/issue/PROJ-1/comment')
+    assert '8 test cases' in json.dumps(json.loads(comment))
@@ -0,0 +1,60 @@
+from local_extractor import extract_sections, task_heading_level
+from text_normalizer import normalize_text, PAGE_BREAK
+
+# Extracted .docx text: heading styles as '#' levels, list levels as indented '- ' items
+DOCUMENT = """# Booking Service Requirements
+
+## Overview
+This document describes the booking service.
+
+## 1. Booking limits (Phase 1)
+Customers can book guards for events.
+### Acceptance Criteria
+- 8
+- 12
+  - 24
+### Capacity rules
+Venues set their own limits.
+- 5
+- Bookings over the limit are rejected
+
+## 2. Audit log
+Every booking change is recorded.
+- Events include the user and timestamp
+| Field | Type |
+"""
+
+def test_numeric_criteria_survive_normalization():
+    normalized, stats = normalize_text(DOCUMENT)
+    assert stats['page_numbers'] == 0
+    sections, confidence, details = extract_sections(normalized)
+    assert [task['title'] for task in sections] == ['Booking limits', 'Audit log']
+    limits, audit = sections
+    assert limits['acceptance_criteria'] == ['8', '12; 24']
+    subtask, = limits['subtasks']
+    assert (subtask['number'], subtask['title']) == ('1.1', 'Capacity rules')
+    assert subtask['acceptance_criteria'] == ['5', 'Bookings over the limit are rejected']
+    assert audit['description'] == 'Every booking change is recorded. Field | Type.'
+    assert confidence >= 0.75
+    assert details['tasks'] == 2 and details['subtasks'] == 1
+
+def test_paginated_text_keeps_numeric_criteria():
+    pages = [
+        "ACME Confidential\n## Booking limits\nCustomers book guards.\n- 8\n- 12\n1",
+        "ACME Confidential\n## Audit log\nChanges are recorded.\n- 30\n2",
+        "ACME Confidential\n## Reporting\nManagers see totals.\n- 7\n3",
+    ]
+    normalized, stats = normalize_text(PAGE_BREAK.join(pages))
+    assert 'ACME' not in normalized
+    sections, confidence, _ = extract_sections(normalized)
+    assert [task['acceptance_criteria'] for task in sections] == [['8', '12'], ['30'], ['7']]
+    assert confidence >= 0.75
+
+def test_unstructured_text_has_no_confidence():
+    sections, confidence, details = extract_sections("Build a login page and an audit log.")
+    assert sections == [] and confidence == 0.0 and details['reason'] == 'no headings'
+
+def test_task_heading_level():
+    assert task_heading_level([1, 2, 2, 3]) == 2
+    assert task_heading_level([1, 1, 2]) == 1
+    assert task_heading_level([2]) == 2
@@ -0,0 +1,25 @@
+import main_task1
+import model_router
+from model_router import choose_model, complete_with_routing
+
+DOCUMENT = "Login\nUsers sign in with email and password.\n- Lock the account after five failures\n"
+
+def test_extract_template_lines_do_not_count_as_items(monkeypatch):
+    monkeypatch.setattr(model_router, 'GROQ_LARGE_MODEL', None)
+    monkeypatch.setattr(model_router, 'ROUTER_ENABLED', True)
+    prompt = main_task1.generate_prompt(DOCUMENT)
+    assert model_router.prompt_items(prompt) > model_router.ROUTER_SMALL_MAX_ITEMS
+
+    assert choose_model(prompt, 'large', payload=DOCUMENT) == model_router.GROQ_SMALL_MODEL
+    list_heavy = DOCUMENT + "".join(f"- Requirement {n}\n" for n in range(model_router.ROUTER_SMALL_MAX_ITEMS))
+    assert choose_model(main_task1.generate_prompt(list_heavy), 'large', payload=list_heavy) == 'large'
+
+def test_routed_call_uses_payload(monkeypatch, tmp_path):
+    monkeypatch.setattr(model_router, 'GROQ_LARGE_MODEL', None)
+    monkeypatch.setattr(model_router, 'ROUTER_ENABLED', True)
+    monkeypatch.setattr(model_router, 'ROUTER_STATS_FILE', str(tmp_path / 'model_usage.jsonl'))
+    models = []
+    content = complete_with_routing('extract', main_task1.generate_prompt(DOCUMENT),
+                                    lambda model: models.append(model) or ('Task 1: Login', None),
+                                    large_model='large', payload=DOCUMENT)
+    assert content == 'Task 1: Login' and models == [model_router.GROQ_SMALL_MODEL]
@@ -0,0 +1,46 @@
+import threading
+
+from orchestrator import Dag
+
+def test_dependencies_run_in_order_and_share_results():
+    dag = Dag(max_workers=4)
+    dag.add('load', lambda: 2)
+    dag.add('double', lambda: dag.results['load'] * 2, deps=['load'])
+    dag.add('square', lambda: dag.results['load'] ** 2, deps=['load'])
+    dag.add('sum', lambda: dag.results['double'] + dag.results['square'], deps=['double', 'square'])
+    results = dag.run()
+    assert results['sum'] == 8
+    assert all(state == 'done' for state in dag.status.values())
+
+def test_independent_nodes_run_concurrently():
+    dag = Dag(max_workers=2)
+    barrier = threading.Barrier(2, timeout=5)
+    dag.add('a', barrier.wait)
+    dag.add('b', barrier.wait)
+    dag.run()
+    assert dag.status == {'a': 'done', 'b': 'done'}
+
+def test_failure_skips_dependents_transitively():
+    dag = Dag(max_workers=2)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    dag.add('fail', fail)
+    dag.add('child', lambda: 1, deps=['fail'])
+    dag.add('grandchild', lambda: 1, deps=['child'])
+    dag.add('other', lambda: 1)
+    dag.run()
+    assert dag.status == {'fail': 'failed', 'child': 'skipped', 'grandchild': 'skipped', 'other': 'done'}
+
+def test_nodes_added_while_running_and_critical_path():
+    dag = Dag(max_workers=2)
+
+    def spawn():
+        dag.add('spawned', lambda: 'late')
+        return 'early'
+
+    dag.add('spawn', spawn)
+    results = dag.run()
+    assert results == {'spawn': 'early', 'spawned': 'late'}
+    assert dag.critical_path() == ['spawn', 'spawned']
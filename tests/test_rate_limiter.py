@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import rate_limiter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def limits(tmp_path, monkeypatch):
+    # 60 requests and 600 tokens a minute at full rate: one request and 10 tokens a second, bursts of 2 seconds
+    monkeypatch.setattr(rate_limiter, 'RATE_LIMITS_ENABLED', True)
+    monkeypatch.setattr(rate_limiter, 'RATE_LIMIT_DIR', str(tmp_path))
+    monkeypatch.setattr(rate_limiter, 'RATE_LIMIT_HEADROOM', 1.0)
+    monkeypatch.setattr(rate_limiter, 'RATE_LIMIT_BURST_SECONDS', 2.0)
+    monkeypatch.setitem(rate_limiter.SERVICE_LIMITS, 'github', {'requests': 60})
+    monkeypatch.setitem(rate_limiter.SERVICE_LIMITS, 'groq', {'requests': 60, 'tokens': 600})
+    return tmp_path
+
+def test_burst_then_refusal(limits):
+    assert rate_limiter.acquire('github:test', max_wait=0)
+    assert rate_limiter.acquire('github:test', max_wait=0)
+    assert not rate_limiter.acquire('github:test', max_wait=0)
+    # Each endpoint has its own bucket
+    assert rate_limiter.acquire('github:other', max_wait=0)
+
+def test_waits_for_refill(limits):
+    rate_limiter.acquire('github:test')
+    rate_limiter.acquire('github:test')
+    assert rate_limiter.acquire('github:test', max_wait=2)
+
+def test_token_budget_and_settlement(limits):
+    assert rate_limiter.acquire('groq:model', tokens=20, max_wait=0)
+    assert not rate_limiter.acquire('groq:model', tokens=10, max_wait=0)
+    # The response used fewer tokens than charged up front
+    rate_limiter.settle_tokens('groq:model', actual_tokens=5, charged_tokens=20)
+    assert rate_limiter.acquire('groq:model', tokens=10, max_wait=0)
+
+def test_penalize_holds_back_requests(limits):
+    rate_limiter.penalize('github:test', 3)
+    assert not rate_limiter.acquire('github:test', max_wait=1)
+
+def test_budget_is_shared_across_processes(limits):
+    assert rate_limiter.acquire('github:test', max_wait=0)
+    assert rate_limiter.acquire('github:test', max_wait=0)
+    env = dict(os.environ, RATE_LIMIT_DIR=str(limits), RATE_LIMIT_HEADROOM='1', RATE_LIMIT_BURST_SECONDS='2',
+               RATE_LIMIT_GITHUB_RPM='60', RATE_LIMITS_ENABLED='true')
+    result = subprocess.run([sys.executable, '-c', "import rate_limiter; print(rate_limiter.acquire('github:test', max_wait=0))"],
+                            capture_output=True, text=True, cwd=ROOT, env=env, check=True)
+    assert result.stdout.strip() == 'False'
@@ -0,0 +1,27 @@
+import time
+
+import pytest
+
+import resilience
+from resilience import resilient_call, DeadlineExceeded
+
+def test_hedged_call_keeps_the_callers_deadline(monkeypatch):
+    monkeypatch.setattr(resilience, 'HEDGE_DEFAULT_DELAY', 0.2)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        resilient_call('hedge-test', lambda: time.sleep(1.0), deadline=0.5, hedge=True)
+    # The hedge wait comes out of the deadline instead of extending it
+    assert time.monotonic() - started < 0.65
+
+def test_hedge_wins_over_a_stalled_request(monkeypatch):
+    monkeypatch.setattr(resilience, 'HEDGE_DEFAULT_DELAY', 0.05)
+    calls = []
+
+    def request():
+        calls.append(None)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return 'slow'
+        return 'fast'
+
+    assert resilient_call('hedge-race', request, deadline=2, hedge=True) == 'fast'
@@ -0,0 +1,83 @@
+from task_parser import parse_sections, find_gaps, format_gaps, merge_sections, to_tasks, format_sections
+
+CANONICAL = """Task 1: Login page
+Description: Users sign in.
+Acceptance Criteria:
+- Valid credentials open the dashboard
+
+Subtask 1.1: Login form
+Description: Email and password fields.
+Acceptance Criteria:
+- Fields are validated
+
+Task 2: Audit log
+Description: Store booking changes.
+Acceptance Criteria:
+- Events are stored
+"""
+
+def test_canonical_format_round_trips():
+    sections = parse_sections(CANONICAL)
+    assert [task['number'] for task in sections] == [1, 2]
+    assert sections[0]['subtasks'][0]['number'] == '1.1'
+    assert find_gaps(sections) == []
+    assert parse_sections(format_sections(sections)) == sections
+
+def test_drifted_formatting():
+    text = """Here is the breakdown:
+
+### **Task 1 - Login page**
+**Description:** Users sign in
+with email and password.
+**Acceptance Criteria:**
+1. Valid credentials open
+   the dashboard
+2) Invalid credentials show an error
+
+## Sub-task 1.1. Login form
+Description - Email and password fields.
+* Fields are validated
+"""
+    task, = parse_sections(text)
+    assert task['title'] == 'Login page'
+    assert task['description'] == 'Users sign in with email and password.'
+    assert task['acceptance_criteria'] == ['Valid credentials open the dashboard', 'Invalid credentials show an error']
+    subtask, = task['subtasks']
+    assert (subtask['number'], subtask['title']) == ('1.1', 'Login form')
+    assert subtask['acceptance_criteria'] == ['Fields are validated']
+
+def test_subtask_numbered_for_another_task_moves_under_current():
+    sections = parse_sections("Task 2: Audit\nDescription: Log.\n- Stored\nSubtask 3.1: Export\nDescription: CSV.\n- Downloads")
+    assert [subtask['number'] for subtask in sections[0]['subtasks']] == ['2.1']
+
+def test_gaps_and_targeted_merge():
+    sections = parse_sections(CANONICAL.replace("Task 2: Audit log", "Task 3: Audit log").replace("- Fields are validated\n", ""))
+    assert format_gaps(find_gaps(sections)) == ["Task 2: missing", "Subtask 1.1: no acceptance criteria"]
+
+    reply = parse_sections(
+        "Subtask 1.1: Login form\nAcceptance Criteria:\n- Fields are validated\n\n"
+        "Task 2: Password reset\nDescription: Reset by email.\nAcceptance Criteria:\n- A reset link is sent\n",
+        keep_parents=True
+    )
+    merge_sections(sections, reply)
+    assert find_gaps(sections) == []
+    assert [task['number'] for task in sections] == [1, 2, 3]
+    # Content that was already there is kept
+    assert sections[0]['subtasks'][0]['description'] == 'Email and password fields.'
+    assert to_tasks(sections)[1] == {
+        'title': 'Password reset', 'description': 'Reset by email.',
+        'acceptance_criteria': ['A reset link is sent'], 'subtasks': []
+    }
+
+def test_numbered_steps_in_a_description_stay_in_the_description():
+    task, = parse_sections(
+        "Task 1: Login page\n"
+        "Description: Steps:\n1. Open page\n2) Enter creds\n"
+        "Acceptance Criteria:\n1. Valid credentials open the dashboard\n"
+    )
+    assert task['description'] == 'Steps: 1. Open page 2) Enter creds'
+    assert task['acceptance_criteria'] == ['Valid credentials open the dashboard']
+
+    task, = parse_sections("Task 1: Login page\nDescription: Steps:\n1. Open page\n2. Enter creds\n")
+    assert task['acceptance_criteria'] == []
+    assert find_gaps([task]) == [('Task 1', ['no acceptance criteria'])]
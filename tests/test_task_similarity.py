@@ -0,0 +1,50 @@
+import main_task3
+from task_similarity import SimilarityIndex, shingles, jaccard, task_text, rekey_test_case
+
+def task(summary, description, criteria, subtasks=None):
+    return {'summary': summary, 'description': description, 'acceptance_criteria': criteria, 'subtasks': subtasks or {}}
+
+LOGIN = task('Implement login page', 'Users sign in with email and password on the login page',
+             ['Valid credentials open the dashboard', 'Invalid credentials show an error message'])
+ADMIN_LOGIN = task('Implement admin login page', 'Users sign in with email and password on the login page',
+                   ['Valid credentials open the dashboard', 'Invalid credentials show an error message'])
+AUDIT = task('Store audit events', 'Every booking change is written to the audit log',
+             ['Events include the user and timestamp'])
+
+def test_shingles_and_jaccard():
+    assert shingles('One two three four') == {'one two three', 'two three four'}
+    assert shingles('Two words') == {'two words'}
+    assert jaccard({'a', 'b'}, {'b', 'c'}) == 1 / 3
+
+def test_query_finds_near_duplicate_only():
+    index = SimilarityIndex()
+    index.add('PROJ-1', task_text(LOGIN))
+    index.add('PROJ-3', task_text(AUDIT))
+    key, similarity = index.query(task_text(ADMIN_LOGIN), 0.8)
+    assert key == 'PROJ-1' and 0.8 <= similarity < 1
+    assert index.query(task_text(ADMIN_LOGIN), 0.8, allowed={'PROJ-3'}) is None
+    assert index.query(task_text(AUDIT), 0.99) == ('PROJ-3', 1.0)
+
+def test_rekey_test_case_maps_task_and_subtask_keys():
+    source = dict(LOGIN, subtasks={'PROJ-2': task('Login form', '', [])})
+    target = dict(ADMIN_LOGIN, description='Admins sign in on the admin login page', subtasks={'PROJ-12': task('Admin login form', '', [])})
+    content = (
+        "# Test Cases for PROJ-1: Implement login page\n\n"
+        f"## Task Description\n{LOGIN['description']}\n\n"
+        "### Test Case TC_PROJ-1_01\n### Test Case TC_PROJ-2_01\nSee PROJ-10 and PROJ-21\n"
+    )
+    rekeyed = rekey_test_case(content, 'PROJ-1', source, 'PROJ-11', target)
+    assert rekeyed.startswith("# Test Cases for PROJ-11: Implement admin login page\n")
+    assert target['description'] in rekeyed and source['description'] not in rekeyed
+    assert 'TC_PROJ-11_01' in rekeyed and 'TC_PROJ-12_01' in rekeyed
+    # Longer keys that merely start with a mapped key are left alone
+    assert 'PROJ-10 and PROJ-21' in rekeyed
+
+def test_reuse_summary_only_when_reuse_is_possible(monkeypatch, capsys):
+    monkeypatch.setattr(main_task3, 'call_groq_api', lambda prompt: "## Test Steps\n1. Open\n**Expected Result**: works")
+    tasks = {'PROJ-1': LOGIN, 'PROJ-2': ADMIN_LOGIN}
+
+    main_task3.generate_test_cases({'PROJ-1': LOGIN}, similarity_threshold=0.8, batched={})
+    assert 'Reused test cases for' not in capsys.readouterr().out
+    main_task3.generate_test_cases(tasks, similarity_threshold=0.8, batched={})
+    assert 'Reused test cases for 1 of 2 tasks' in capsys.readouterr().out
@@ -0,0 +1,34 @@
+from text_normalizer import normalize_text, PAGE_BREAK
+
+def test_numeric_list_items_are_kept_without_page_breaks():
+    text = "5\n- 8\n- 12\n  - 24\n"
+    normalized, stats = normalize_text(text)
+    assert normalized == text
+    assert stats['page_numbers'] == 0
+
+def test_numeric_list_items_are_kept_at_page_edges():
+    pages = ["- 8\nFirst page body\n- 12", "  - 24\nSecond page body\n- 30"]
+    normalized, stats = normalize_text(PAGE_BREAK.join(pages))
+    for item in ("- 8", "- 12", "  - 24", "- 30"):
+        assert item in normalized.split("\n")
+    assert stats['page_numbers'] == 0
+
+def test_page_numbers_only_removed_at_page_edges():
+    pages = ["Intro paragraph\n7\nMore intro\n1", "Body paragraph\nPage 2 of 2"]
+    normalized, stats = normalize_text(PAGE_BREAK.join(pages))
+    lines = normalized.split("\n")
+    assert "7" in lines
+    assert "1" not in lines and "Page 2 of 2" not in lines
+    assert stats['page_numbers'] == 2
+
+def test_repeated_headers_and_footers_removed():
+    pages = [f"ACME Requirements\n{body}\n- criterion {n}\nConfidential - page {n}" for n, body in enumerate(("Login flow", "Signup form", "Password reset", "Audit log"), 1)]
+    normalized, stats = normalize_text(PAGE_BREAK.join(pages))
+    assert "ACME" not in normalized and "Confidential" not in normalized
+    assert all(f"- criterion {n}" in normalized for n in range(1, 5))
+    assert stats['header_footer_lines'] == 8
+
+def test_hyphenation_and_whitespace():
+    normalized, stats = normalize_text("A require-\nment with  extra   spaces\n  - nested item\n")
+    assert normalized == "A requirement with extra spaces\n  - nested item\n"
+    assert stats['hyphenations'] == 1
@@ -0,0 +1,59 @@
+import json
+
+from ticket_manifest import TicketManifest, read_tickets
+
+def test_rerun_keeps_manifest_of_crashed_run(tmp_path):
+    path = tmp_path / 'ticket_keys.jsonl'
+    crashed = TicketManifest(str(path))
+    crashed.append({'key': 'PROJ-1', 'summary': 'Login page', 'type': 'Task'})
+    # The crashed run never closes its manifest; the line is already flushed
+    crashed.file.close()
+
+    with TicketManifest(str(path)) as manifest:
+        manifest.append({'key': 'PROJ-2', 'summary': 'Login page', 'type': 'Task'})
+
+    assert manifest.rotated is not None
+    with open(manifest.rotated, encoding='utf-8') as f:
+        assert [json.loads(line)['key'] for line in f] == ['PROJ-1']
+    stream, count = read_tickets(str(path))
+    assert count == 1 and [ticket['key'] for ticket in stream] == ['PROJ-2']
+
+def test_append_mode_extends_existing_manifest(tmp_path):
+    path = tmp_path / 'ticket_keys.jsonl'
+    with TicketManifest(str(path)) as manifest:
+        manifest.append({'key': 'PROJ-1', 'summary': 'Login page', 'type': 'Task'})
+    with TicketManifest(str(path), mode='a') as manifest:
+        manifest.append({'key': 'PROJ-2', 'summary': 'Login form', 'type': 'Sub-task', 'parent_key': 'PROJ-1'})
+    assert manifest.rotated is None
+    stream, count = read_tickets(str(path))
+    assert count == 2
+    assert len(list(tmp_path.iterdir())) == 1
+
+def test_empty_manifest_is_not_rotated(tmp_path):
+    path = tmp_path / 'ticket_keys.jsonl'
+    TicketManifest(str(path)).close()
+    with TicketManifest(str(path)) as manifest:
+        pass
+    assert manifest.rotated is None
+    assert len(list(tmp_path.iterdir())) == 1
+
+def test_sink_flushes_each_ticket_and_rewrite_restores_order(tmp_path):
+    import threading
+    from ticket_manifest import ManifestSink
+
+    path = tmp_path / 'ticket_keys.jsonl'
+    manifest = TicketManifest(str(path))
+    lock = threading.Lock()
+    first, second = ManifestSink(manifest, lock), ManifestSink(manifest, lock)
+    first.append({'key': 'PROJ-1', 'summary': 'Login page', 'type': 'Task'})
+    second.append({'key': 'PROJ-3', 'summary': 'Audit log', 'type': 'Task'})
+    first.append({'key': 'PROJ-2', 'summary': 'Login form', 'type': 'Sub-task', 'parent_key': 'PROJ-1'})
+
+    # Already on disk while the tasks are still being created
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['key'] for line in f] == ['PROJ-1', 'PROJ-3', 'PROJ-2']
+    assert [ticket['key'] for ticket in first] == ['PROJ-1', 'PROJ-2']
+
+    manifest.rewrite(list(first) + list(second))
+    stream, count = read_tickets(str(path))
+    assert [ticket['key'] for ticket in stream] == ['PROJ-1', 'PROJ-2', 'PROJ-3']
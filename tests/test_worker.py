@@ -0,0 +1,65 @@
+import pytest
+
+from worker import InboxWorker, InboxLocked
+
+class IdleClients:
+    def warm(self):
+        pass
+
+def make_worker(tmp_path):
+    return InboxWorker(str(tmp_path / 'inbox'), str(tmp_path / 'outbox'), poll_seconds=0, clients=IdleClients())
+
+def test_second_worker_leaves_claimed_documents_alone(tmp_path):
+    first = make_worker(tmp_path)
+    first.lock_inbox()
+    in_progress = tmp_path / 'inbox' / 'processing' / 'spec.txt'
+    in_progress.write_text('Task 1: Login\n')
+    try:
+        with pytest.raises(InboxLocked):
+            make_worker(tmp_path).serve(once=True)
+        assert in_progress.exists()
+    finally:
+        first.unlock_inbox()
+
+def test_recovery_after_previous_worker_exited(tmp_path):
+    make_worker(tmp_path)
+    (tmp_path / 'inbox' / 'processing' / 'spec.txt').write_text('Task 1: Login\n')
+    make_worker(tmp_path).serve(once=True)
+    assert (tmp_path / 'inbox' / 'failed' / 'spec.txt').exists()
+    assert not (tmp_path / 'inbox' / 'processing' / 'spec.txt').exists()
+
+def test_same_name_documents_are_archived_side_by_side(tmp_path, monkeypatch):
+    import worker
+    from github_sync import new_write_summary
+    monkeypatch.setattr(worker, 'build_pipeline', lambda dag, path, work_dir, clients: new_write_summary())
+    inbox = tmp_path / 'inbox'
+    for content in ('first', 'second'):
+        make_worker(tmp_path)
+        (inbox / 'spec.txt').write_text(content)
+        make_worker(tmp_path).serve(once=True)
+    archived = sorted(path.read_text() for path in (inbox / 'done').iterdir())
+    assert archived == ['first', 'second']
+
+def test_errors_outside_the_pipeline_are_recorded(tmp_path, monkeypatch, capsys):
+    worker_ = make_worker(tmp_path)
+    (tmp_path / 'inbox' / 'spec.txt').write_text('Task 1: Login\n')
+
+    def no_work_dir(name):
+        raise OSError("outbox is read-only")
+
+    monkeypatch.setattr(worker_, 'work_dir_for', no_work_dir)
+    worker_.serve(once=True)
+    failed = list((tmp_path / 'inbox' / 'failed').iterdir())
+    assert len(failed) == 1 and failed[0].name.startswith('spec-')
+    assert 'outbox is read-only' in (tmp_path / 'outbox' / 'results.jsonl').read_text()
+
+def test_unexpected_errors_are_logged_not_lost(tmp_path, monkeypatch, capsys):
+    worker_ = make_worker(tmp_path)
+    (tmp_path / 'inbox' / 'spec.txt').write_text('Task 1: Login\n')
+
+    def broken(path):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(worker_, 'process', broken)
+    worker_.serve(once=True)
+    assert 'worker error on spec.txt: disk full' in capsys.readouterr().out
@@ -0,0 +1,116 @@
+import os
+import re
+import logging
+from collections import Counter
+
+from model_router import estimate_tokens
+
+# Extracted text is cleaned before it is put into a prompt: repeated page
+# headers/footers, page numbers, hyphenated line breaks, whitespace runs and
+# repeated boilerplate paragraphs cost tokens without adding information.
+NORMALIZE_TEXT = os.getenv('NORMALIZE_TEXT', 'true').lower() in ('1', 'true', 'yes')
+# A line at the top/bottom of at least this share of pages is a header/footer
+NORMALIZE_HEADER_MIN_PAGES = float(os.getenv('NORMALIZE_HEADER_MIN_PAGES', '0.5'))
+# Only paragraphs at least this long are dropped as duplicates (short list items legitimately repeat)
+NORMALIZE_MIN_DUPLICATE_CHARS = int(os.getenv('NORMALIZE_MIN_DUPLICATE_CHARS', '60'))
+
+PAGE_BREAK = "\f"
+PAGE_NUMBER = re.compile(r'^\s*(?:page\s*)?[-–]?\s*\d{1,4}\s*(?:(?:of|/)\s*\d{1,4})?\s*[-–]?\s*$', re.IGNORECASE)
+HYPHENATED_BREAK = re.compile(r'([A-Za-z])-\n([a-z])')
+INLINE_WHITESPACE = re.compile(r'(?<=\S)[ \t ]{2,}')
+BLANK_LINES = re.compile(r'\n{3,}')
+
+def _page_edge_key(line):
+    # Headers/footers often differ only in the page number
+    return re.sub(r'\d+', '#', line.strip().lower())
+
+STRUCTURAL_PREFIXES = ('#', '- ', '|')
+
+def _edge_lines(lines, count=2):
+    # Headings, list items and table rows carry structure and are never page furniture
+    content = [i for i, line in enumerate(lines) if line.strip() and not line.strip().startswith(STRUCTURAL_PREFIXES)]
+    return content[:count] + content[-count:]
+
+def remove_page_furniture(text, stats):
+    """Drop page numbers and lines repeated at the top or bottom of most pages.
+
+    Pages are separated by form feeds (see extract_text_to_txt). A page number
+    is only removed as the first or last content line of a page, and text
+    without page breaks (.docx, .txt) keeps all of its lines.
+    """
+    pages = [page.split("\n") for page in text.split(PAGE_BREAK)]
+    repeated = set()
+    if len(pages) >= 3:
+        edge_counts = Counter()
+        for lines in pages:
+            edge_counts.update({_page_edge_key(lines[i]) for i in _edge_lines(lines)})
+        repeated = {key for key, n in edge_counts.items() if key and n >= NORMALIZE_HEADER_MIN_PAGES * len(pages)}
+
+    cleaned = []
+    for lines in pages:
+        edges = set(_edge_lines(lines)) if len(pages) > 1 else set()
+        outer = set(_edge_lines(lines, count=1)) if len(pages) > 1 else set()
+        kept = []
+        for i, line in enumerate(lines):
+            if i in edges and _page_edge_key(line) in repeated:
+                stats['header_footer_lines'] += 1
+            elif i in outer and PAGE_NUMBER.match(line):
+                stats['page_numbers'] += 1
+            else:
+                kept.append(line)
+        cleaned.append("\n".join(kept))
+    return "\n\n".join(cleaned)
+
+def remove_duplicate_paragraphs(text, stats):
+    """Keep the first occurrence of long paragraphs that repeat verbatim (boilerplate)."""
+    seen = set()
+    kept = []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if len(stripped) >= NORMALIZE_MIN_DUPLICATE_CHARS and not stripped.startswith(STRUCTURAL_PREFIXES):
+            key = " ".join(stripped.lower().split())
+            if key in seen:
+                stats['duplicate_paragraphs'] += 1
+                continue
+            seen.add(key)
+        kept.append(line)
+    return "\n".join(kept)
+
+def normalize_text(text):
+    """Return (normalized_text, stats) with character and estimated token savings."""
+    stats = {'header_footer_lines': 0, 'page_numbers': 0, 'hyphenations': 0, 'duplicate_paragraphs': 0}
+    original = text
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = remove_page_furniture(text, stats)
+    text, stats['hyphenations'] = HYPHENATED_BREAK.subn(r'\1\2', text)
+    # Leading indentation encodes list nesting, so only runs after the first non-space character collapse
+    text = "\n".join(INLINE_WHITESPACE.sub(" ", line).rstrip() for line in text.split("\n"))
+    text = remove_duplicate_paragraphs(text, stats)
+    text = BLANK_LINES.sub("\n\n", text).strip() + "\n"
+
+    stats.update({
+        'chars_before': len(original),
+        'chars_after': len(text),
+        'tokens_before': estimate_tokens(original),
+        'tokens_after': estimate_tokens(text)
+    })
+    return text, stats
+
+def format_normalize_stats(stats):
+    saved = stats['tokens_before'] - stats['tokens_after']
+    percent = 100.0 * saved / stats['tokens_before'] if stats['tokens_before'] else 0.0
+    return (
+        f"{stats['chars_before']} -> {stats['chars_after']} characters, "
+        f"~{stats['tokens_before']} -> ~{stats['tokens_after']} tokens ({percent:.1f}% saved); removed "
+        f"{stats['header_footer_lines']} header/footer lines, {stats['page_numbers']} page numbers, "
+        f"{stats['duplicate_paragraphs']} duplicate paragraphs, joined {stats['hyphenations']} hyphenated words"
+    )
+
+def normalize_for_prompt(text, source="document"):
+    """Normalize extracted text (unless NORMALIZE_TEXT is off) and report the savings."""
+    if not NORMALIZE_TEXT:
+        return text
+    text, stats = normalize_text(text)
+    logging.info(f"Normalized {source}: {format_normalize_stats(stats)}")
+    print(f"Normalized {source}: {format_normalize_stats(stats)}")
+    return text
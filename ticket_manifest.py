@@ -0,0 +1,177 @@
+import os
+import json
+import logging
+from datetime import datetime
+
+# Created tickets are recorded one JSON object per line, flushed as each
+# ticket is created, so a crash never loses the record of earlier tickets.
+TICKET_MANIFEST = os.getenv('TICKET_MANIFEST', 'ticket_keys.jsonl')
+LEGACY_TICKET_FILE = 'ticket_keys.json'
+REQUIRED_FIELDS = ('key', 'summary', 'type')
+
+def rotate_manifest(path):
+    """Move a non-empty manifest aside to ``<name>-<timestamp>.jsonl``; returns the new path or None."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    stem, extension = os.path.splitext(path)
+    rotated = f"{stem}-{datetime.now():%Y%m%d-%H%M%S}{extension}"
+    suffix = 1
+    while os.path.exists(rotated):
+        suffix += 1
+        rotated = f"{stem}-{datetime.now():%Y%m%d-%H%M%S}-{suffix}{extension}"
+    os.replace(path, rotated)
+    logging.info(f"Kept the previous ticket manifest as {rotated}")
+    return rotated
+
+class TicketManifest:
+    """Append-only JSON-lines writer; ``append`` mirrors list.append so it can replace a list sink.
+
+    Each run starts a fresh manifest; an earlier one (possibly from a crashed
+    run whose tickets exist in Jira) is rotated to a timestamped name first.
+    With ``mode='a'`` the existing manifest is extended instead.
+    """
+
+    def __init__(self, path=None, mode='w'):
+        self.path = path or TICKET_MANIFEST
+        self.rotated = rotate_manifest(self.path) if mode == 'w' else None
+        self.file = open(self.path, mode, encoding='utf-8')
+        self.keys = []
+
+    def append(self, ticket):
+        self.file.write(json.dumps(ticket) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.keys.append(ticket['key'])
+
+    def extend(self, tickets):
+        for ticket in tickets:
+            self.append(ticket)
+
+    def close(self):
+        self.file.close()
+
+    def rewrite(self, tickets):
+        """Close the manifest and atomically replace its contents with ``tickets``, in that order."""
+        self.close()
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for ticket in tickets:
+                f.write(json.dumps(ticket) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ManifestSink(list):
+    """One task's tickets, each also written to a shared manifest as soon as it is created.
+
+    Lets concurrent tasks flush every ticket immediately while keeping their
+    own entries together; ``lock`` serializes writes to the manifest.
+    """
+
+    def __init__(self, manifest, lock):
+        super().__init__()
+        self.manifest = manifest
+        self.lock = lock
+
+    def append(self, ticket):
+        with self.lock:
+            self.manifest.append(ticket)
+        super().append(ticket)
+
+class TicketStream:
+    """Re-iterable view over a ticket file that reads one entry at a time.
+
+    Accepts the JSON-lines manifest or the legacy ``ticket_keys.json`` array.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _is_legacy(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            while True:
+                char = f.read(1)
+                if not char or not char.isspace():
+                    return char == '['
+
+    def __iter__(self):
+        if self._is_legacy():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                yield from json.load(f)
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a truncated last line
+                    logging.warning(f"Skipping malformed line {line_number} in {self.path}")
+
+def resolve_ticket_file(path=None):
+    """Prefer the JSON-lines manifest, falling back to the legacy JSON export."""
+    if path:
+        return path
+    if os.path.exists(TICKET_MANIFEST):
+        return TICKET_MANIFEST
+    return LEGACY_TICKET_FILE
+
+def read_tickets(path=None):
+    """Validate a ticket file in one streaming pass and return (TicketStream, count)."""
+    stream = TicketStream(resolve_ticket_file(path))
+    count = 0
+    for ticket in stream:
+        if not all(key in ticket for key in REQUIRED_FIELDS):
+            raise ValueError(f"Invalid ticket entry: {ticket}. Missing required fields.")
+        count += 1
+    return stream, count
+
+def iter_task_groups(tickets):
+    """Yield (task_key, task_info) with subtasks attached, holding one task in memory at a time.
+
+    Relies on each task's subtasks directly following it, which is how tickets
+    are written. Entries with a ``parent_key`` are subtasks; anything else is a task.
+    """
+    current_key, current = None, None
+    for ticket in tickets:
+        parent_key = ticket.get('parent_key')
+        if not parent_key:
+            if current is not None:
+                yield current_key, current
+            current_key = ticket['key']
+            current = {
+                'summary': ticket['summary'],
+                'description': ticket.get('description', 'No description available.'),
+                'acceptance_criteria': ticket.get('acceptance_criteria', []),
+                'subtasks': {}
+            }
+        elif parent_key == current_key:
+            current['subtasks'][ticket['key']] = {
+                'summary': ticket['summary'],
+                'description': ticket.get('description', 'No description available.'),
+                'acceptance_criteria': ticket.get('acceptance_criteria', [])
+            }
+        else:
+            logging.warning(f"Subtask {ticket['key']} does not follow its parent {parent_key}; skipping")
+    if current is not None:
+        yield current_key, current
+
+def export_legacy_json(tickets, json_path=LEGACY_TICKET_FILE):
+    """Stream tickets into the old ``ticket_keys.json`` array format."""
+    count = 0
+    with open(json_path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for ticket in tickets:
+            entry = json.dumps(ticket, indent=2).replace("\n", "\n  ")
+            f.write(("," if count else "") + "\n  " + entry)
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import signal
+import shutil
+import logging
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: the inbox lock is not enforced
+    fcntl = None
+
+import main_task1
+import main_task2
+import main_task3
+from orchestrator import Dag, build_pipeline
+from github_sync import format_write_summary
+from log_setup import setup_logging
+
+# Long-running worker: one process keeps its Jira, GitHub and Groq clients
+# (and the validated issue types) warm, watches an inbox directory and runs
+# each new requirement document through the orchestrator's DAG. Per-document
+# outputs, results and latency go to the outbox.
+WORKER_INBOX = os.getenv('WORKER_INBOX', 'inbox')
+WORKER_OUTBOX = os.getenv('WORKER_OUTBOX', 'outbox')
+WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', '2'))
+WORKER_POLL_SECONDS = float(os.getenv('WORKER_POLL_SECONDS', '2'))
+SUPPORTED_EXTENSIONS = ('.txt', '.pdf', '.docx')
+
+class InboxLocked(Exception):
+    pass
+
+def unique_path(base, extension=''):
+    """``base + extension``, or ``base-2 + extension`` and so on if that already exists."""
+    path, suffix = base + extension, 1
+    while os.path.exists(path):
+        suffix += 1
+        path = f"{base}-{suffix}{extension}"
+    return path
+
+class WarmClients:
+    """Jira and GitHub clients connected once and shared by every document.
+
+    A failed connection is not cached, so the next document tries again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._jira = None
+        self._repo = None
+
+    def jira(self):
+        with self.lock:
+            if self._jira is None:
+                jira = main_task1.validate_jira_connection()
+                if jira is None:
+                    raise RuntimeError("Failed to connect to Jira")
+                self._jira = jira
+            return self._jira
+
+    def repo(self):
+        with self.lock:
+            if self._repo is None:
+                repo = main_task2.create_github_repo()
+                if repo is None:
+                    raise RuntimeError("Failed to create or access repository")
+                self._repo = repo
+            return self._repo
+
+    def warm(self):
+        """Connect up front so the first document does not pay for it."""
+        for name, connect in (('Jira', self.jira), ('GitHub', self.repo), ('Groq', main_task3.groq_client)):
+            try:
+                connect()
+            except Exception as e:
+                logging.warning(f"Could not warm up the {name} client, retrying with the first document: {e}")
+
+class InboxWorker:
+    """Watch ``inbox`` for requirement documents and process them with bounded concurrency.
+
+    A document is claimed by moving it to ``inbox/processing`` once its size
+    and modification time have stopped changing between two polls, then moved
+    to ``inbox/done`` or ``inbox/failed``. Each document gets its own outbox
+    directory for its intermediate files and ``result.json``; every result is
+    also appended to ``outbox/results.jsonl``. Only one worker serves an
+    inbox at a time (an exclusive lock on ``inbox/.lock``), so anything in
+    ``processing`` at startup was left by a worker that is gone.
+    """
+
+    def __init__(self, inbox=None, outbox=None, concurrency=None, poll_seconds=None, clients=None):
+        self.inbox = inbox or WORKER_INBOX
+        self.outbox = outbox or WORKER_OUTBOX
+        self.concurrency = max(1, concurrency or WORKER_CONCURRENCY)
+        self.poll_seconds = WORKER_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.clients = clients or WarmClients()
+        self.stop_event = threading.Event()
+        self.results_lock = threading.Lock()
+        self.sizes = {}
+        self.lock_file = None
+        for name in ('processing', 'done', 'failed'):
+            os.makedirs(os.path.join(self.inbox, name), exist_ok=True)
+        os.makedirs(self.outbox, exist_ok=True)
+
+    def stop(self, *_):
+        logging.info("Worker stopping after the documents in progress")
+        print("Stopping after the documents in progress...")
+        self.stop_event.set()
+
+    def lock_inbox(self):
+        """Take the inbox lock without waiting; raises InboxLocked if another worker holds it."""
+        self.lock_file = open(os.path.join(self.inbox, '.lock'), 'a')
+        if fcntl is None:
+            return
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.lock_file.close()
+            self.lock_file = None
+            raise InboxLocked(f"Another worker is already serving {self.inbox}")
+
+    def unlock_inbox(self):
+        if self.lock_file is not None:
+            # Closing the file releases the flock
+            self.lock_file.close()
+            self.lock_file = None
+
+    def recover(self):
+        """Documents left in processing by a previous run may already have tickets, so they are failed, not rerun."""
+        processing = os.path.join(self.inbox, 'processing')
+        for name in sorted(os.listdir(processing)):
+            logging.warning(f"{name} was interrupted in a previous run; moving it to failed")
+            shutil.move(os.path.join(processing, name), os.path.join(self.inbox, 'failed', name))
+
+    def ready_documents(self, settled=True):
+        """Supported documents in the inbox; with ``settled``, only those unchanged since the last poll."""
+        ready = []
+        for name in sorted(os.listdir(self.inbox)):
+            path = os.path.join(self.inbox, name)
+            if name.startswith(('.', '~$')) or not name.lower().endswith(SUPPORTED_EXTENSIONS) or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            signature = (stat.st_size, stat.st_mtime)
+            previous = self.sizes.get(name)
+            self.sizes[name] = signature
+            if not settled or previous == signature:
+                ready.append(name)
+        return ready
+
+    def claim(self, name):
+        claimed = os.path.join(self.inbox, 'processing', name)
+        try:
+            os.rename(os.path.join(self.inbox, name), claimed)
+        except OSError:
+            # Removed or renamed since the scan
+            return None
+        self.sizes.pop(name, None)
+        return claimed
+
+    def work_dir_for(self, name):
+        stem = os.path.splitext(name)[0]
+        work_dir = unique_path(os.path.join(self.outbox, f"{stem}-{datetime.now():%Y%m%d-%H%M%S}"))
+        os.makedirs(work_dir)
+        return work_dir
+
+    def archive(self, path, result):
+        """Move a processed document to done/ or failed/ under its outbox directory's name, never overwriting."""
+        extension = os.path.splitext(path)[1]
+        if result.get('output_dir'):
+            stem = os.path.basename(result['output_dir'])
+        else:
+            stem = f"{os.path.splitext(os.path.basename(path))[0]}-{datetime.now():%Y%m%d-%H%M%S}"
+        destination = unique_path(os.path.join(self.inbox, result['status'], stem), extension)
+        shutil.move(path, destination)
+        return destination
+
+    def process(self, path):
+        """Run one claimed document through the pipeline and record its result.
+
+        Any error is recorded in the result; the document always leaves processing/.
+        """
+        name = os.path.basename(path)
+        started_at = datetime.now().isoformat(timespec='seconds')
+        started = time.monotonic()
+        result = {'document': name, 'started_at': started_at, 'status': 'failed'}
+        try:
+            work_dir = self.work_dir_for(name)
+            result['output_dir'] = work_dir
+            logging.info(f"Processing {name} into {work_dir}")
+            print(f"Processing {name} into {work_dir}")
+            dag = Dag()
+            write_summary = build_pipeline(dag, path, work_dir=work_dir, clients=self.clients)
+            dag.run()
+            stages = {state: sorted(n for n, s in dag.status.items() if s == state) for state in ('failed', 'skipped')}
+            result.update({
+                'status': 'failed' if stages['failed'] or stages['skipped'] else 'done',
+                'tasks': len(dag.results.get('jira_save') or {}),
+                'failed_stages': stages['failed'],
+                'skipped_stages': stages['skipped'],
+                'stage_seconds': {n: round(end - start, 3) for n, (start, end) in sorted(dag.timing.items())},
+                'critical_path': dag.critical_path(),
+                'repository_writes': format_write_summary(write_summary)
+            })
+        except Exception as e:
+            logging.error(f"Processing {name} failed: {e}")
+            print(f"Error: processing {name} failed: {e}")
+            result.update({'status': 'failed', 'error': str(e)})
+        result['latency_seconds'] = round(time.monotonic() - started, 3)
+
+        try:
+            if result.get('output_dir'):
+                with open(os.path.join(result['output_dir'], 'result.json'), 'w', encoding='utf-8') as f:
+                    json.dump(result, f, indent=2)
+            with self.results_lock:
+                with open(os.path.join(self.outbox, 'results.jsonl'), 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(result) + "\n")
+        except Exception as e:
+            logging.error(f"Could not record the result of {name}: {e}")
+            print(f"Error: could not record the result of {name}: {e}")
+        destination = self.archive(path, result)
+        logging.info(f"{name}: {result['status']} in {result['latency_seconds']:.2f}s, moved to {destination}")
+        print(f"{name}: {result['status']} in {result['latency_seconds']:.2f}s")
+        return result
+
+    def reap(self, in_flight):
+        """Drop finished futures from ``in_flight`` (future -> name), logging any that raised."""
+        for future in [future for future in in_flight if future.done()]:
+            name = in_flight.pop(future)
+            if future.exception() is not None:
+                # process() only raises if the document could not be moved out of processing/
+                logging.error(f"Worker error on {name}: {future.exception()}")
+                print(f"Error: worker error on {name}: {future.exception()}")
+
+    def serve(self, once=False):
+        """Poll the inbox until stopped; with ``once``, process what is there now and return.
+
+        Raises InboxLocked if another worker is serving the same inbox.
+        """
+        self.lock_inbox()
+        try:
+            self.recover()
+            self.clients.warm()
+            logging.info(f"Watching {self.inbox} (concurrency {self.concurrency}, outbox {self.outbox})")
+            print(f"Watching {self.inbox} for .txt/.pdf/.docx documents (concurrency {self.concurrency})")
+            in_flight = {}
+            pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='document')
+            try:
+                while not self.stop_event.is_set():
+                    self.reap(in_flight)
+                    waiting = self.ready_documents(settled=not once)
+                    for name in waiting:
+                        if len(in_flight) >= self.concurrency:
+                            break
+                        claimed = self.claim(name)
+                        if claimed:
+                            in_flight[pool.submit(self.process, claimed)] = name
+                    if once and not in_flight and not waiting:
+                        break
+                    self.stop_event.wait(self.poll_seconds)
+            except KeyboardInterrupt:
+                self.stop()
+            finally:
+                pool.shutdown(wait=True)
+                self.reap(in_flight)
+        finally:
+            self.unlock_inbox()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process requirement documents dropped into an inbox directory, keeping clients warm.")
+    parser.add_argument('--inbox', default=WORKER_INBOX)
+    parser.add_argument('--outbox', default=WORKER_OUTBOX)
+    parser.add_argument('--concurrency', type=int, default=WORKER_CONCURRENCY, help="Documents processed at the same time")
+    parser.add_argument('--poll', type=float, default=WORKER_POLL_SECONDS, help="Seconds between inbox scans")
+    parser.add_argument('--once', action='store_true', help="Process the documents already in the inbox, then exit")
+    args = parser.parse_args(argv)
+    setup_logging()
+    if not main_task3.validate_env_vars():
+        return 1
+    worker = InboxWorker(args.inbox, args.outbox, args.concurrency, args.poll)
+    signal.signal(signal.SIGTERM, worker.stop)
+    try:
+        worker.serve(once=args.once)
+    except InboxLocked as e:
+        logging.error(str(e))
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())